@@ -5,8 +5,8 @@ from api.api_caller import ApiCaller
 
 class ApiBase:
 
-    def __init__( self, config: Config, logger: logging.Logger  ):
+    def __init__( self, config: Config, logger: logging.Logger, api_caller: ApiCaller | None = None ):
         self.config = config
         self.endpoints: Endpoints = Endpoints( self.config )
-        self.api_caller: ApiCaller = ApiCaller( self.config, logger )
+        self.api_caller: ApiCaller = api_caller or ApiCaller( self.config, logger )
         self.logger: logging.Logger = logger
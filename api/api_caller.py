@@ -1,27 +1,76 @@
 from core.config import Config
+from core.metrics import Metrics, metrics
+from core.rate_limiter import RateLimiter
+from core.json_codec import decode_response
+from core.response_cache import ResponseCache
+from core.resilience import CircuitBreaker, CircuitOpenError, HedgePolicy
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+import functools
+import inspect
+import random
+import threading
+import time
+from contextlib import nullcontext
 import requests
+from requests.adapters import BaseAdapter
+from api.transport import create_adapter
 import json
 import logging
 
 def call_logging(func):
     """
-    Decorator for adding loging to pre/post api calls.
+    Decorator for adding loging and metrics to pre/post api calls.
+    Works for both regular and async call methods.
     :param func:
     :return:
     """
-    def wrapper( self, *args, **kwargs):
-        self.pre_logging( *args, **kwargs)
-        response = func( self, *args, **kwargs)
+    method: str = func.__name__.removesuffix( "_uncached" ).removesuffix( "_stream" )
+
+    if inspect.iscoroutinefunction( func ):
+        @functools.wraps( func )
+        async def async_wrapper( self, url, *args, **kwargs ):
+            self.pre_logging( url, *args, **kwargs )
+            start: float = time.perf_counter()
+            try:
+                response = await func( self, url, *args, **kwargs )
+            except Exception:
+                self.record_call( method, url, None, time.perf_counter() - start )
+                raise
+            self.record_call( method, url, response, time.perf_counter() - start )
+            self.post_logging( response )
+            return response
+
+        return async_wrapper
+
+    @functools.wraps( func )
+    def wrapper( self, url, *args, **kwargs):
+        self.pre_logging( url, *args, **kwargs)
+        start: float = time.perf_counter()
+        try:
+            response = func( self, url, *args, **kwargs)
+        except Exception:
+            self.record_call( method, url, None, time.perf_counter() - start )
+            raise
+        self.record_call( method, url, response, time.perf_counter() - start )
         self.post_logging(response)
         return response
 
     return wrapper
 
-class ApiCaller:
+class ApiCallerBase:
+    """
+    Shared headers, call logging, rate limiting and retry policy for the sync and async api callers.
+    """
+
+    RETRY_STATUS_CODES: tuple = ( 429, 500, 502, 503, 504 )
+    IDEMPOTENT_METHODS: tuple = ( "GET", "PUT", "DELETE" )
+    DEBUG_BODY_LIMIT: int = 4096
 
     def __init__( self, config: Config, logger: logging.Logger ) -> None:
         self.config = config
         self.logger = logger
+        self.metrics: Metrics = metrics
+        self.rate_limiter: RateLimiter = RateLimiter( config )
 
     def get_headers( self ) -> dict:
         """
@@ -38,60 +87,369 @@ class ApiCaller:
 
         return headers
 
-    def pre_logging( self, url, data: dict = None ) -> None:
+    @staticmethod
+    def idempotency_headers( idempotency_key: str | None ) -> dict | None:
+        return { "Idempotency-Key": idempotency_key } if idempotency_key else None
+
+    def should_retry( self, method: str, headers: dict | None, attempt: int, response = None ) -> bool:
+        """
+        This method decides whether a failed attempt is retried. Only idempotent methods and
+        requests carrying an idempotency key are retried, after a connection error or a 429/5xx response.
+
+        :param method:
+        :param headers: The per-request headers.
+        :param attempt: The zero-based number of the attempt that failed.
+        :param response: The response, or None after a connection error.
+        :return: bool
+        """
+
+        if attempt + 1 >= self.config.RETRY_MAX_ATTEMPTS:
+            return False
+
+        if method not in self.IDEMPOTENT_METHODS and not ( headers and headers.get( "Idempotency-Key" ) ):
+            return False
+
+        return response is None or response.status_code in self.RETRY_STATUS_CODES
+
+    def retry_delay( self, attempt: int, response = None ) -> float:
+        """
+        This method returns the jittered exponential backoff before the next attempt, honoring Retry-After.
+
+        :param attempt: The zero-based number of the attempt that failed.
+        :param response:
+        :return: float
+        """
+
+        backoff: float = random.uniform( 0, min( self.config.RETRY_BACKOFF_MAX, self.config.RETRY_BACKOFF_BASE * 2 ** attempt ) )
+        retry_after: float | None = RateLimiter.retry_after( response.headers ) if response is not None else None
+
+        return max( backoff, retry_after or 0.0 )
+
+    def pre_logging( self, url, data: dict = None, **kwargs ) -> None:
         self.logger.info( f"Calling {url}" )
         if data:
             self.logger.debug( f"Data: {data}" )
 
+    @staticmethod
+    def is_streamed( response ) -> bool:
+        """
+        This method tells whether the body of a streamed response has not been read yet.
+
+        :param response:
+        :return: bool
+        """
+
+        return getattr( response, "_content", None ) is False
+
+    def record_call( self, method: str, url: str, response, seconds: float ) -> None:
+        """
+        This method records the latency, status and payload sizes of a call.
+
+        :param method: The caller method used, e.g. get or post.
+        :param url:
+        :param response: The response, or None when the call raised.
+        :param seconds: The wall time of the call.
+        :return:
+        """
+
+        if response is None:
+            self.metrics.record( method, url, "error", seconds )
+            return
+
+        request = getattr( response, "request", None )
+        body = getattr( request, "body", None ) if hasattr( request, "body" ) else getattr( request, "content", None )
+        elapsed = getattr( response, "elapsed", None )
+        if self.is_streamed( response ):
+            received: int = int( response.headers.get( "Content-Length" ) or 0 )
+        else:
+            received: int = len( response.content or b"" )
+
+        self.metrics.record(
+            method,
+            url,
+            response.status_code,
+            seconds,
+            elapsed.total_seconds() if elapsed is not None else None,
+            len( body ) if body else 0,
+            received
+        )
+
     def post_logging( self, response ):
         self.logger.info( f"Status Code: {response.status_code}" )
 
+        if not self.logger.isEnabledFor( logging.DEBUG ):
+            return
+
+        if self.is_streamed( response ):
+            self.logger.debug( "Response Body: <streamed>" )
+            return
+
+        content: bytes = response.content or b""
+
+        if len( content ) > self.DEBUG_BODY_LIMIT:
+            formatted_response: str = content[ :self.DEBUG_BODY_LIMIT ].decode( errors = "replace" )
+            self.logger.debug( f"Response Body: {formatted_response}... ({len( content )} bytes)" )
+            return
+
         try:
-            formatted_response: str = json.dumps( response.json(), indent = 4 )
+            formatted_response: str = json.dumps( decode_response( response ), indent = 4 )
         except ValueError:
             formatted_response: str = response.text
 
         self.logger.debug( f"Response Body: {formatted_response}" )
 
-    @call_logging
+class ApiCaller( ApiCallerBase ):
+
+    def __init__( self, config: Config, logger: logging.Logger, concurrency: threading.Semaphore | None = None ) -> None:
+        super().__init__( config, logger )
+        self.concurrency: threading.Semaphore | None = concurrency
+        self.session: requests.Session = self.create_session()
+        self.cache: ResponseCache | None = ResponseCache.from_config( config )
+        self.breaker: CircuitBreaker | None = CircuitBreaker.from_config( config )
+        self.hedge_policy: HedgePolicy = HedgePolicy( config, self.metrics )
+        self.hedge_executor: ThreadPoolExecutor | None = None
+        self.hedge_lock: threading.Lock = threading.Lock()
+
+    def __enter__( self ) -> 'ApiCaller':
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ) -> None:
+        self.close()
+
+    def create_session( self ) -> requests.Session:
+        """
+        This method creates the pooled HTTP session shared by every call made through this caller.
+        Connections are kept alive between calls and the headers are built once. The transport section of
+        config.yaml can swap the network for recording or replaying an archive.
+
+        :return: requests.Session
+        """
+
+        adapter: BaseAdapter = create_adapter( self.config, self.logger )
+
+        session: requests.Session = requests.Session()
+        session.mount( "https://", adapter )
+        session.mount( "http://", adapter )
+        session.headers.update( self.get_headers() )
+
+        return session
+
+    def close( self ) -> None:
+        """
+        This method closes the session and releases its pooled connections.
+
+        :return:
+        """
+
+        self.session.close()
+
+        if self.hedge_executor is not None:
+            self.hedge_executor.shutdown( wait = False )
+
+    def send( self, method: str, url: str, headers: dict | None = None, **kwargs ) -> requests.Response:
+        """
+        Sends a request through the rate limiter, retrying failed attempts when allowed.
+        When a concurrency semaphore is shared between callers, each attempt holds a slot while in flight.
+        :param method:
+        :param url:
+        :param headers: Headers added to the session headers for this request.
+        :return:
+        """
+
+        attempt: int = 0
+
+        while True:
+            delay: float = self.rate_limiter.reserve( method, url )
+            if delay:
+                time.sleep( delay )
+
+            response: requests.Response | None = None
+
+            try:
+                with self.concurrency or nullcontext():
+                    response = self.session.request( method, url, headers = headers, timeout = self.config.HTTP_TIMEOUT, **kwargs )
+            except ( requests.ConnectionError, requests.Timeout ):
+                if not self.should_retry( method, headers, attempt ):
+                    raise
+            else:
+                self.rate_limiter.observe( method, url, response )
+                if not self.should_retry( method, headers, attempt, response ):
+                    return response
+                response.close()
+
+            self.metrics.record_retry( method, url )
+            time.sleep( self.retry_delay( attempt, response ) )
+            attempt += 1
+
     def get( self, url: str, data: dict = None ) -> requests.Response | None:
         """
-        Makes an api call using a get request.
+        Makes an api call using a get request, answered from the response cache when one is configured.
+        While the endpoint's circuit is open, the last cached response is served even if expired, and
+        CircuitOpenError is raised when there is none.
         :param url:
         :param data:
         :return:
         """
 
-        response: requests.Response = requests.get( url, headers = self.get_headers(), data = data )
+        try:
+            if self.cache is None:
+                return self.load( url, data )
+
+            response, cached = self.cache.get_or_load( url, data, lambda: self.load( url, data ) )
+        except CircuitOpenError:
+            stale = self.cache.stale( url, data ) if self.cache is not None else None
+            if stale is None:
+                raise
+            self.metrics.record_stale( "GET", url )
+            return stale
+
+        if cached:
+            self.metrics.record_cache_hit( "GET", url )
 
         return response
 
+    def load( self, url: str, data: dict = None ) -> requests.Response | None:
+        """
+        Sends a get request once the circuit breaker allows it. The breaker is only consulted for requests that
+        reach the network, so a half-open probe always records its outcome and never ends in a cache hit.
+        :param url:
+        :param data:
+        :return:
+        """
+
+        if self.breaker is not None and not self.breaker.allow( "GET", url ):
+            raise CircuitOpenError( f"Circuit open for {self.metrics.endpoint_key( 'GET', url )}" )
+
+        return self.get_uncached( url, data )
+
     @call_logging
-    def post( self, url: str, data: dict = None ) -> requests.Response | None:
+    def get_uncached( self, url: str, data: dict = None ) -> requests.Response | None:
         """
-        Makes an api call using a post request.
+        Makes an api call using a get request, bypassing the response cache.
+        Reads of hedged endpoints send a second request when the first is slower than the endpoint's p95.
         :param url:
         :param data:
         :return:
         """
 
-        response: requests.Response = requests.post( url, headers = self.get_headers(), json = data )
+        delay: float | None = self.hedge_policy.delay( url )
+
+        try:
+            response = self.send( "GET", url, data = data ) if delay is None else self.send_hedged( url, data, delay )
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.record( "GET", url, False )
+            raise
+
+        if self.breaker is not None:
+            self.breaker.record( "GET", url, response.status_code < 500 )
 
         return response
 
     @call_logging
-    def put( self, url: str, data: dict = None ) -> requests.Response | None:
+    def get_stream( self, url: str, data: dict = None ) -> requests.Response | None:
         """
-        Makes an api call using a put request.
+        Makes an api call using a get request and returns as soon as the headers arrive, leaving the body
+        to be read from response.iter_content(). The response cache and hedging are bypassed.
+        The caller must close the response.
         :param url:
         :param data:
         :return:
         """
 
-        response: requests.Response = requests.put( url, headers = self.get_headers(), json = data )
+        if self.breaker is not None and not self.breaker.allow( "GET", url ):
+            raise CircuitOpenError( f"Circuit open for {self.metrics.endpoint_key( 'GET', url )}" )
+
+        try:
+            response = self.send( "GET", url, data = data, stream = True )
+        except Exception:
+            if self.breaker is not None:
+                self.breaker.record( "GET", url, False )
+            raise
+
+        if self.breaker is not None:
+            self.breaker.record( "GET", url, response.status_code < 500 )
 
         return response
 
+    def send_hedged( self, url: str, data: dict | None, delay: float ) -> requests.Response:
+        """
+        Sends a get request and, if it has not completed after delay seconds, a second identical one.
+        The first successful response is returned; the other is discarded when it arrives.
+        :param url:
+        :param data:
+        :param delay:
+        :return:
+        """
+
+        with self.hedge_lock:
+            if self.hedge_executor is None:
+                self.hedge_executor = ThreadPoolExecutor( max_workers = self.config.HTTP_POOL_MAXSIZE * 2 )
+
+        pending: set = { self.hedge_executor.submit( self.send, "GET", url, data = data ) }
+        done, pending = wait( pending, timeout = delay )
+
+        if not done:
+            self.metrics.record_hedge( "GET", url )
+            pending.add( self.hedge_executor.submit( self.send, "GET", url, data = data ) )
+
+        failure: Future | None = None
+
+        while True:
+            if not done:
+                done, pending = wait( pending, return_when = FIRST_COMPLETED )
+
+            for future in done:
+                if future.exception() is None and future.result().status_code < 500:
+                    for other in pending:
+                        other.add_done_callback( self.discard )
+                    return future.result()
+                failure = failure or future
+
+            if not pending:
+                return failure.result()
+
+            done = set()
+
+    @staticmethod
+    def discard( future: Future ) -> None:
+        if future.exception() is None:
+            future.result().close()
+
+    def invalidate( self, *urls: str ) -> None:
+        """
+        Drops cached get responses for the given urls after a call that changes them.
+        :param urls:
+        :return:
+        """
+
+        if self.cache is not None:
+            self.cache.invalidate( *urls )
+
+    @call_logging
+    def post( self, url: str, data: dict = None, idempotency_key: str | None = None ) -> requests.Response | None:
+        """
+        Makes an api call using a post request.
+        Posts are only retried when they carry an idempotency key.
+        :param url:
+        :param data:
+        :param idempotency_key:
+        :return:
+        """
+
+        return self.send( "POST", url, headers = self.idempotency_headers( idempotency_key ), json = data )
+
+    @call_logging
+    def put( self, url: str, data: dict = None ) -> requests.Response | None:
+        """
+        Makes an api call using a put request.
+        :param url:
+        :param data:
+        :return:
+        """
+
+        return self.send( "PUT", url, json = data )
+
     @call_logging
     def delete( self, url: str, data: dict = None ) -> requests.Response | None:
         """
@@ -101,6 +459,4 @@ class ApiCaller:
         :return:
         """
 
-        response: requests.Response = requests.delete( url, headers = self.get_headers(), json = data )
-
-        return response
+        return self.send( "DELETE", url, json = data )
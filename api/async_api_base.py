@@ -0,0 +1,12 @@
+import logging
+from core.config import Config
+from api.endpoints import Endpoints
+from api.async_api_caller import AsyncApiCaller
+
+class AsyncApiBase:
+
+    def __init__( self, config: Config, logger: logging.Logger, api_caller: AsyncApiCaller | None = None ):
+        self.config = config
+        self.endpoints: Endpoints = Endpoints( self.config )
+        self.api_caller: AsyncApiCaller = api_caller or AsyncApiCaller( self.config, logger )
+        self.logger: logging.Logger = logger
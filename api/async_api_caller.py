@@ -0,0 +1,134 @@
+import asyncio
+import logging
+
+import httpx
+
+from core.config import Config
+from api.api_caller import ApiCallerBase, call_logging
+from api.transport import httpx_versions
+
+class AsyncApiCaller( ApiCallerBase ):
+    """
+    Asyncio counterpart of ApiCaller. A single client keeps a shared connection pool and a semaphore
+    bounds the number of requests in flight, so one event loop can run hundreds of calls at once.
+    """
+
+    def __init__( self, config: Config, logger: logging.Logger ) -> None:
+        super().__init__( config, logger )
+        self.semaphore: asyncio.Semaphore = asyncio.Semaphore( self.config.HTTP_MAX_CONCURRENCY )
+        self.client: httpx.AsyncClient = self.create_client()
+
+    async def __aenter__( self ) -> 'AsyncApiCaller':
+        return self
+
+    async def __aexit__( self, exc_type, exc_value, traceback ) -> None:
+        await self.close()
+
+    def create_client( self ) -> httpx.AsyncClient:
+        """
+        This method creates the pooled async HTTP client shared by every call made through this caller.
+        With http.version 2 concurrent calls are multiplexed over a few HTTP/2 connections.
+
+        :return: httpx.AsyncClient
+        """
+
+        limits: httpx.Limits = httpx.Limits(
+            max_connections = self.config.HTTP_MAX_CONCURRENCY,
+            max_keepalive_connections = self.config.HTTP_POOL_MAXSIZE
+        )
+
+        return httpx.AsyncClient(
+            headers = self.get_headers(),
+            limits = limits,
+            timeout = self.config.HTTP_TIMEOUT,
+            **httpx_versions( self.config, self.logger )
+        )
+
+    async def close( self ) -> None:
+        """
+        This method closes the client and releases its pooled connections.
+
+        :return:
+        """
+
+        await self.client.aclose()
+
+    async def send( self, method: str, url: str, headers: dict | None = None, **kwargs ) -> httpx.Response:
+        """
+        Sends a request once a concurrency slot is available, through the rate limiter,
+        retrying failed attempts when allowed.
+        :param method:
+        :param url:
+        :param headers: Headers added to the client headers for this request.
+        :return:
+        """
+
+        attempt: int = 0
+
+        while True:
+            delay: float = self.rate_limiter.reserve( method, url )
+            if delay:
+                await asyncio.sleep( delay )
+
+            response: httpx.Response | None = None
+
+            try:
+                async with self.semaphore:
+                    response = await self.client.request( method, url, headers = headers, **kwargs )
+            except httpx.TransportError:
+                if not self.should_retry( method, headers, attempt ):
+                    raise
+            else:
+                self.rate_limiter.observe( method, url, response )
+                if not self.should_retry( method, headers, attempt, response ):
+                    return response
+
+            self.metrics.record_retry( method, url )
+            await asyncio.sleep( self.retry_delay( attempt, response ) )
+            attempt += 1
+
+    @call_logging
+    async def get( self, url: str, data: dict = None ) -> httpx.Response | None:
+        """
+        Makes an api call using a get request.
+        :param url:
+        :param data:
+        :return:
+        """
+
+        return await self.send( "GET", url, data = data )
+
+    @call_logging
+    async def post( self, url: str, data: dict = None, idempotency_key: str | None = None ) -> httpx.Response | None:
+        """
+        Makes an api call using a post request.
+        Posts are only retried when they carry an idempotency key.
+        :param url:
+        :param data:
+        :param idempotency_key:
+        :return:
+        """
+
+        return await self.send( "POST", url, headers = self.idempotency_headers( idempotency_key ), json = data )
+
+    @call_logging
+    async def put( self, url: str, data: dict = None ) -> httpx.Response | None:
+        """
+        Makes an api call using a put request.
+        :param url:
+        :param data:
+        :return:
+        """
+
+        return await self.send( "PUT", url, json = data )
+
+    @call_logging
+    async def delete( self, url: str, data: dict = None ) -> httpx.Response | None:
+        """
+        Makes an api call using a delete request.
+        :param url:
+        :param data:
+        :return:
+        """
+
+        return await self.send( "DELETE", url, json = data )
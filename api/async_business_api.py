@@ -0,0 +1,39 @@
+import logging
+
+from api.async_api_base import AsyncApiBase
+from api.async_api_caller import AsyncApiCaller
+from core.config import Config
+from core.json_codec import decode_response
+from api.endpoints import Endpoints
+from dto import Business
+from core.business_builder import BusinessBuilder
+
+class AsyncBusinessApi( AsyncApiBase ):
+
+    def __init__( self, config: Config, logger: logging.Logger, api_caller: AsyncApiCaller | None = None ):
+        super().__init__( config, logger, api_caller )
+
+    async def create( self ) -> str:
+        """
+        This method creates and registers a business with the GrailPay API
+
+        :return:
+        """
+
+        business: Business = ( BusinessBuilder( self.config )
+                              .random_email()
+                              .random_tin()
+                              .random_account_routing()
+                              .build())
+
+        response = await self.api_caller.post(
+            self.endpoints.get_url( Endpoints.BUSINESS_CREATE ),
+            business.__dict__
+        )
+
+        if response.status_code == 201:
+            response_data = decode_response( response )
+            self.logger.info( f"Created business: {response_data['data']['uuid']}" )
+            return response_data['data']['uuid']
+
+        return ""
@@ -0,0 +1,209 @@
+import logging
+import uuid
+from typing import Any
+
+from api.async_api_base import AsyncApiBase
+from api.async_api_caller import AsyncApiCaller
+from core.config import Config
+from core.json_codec import decode_response
+from api.endpoints import Endpoints
+from api.transaction_api import TransactionApi
+from dto import Transaction, TransactionMid, TransactionList, TransactionRefund
+
+class AsyncTransactionApi( AsyncApiBase ):
+
+    def __init__( self, config: Config, logger: logging.Logger, api_caller: AsyncApiCaller | None = None ):
+        super().__init__( config, logger, api_caller )
+
+    async def create( self, payer_uuid: str, payee_uuid: str, amount: int, idempotency_key: str | None = None ) -> str:
+        """
+        This method creates a transaction with the GrailPay API using a uuid for the payer and payee
+
+        :param payer_uuid: The uuid of the payer entity.
+        :param payee_uuid: The uuid of the payee entity.
+        :param amount: The amount in cents to transfer.
+        :param idempotency_key: Sent as client_reference_id. A random key is generated when omitted.
+        :return:
+        """
+
+        transaction: Transaction = Transaction(
+            payer_uuid = payer_uuid,
+            payee_uuid = payee_uuid,
+            amount = amount,
+            client_reference_id = idempotency_key or str( uuid.uuid4() )
+        )
+
+        response = await self.api_caller.post(
+            self.endpoints.get_url( Endpoints.TRANSACTION_CREATE ),
+            transaction.__dict__,
+            idempotency_key = transaction.client_reference_id
+        )
+
+        if response.status_code == 201:
+            response_data = decode_response( response )
+            self.logger.info( f"Created transaction: {response_data['data']['uuid']}")
+            return response_data['data']['uuid']
+
+        return ""
+
+    async def create_mid( self, payer_uuid: str, payee_mid: str, amount: int, idempotency_key: str | None = None ) -> str:
+        """
+        This method creates a transaction with the GrailPay API using a uuid for the payer and a mid for the payee
+
+        :param payer_uuid: The uuid of the payer entity.
+        :param payee_mid: The mid of the payee entity.
+        :param amount: The amount in cents to transfer.
+        :param idempotency_key: Sent as client_reference_id. A random key is generated when omitted.
+        :return:
+        """
+
+        transaction: TransactionMid = TransactionMid(
+            payer_uuid = payer_uuid,
+            processor_mid = payee_mid,
+            amount = amount,
+            client_reference_id = idempotency_key or str( uuid.uuid4() )
+        )
+
+        response = await self.api_caller.post(
+            self.endpoints.get_url( Endpoints.TRANSACTION_CREATE ),
+            transaction.__dict__,
+            idempotency_key = transaction.client_reference_id
+        )
+
+        if response.status_code == 201:
+            response_data = decode_response( response )
+            self.logger.info( f"Created transaction: {response_data['data']['uuid']}")
+            return response_data['data']['uuid']
+
+        return ""
+
+    async def fetch( self, transaction_uuid: str ) -> dict[str, Any] | None:
+        """
+        This method fetches a transaction with the GrailPay API using a transaction uuid
+
+        :param transaction_uuid: The uuid of the transaction to fetch.
+        :return:
+        """
+
+        url: str = self.endpoints.get_url( Endpoints.TRANSACTION_FETCH )
+        url = url.replace("{transaction_uuid}", transaction_uuid )
+
+        response = await self.api_caller.get( url )
+
+        if response.status_code == 200:
+            response_data = decode_response( response )
+            return response_data[ 'data' ]
+
+        return None
+
+    async def list(
+        self,
+        status: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        page_size: int = 200
+    ) -> list:
+        """
+        This method fetches a list of transactions with the GrailPay API, following every page.
+        A failed page raises RuntimeError, so a listing never ends early looking complete.
+
+        :param status: Only return transactions with this status.
+        :param start_date: Only return transactions on or after this date (YYYY-MM-DD).
+        :param end_date: Only return transactions on or before this date (YYYY-MM-DD).
+        :param page_size: The number of transactions fetched per call.
+        :return:
+        """
+
+        transactions: list = []
+        page: int = 1
+
+        while True:
+            transaction_list: TransactionList = TransactionList(
+                pageSize = page_size,
+                page = page,
+                status = status,
+                fromDate = start_date,
+                toDate = end_date
+            )
+
+            response = await self.api_caller.get(
+                self.endpoints.get_url( Endpoints.TRANSACTION_LIST ),
+                { key: value for key, value in transaction_list.__dict__.items() if value is not None }
+            )
+
+            if response.status_code != 200:
+                raise RuntimeError( f"Failed to fetch transaction page {page}: status {response.status_code}" )
+
+            response_data = decode_response( response )
+            transactions.extend( response_data[ 'data' ][ 'transactions' ] )
+
+            if not TransactionApi.has_more( response_data, transaction_list, len( response_data[ 'data' ][ 'transactions' ] ) ):
+                return transactions
+
+            page += 1
+
+    async def cancel( self, transaction_uuid: str ) -> bool:
+        """
+        This method cancels a transaction with the GrailPay API using a transaction uuid
+
+        :param transaction_uuid: The uuid of the transaction to cancel.
+        :return: Whether the transaction was canceled.
+        """
+
+        url: str = self.endpoints.get_url( Endpoints.TRANSACTION_CANCEL )
+        url = url.replace( "{transaction_uuid}", transaction_uuid )
+
+        response = await self.api_caller.delete( url )
+
+        if response.status_code in ( 200, 204 ):
+            self.logger.info( f"Canceled transaction: {transaction_uuid}" )
+            return True
+
+        self.logger.error( f"Failed to cancel transaction {transaction_uuid}: status {response.status_code}" )
+        return False
+
+    async def refund( self, transaction_uuid: str, amount_in_cents: int, idempotency_key: str | None = None ) -> dict[str, Any] | bool:
+        """
+        This method refunds a transaction with the GrailPay API using a transaction uuid
+
+        :param transaction_uuid:
+        :param amount_in_cents:
+        :param idempotency_key: Sent as client_reference_id. A random key is generated when omitted.
+        :return:
+        """
+
+        url: str = self.endpoints.get_url( Endpoints.TRANSACTION_REFUND )
+        url = url.replace( "{transaction_uuid}", transaction_uuid )
+
+        transaction_refund: TransactionRefund = TransactionRefund(
+            client_reference_id = idempotency_key or str( uuid.uuid4() ),
+            amount = amount_in_cents
+        )
+
+        response = await self.api_caller.post( url, transaction_refund.__dict__, idempotency_key = transaction_refund.client_reference_id )
+
+        if response.status_code == 201:
+            response_data = decode_response( response )
+            self.logger.info( f"Created refund: {response_data['data']['uuid']}")
+            return response_data
+
+        return False
+
+    async def fetch_refunds( self, transaction_uuid: str ) -> list:
+        """
+        This method fetches all refunds associated with a transaction.
+
+        :param transaction_uuid: The uuid of the transaction to fetch.
+        :return:
+        """
+
+        url: str = self.endpoints.get_url( Endpoints.TRANSACTION_FETCH_REFUNDS )
+        url = url.replace("{transaction_uuid}", transaction_uuid )
+
+        response = await self.api_caller.get( url )
+
+        if response.status_code == 200:
+            response_data = decode_response( response )
+            return response_data[ 'data' ]
+
+        return []
@@ -0,0 +1,75 @@
+import logging
+from typing import Any
+
+from api.async_api_base import AsyncApiBase
+from api.async_api_caller import AsyncApiCaller
+from api.webhook_api import WebhookApi
+from core.config import Config
+from core.json_codec import decode_response
+from api.endpoints import Endpoints
+from dto import Webhook
+
+class AsyncWebhookApi( AsyncApiBase ):
+
+    def __init__( self, config: Config, logger: logging.Logger, api_caller: AsyncApiCaller | None = None ):
+        super().__init__( config, logger, api_caller )
+
+        self.webhook_events: list = list( WebhookApi.WEBHOOK_EVENTS )
+
+    async def register( self, webhook_url: str | list, event_names: list | None = None ) -> bool:
+        """
+        This method registers a webhook with the GrailPay API
+
+        :param webhook_url: A webhook url, or a list of urls.
+        :param event_names: The events to register the urls for, as a list or comma separated. Defaults to every event.
+        :return:
+        """
+
+        webhook: Webhook = Webhook(
+            webhook_url = [ webhook_url ] if isinstance( webhook_url, str ) else list( webhook_url ),
+            event_names = WebhookApi.event_list( event_names ) or self.webhook_events
+        )
+
+        response = await self.api_caller.post(
+            self.endpoints.get_url( Endpoints.WEBHOOK_REGISTER ),
+            webhook.__dict__
+        )
+
+        return response.status_code == 201
+
+    async def deregister( self, webhook_url: str | list, event_names: list | None = None ) -> bool:
+        """
+        This method deregisters a webhook with the GrailPay API
+
+        :param webhook_url: A webhook url, or a list of urls.
+        :param event_names: The events to deregister the urls for, as a list or comma separated. Defaults to every event.
+        :return:
+        """
+
+        webhook: Webhook = Webhook(
+            webhook_url = [ webhook_url ] if isinstance( webhook_url, str ) else list( webhook_url ),
+            event_names = WebhookApi.event_list( event_names ) or self.webhook_events
+        )
+
+        response = await self.api_caller.delete(
+            self.endpoints.get_url( Endpoints.WEBHOOK_DEREGISTER ),
+            webhook.__dict__
+        )
+
+        return response.status_code == 200
+
+    async def fetch( self ) -> dict[str, Any] | None:
+        """
+        This method fetches a webhook with the GrailPay API
+
+        :return:
+        """
+
+        response = await self.api_caller.get(
+            self.endpoints.get_url( Endpoints.WEBHOOK_FETCH ),
+        )
+
+        if response.status_code == 200:
+            return decode_response( response )
+
+        return None
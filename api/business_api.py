@@ -1,15 +1,25 @@
 import logging
 
 from api.api_base import ApiBase
+from api.api_caller import ApiCaller
 from core.config import Config
+from core.json_codec import decode_response
+from core.store import TransactionStore
 from api.endpoints import Endpoints
 from dto import Business
 from core.business_builder import BusinessBuilder
 
 class BusinessApi( ApiBase ):
 
-    def __init__( self, config: Config, logger: logging.Logger ):
-        super().__init__( config, logger )
+    def __init__(
+        self,
+        config: Config,
+        logger: logging.Logger,
+        api_caller: ApiCaller | None = None,
+        store: TransactionStore | None = None
+    ):
+        super().__init__( config, logger, api_caller )
+        self.store: TransactionStore | None = store
 
     def create( self ) -> str:
         """
@@ -30,8 +40,10 @@ class BusinessApi( ApiBase ):
         )
 
         if response.status_code == 201:
-            response_data = response.json()
+            response_data = decode_response( response )
             self.logger.info( f"Created business: {response_data['data']['uuid']}" )
+            if self.store:
+                self.store.upsert_business( response_data['data']['uuid'], business.__dict__ )
             return response_data['data']['uuid']
 
         return ""
@@ -18,6 +18,9 @@ class Endpoints:
         if config.ENVIRONMENT == "production":
             self.base_url = "https://api.grailpay.com/3p"
 
+        if config.BASE_URL:
+            self.base_url = config.BASE_URL.rstrip( "/" )
+
     def get_url( self, endpoint: str ) -> str:
         """
         This method returns the full URL for an endpoint
@@ -1,76 +1,161 @@
 import logging
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import closing
+from typing import Any, Iterator, List
 import pprint
+import uuid
 
 from api.api_base import ApiBase
+from api.api_caller import ApiCaller
 from core.config import Config
+from core.json_codec import decode_response
+from core.json_stream import iter_json_array
+from core.request_journal import RequestJournal
+from core.store import TransactionStore
 from api.endpoints import Endpoints
-from dto import Transaction, TransactionMid, TransactionList, TransactionRefund
+from dto import Transaction, TransactionMid, TransactionList, TransactionRefund, TransactionRecord
 
 class TransactionApi( ApiBase ):
 
-    def __init__( self, config: Config, logger: logging.Logger ):
-        super().__init__( config, logger )
+    STREAM_CHUNK_SIZE: int = 65536
+
+    def __init__(
+        self,
+        config: Config,
+        logger: logging.Logger,
+        api_caller: ApiCaller | None = None,
+        store: TransactionStore | None = None,
+        journal: RequestJournal | None = None
+    ):
+        super().__init__( config, logger, api_caller )
+        self.store: TransactionStore | None = store
+        self.journal: RequestJournal | None = journal
+
+    def post_idempotent( self, action: str, url: str, data: dict ) -> Any:
+        """
+        This method posts a money-moving request carrying its client_reference_id as the idempotency key, so it is
+        safe to retry. When a journal is configured the intent is recorded before sending and the outcome after.
+
+        :param action: The name of the call, e.g. transaction:create.
+        :param url:
+        :param data: The request body, including client_reference_id.
+        :return: The response.
+        """
+
+        key: str = data[ "client_reference_id" ]
+
+        def send():
+            return self.api_caller.post( url, data, idempotency_key = key )
 
-    def create( self, payer_uuid: str, payee_uuid: str, amount: int ) -> str:
+        if self.journal:
+            return self.journal.record( key, action, data, send )
+
+        return send()
+
+    def invalidate( self, transaction_uuid: str ) -> None:
+        """
+        This method drops the cached fetch and refunds responses of a transaction after it changes.
+
+        :param transaction_uuid:
+        :return:
+        """
+
+        self.api_caller.invalidate(
+            self.endpoints.get_url( Endpoints.TRANSACTION_FETCH ).replace( "{transaction_uuid}", transaction_uuid ),
+            self.endpoints.get_url( Endpoints.TRANSACTION_FETCH_REFUNDS ).replace( "{transaction_uuid}", transaction_uuid )
+        )
+
+    def create( self, payer_uuid: str, payee_uuid: str, amount: int, idempotency_key: str | None = None ) -> str:
         """
         This method creates a transaction with the GrailPay API using a uuid for the payer and payee
 
         :param payer_uuid: The uuid of the payer entity.
         :param payee_uuid: The uuid of the payee entity.
         :param amount: The amount in cents to transfer.
+        :param idempotency_key: Sent as client_reference_id. A random key is generated when omitted.
         :return:
         """
 
         transaction: Transaction = Transaction(
             payer_uuid = payer_uuid,
             payee_uuid = payee_uuid,
-            amount = amount
+            amount = amount,
+            client_reference_id = idempotency_key or str( uuid.uuid4() )
         )
 
-        response = self.api_caller.post(
+        response = self.post_idempotent(
+            "transaction:create",
             self.endpoints.get_url( Endpoints.TRANSACTION_CREATE ),
             transaction.__dict__
         )
 
         if response.status_code == 201:
-            response_data = response.json()
+            response_data = decode_response( response )
             self.logger.info( f"Created transaction: {response_data['data']['uuid']}")
             return response_data['data']['uuid']
 
         return ""
 
-    def create_mid( self, payer_uuid: str, payee_mid: str, amount: int ) -> None:
+    def create_mid( self, payer_uuid: str, payee_mid: str, amount: int, idempotency_key: str | None = None ) -> str:
         """
         This method creates a transaction with the GrailPay API using a uuid for the payer and a mid for the payee
 
         :param payer_uuid: The uuid of the payer entity.
         :param payee_mid: The mid of the payee entity.
         :param amount: The amount in cents to transfer.
-        :return:
+        :param idempotency_key: Sent as client_reference_id. A random key is generated when omitted.
+        :return: The uuid of the transaction, or an empty string when it was not created.
         """
 
         transaction: TransactionMid = TransactionMid(
             payer_uuid = payer_uuid,
             processor_mid = payee_mid,
-            amount = amount
+            amount = amount,
+            client_reference_id = idempotency_key or str( uuid.uuid4() )
         )
 
-        response = self.api_caller.post(
+        response = self.post_idempotent(
+            "transaction:create_mid",
             self.endpoints.get_url( Endpoints.TRANSACTION_CREATE ),
             transaction.__dict__
         )
 
         if response.status_code == 201:
-            response_data = response.json()
+            response_data = decode_response( response )
             self.logger.info( f"Created transaction: {response_data['data']['uuid']}")
+            return response_data['data']['uuid']
+
+        return ""
 
-    def fetch( self, transaction_uuid: str ) -> None:
+    def fetch( self, transaction_uuid: str ) -> bool:
         """
-        This method fetches a transaction with the GrailPay API using a transaction uuid
+        This method fetches a transaction with the GrailPay API using a transaction uuid.
+        The local store answers instead when it is fresh and holds the transaction.
 
         :param transaction_uuid: The uuid of the transaction to fetch.
-        :return:
+        :return: Whether the transaction was found.
+        """
+
+        if self.store and self.store.is_fresh():
+            transaction: dict | None = self.store.get_transaction( transaction_uuid )
+            if transaction:
+                self.show_transaction( TransactionRecord.from_dict( transaction ) )
+                return True
+
+        transaction: dict | None = self.get( transaction_uuid )
+
+        if transaction:
+            self.show_transaction( TransactionRecord.from_dict( transaction ) )
+            return True
+
+        return False
+
+    def get( self, transaction_uuid: str ) -> dict[str, Any] | None:
+        """
+        This method fetches a transaction with the GrailPay API and returns it without showing it.
+
+        :param transaction_uuid: The uuid of the transaction to fetch.
+        :return: The transaction, or None when it could not be fetched.
         """
 
         url: str = self.endpoints.get_url( Endpoints.TRANSACTION_FETCH )
@@ -79,77 +164,286 @@ class TransactionApi( ApiBase ):
         response = self.api_caller.get( url )
 
         if response.status_code == 200:
-            response_data = response.json()
-            self.show_transaction( response_data[ 'data' ] )
+            response_data = decode_response( response )
+            if self.store:
+                self.store.upsert_transactions( [ response_data[ 'data' ] ] )
+            return response_data[ 'data' ]
+
+        return None
 
-    def list( self ) -> None:
+    def fetch_page( self, transaction_list: TransactionList ) -> tuple[list, bool]:
         """
-        This method fetches a list of transactions with the GrailPay API
+        This method fetches a single page of transactions with the GrailPay API.
+        A failed page raises RuntimeError, so a listing never ends early looking complete.
 
-        :return:
+        :param transaction_list: The page and filters to fetch.
+        :return: The transactions on the page and whether more pages follow.
         """
 
-        transaction_list: TransactionList = TransactionList( pageSize = 200 )
+        data: dict = { key: value for key, value in transaction_list.__dict__.items() if value is not None }
 
         response = self.api_caller.get(
             self.endpoints.get_url( Endpoints.TRANSACTION_LIST ),
-            transaction_list.__dict__
+            data
         )
 
-        if response.status_code == 200:
-            response_data = response.json()
-            for transaction in response_data[ 'data' ][ 'transactions' ]:
-                self.show_transaction( transaction )
+        if response.status_code != 200:
+            raise RuntimeError( f"Failed to fetch transaction page {transaction_list.page}: status {response.status_code}" )
+
+        response_data = decode_response( response )
+        transactions: list = response_data[ 'data' ][ 'transactions' ]
+
+        return transactions, self.has_more( response_data, transaction_list, len( transactions ) )
+
+    @staticmethod
+    def has_more( response_data: dict, transaction_list: TransactionList, count: int ) -> bool:
+        """
+        This method tells whether more pages follow a page of the transaction list.
+
+        :param response_data: The decoded page, its transactions aside.
+        :param transaction_list: The page and filters that were fetched.
+        :param count: The number of transactions on the page.
+        :return: bool
+        """
+
+        pagination: dict = ( response_data.get( 'data' ) or {} ).get( 'pagination' ) or response_data.get( 'meta' ) or {}
+        last_page = pagination.get( 'last_page' ) or pagination.get( 'total_pages' )
+
+        if last_page is not None:
+            return transaction_list.page < int( last_page )
+
+        return count >= transaction_list.pageSize
+
+    def stream_page( self, transaction_list: TransactionList, page: dict ) -> Iterator[dict]:
+        """
+        This method yields the transactions of a single page as they are parsed from the response stream,
+        so only one transaction is held in memory at a time. Once exhausted, page[ 'has_more' ] tells whether
+        more pages follow. A failed page raises RuntimeError.
+
+        :param transaction_list: The page and filters to fetch.
+        :param page: Filled with has_more when the page ends.
+        :return: Iterator[dict]
+        """
+
+        data: dict = { key: value for key, value in transaction_list.__dict__.items() if value is not None }
+        page[ 'has_more' ] = False
+
+        response = self.api_caller.get_stream(
+            self.endpoints.get_url( Endpoints.TRANSACTION_LIST ),
+            data
+        )
+
+        with closing( response ):
+            if response.status_code != 200:
+                raise RuntimeError( f"Failed to fetch transaction page {transaction_list.page}: status {response.status_code}" )
+
+            rest: dict = {}
+            count: int = 0
+
+            for transaction in iter_json_array( response.iter_content( self.STREAM_CHUNK_SIZE ), ( 'data', 'transactions' ), rest ):
+                count += 1
+                yield transaction
+
+            page[ 'has_more' ] = self.has_more( rest, transaction_list, count )
+
+    def iter_transactions(
+        self,
+        status: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        page_size: int = 200,
+        limit: int | None = None,
+        updated_since: str | None = None,
+        stream: bool | None = None
+    ) -> Iterator[dict]:
+        """
+        This method lazily yields transactions from the GrailPay API, following pagination.
+        The next page is fetched in the background while the current one is being consumed,
+        so at most two pages are held in memory. When streaming, pages are fetched one after another
+        and parsed as they arrive, so one transaction is held in memory instead.
+
+        :param status: Only return transactions with this status.
+        :param start_date: Only return transactions on or after this date (YYYY-MM-DD).
+        :param end_date: Only return transactions on or before this date (YYYY-MM-DD).
+        :param page_size: The number of transactions fetched per call.
+        :param limit: The maximum number of transactions to yield.
+        :param updated_since: Only return transactions updated on or after this timestamp.
+        :param stream: Parse pages incrementally. Defaults to http.stream_lists in config.yaml.
+        :return: Iterator[dict]
+        """
+
+        def page_request( page: int ) -> TransactionList:
+            return TransactionList(
+                pageSize = page_size,
+                page = page,
+                status = status,
+                fromDate = start_date,
+                toDate = end_date,
+                updatedFrom = updated_since
+            )
+
+        count: int = 0
+        page: int = 1
+
+        if self.config.HTTP_STREAM_LISTS if stream is None else stream:
+            while True:
+                state: dict = {}
+                with closing( self.stream_page( page_request( page ), state ) ) as transactions:
+                    for transaction in transactions:
+                        if limit is not None and count >= limit:
+                            return
+                        count += 1
+                        yield transaction
+
+                if not state[ 'has_more' ] or ( limit is not None and count >= limit ):
+                    return
+
+                page += 1
+
+        executor: ThreadPoolExecutor = ThreadPoolExecutor( max_workers = 1 )
+
+        try:
+            transactions, has_more = self.fetch_page( page_request( page ) )
+
+            while True:
+                next_page: Future | None = None
+                if has_more and ( limit is None or count + len( transactions ) < limit ):
+                    next_page = executor.submit( self.fetch_page, page_request( page + 1 ) )
+
+                for transaction in transactions:
+                    if limit is not None and count >= limit:
+                        return
+                    count += 1
+                    yield transaction
+
+                if next_page is None:
+                    return
+
+                transactions, has_more = next_page.result()
+                page += 1
+        finally:
+            executor.shutdown( wait = False, cancel_futures = True )
+
+    def list(
+        self,
+        limit: int | str | None = None,
+        status: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None
+    ) -> int:
+        """
+        This method fetches a list of transactions with the GrailPay API, following every page.
+        The local store answers instead when it is fresh.
+
+        :param limit: The maximum number of transactions to show.
+        :param status: Only show transactions with this status.
+        :param start_date: Only show transactions on or after this date (YYYY-MM-DD).
+        :param end_date: Only show transactions on or before this date (YYYY-MM-DD).
+        :return: The number of transactions shown.
+        """
+
+        limit = int( limit ) if limit is not None else None
 
-    def cancel( self, transaction_uuid: str ) -> None:
+        if self.store and self.store.is_fresh():
+            transactions: Iterator[dict] = self.store.query_transactions( status, start_date, end_date, limit )
+        else:
+            transactions: Iterator[dict] = self.iter_transactions(
+                status = status,
+                start_date = start_date,
+                end_date = end_date,
+                limit = limit
+            )
+
+        count: int = 0
+        for transaction in transactions:
+            self.show_transaction( TransactionRecord.from_dict( transaction ) )
+            count += 1
+
+        return count
+
+    def cancel( self, transaction_uuid: str ) -> bool:
         """
         This method cancels a transaction with the GrailPay API using a transaction uuid
 
         :param transaction_uuid: The uuid of the transaction to cancel.
-        :return:
+        :return: Whether the transaction was canceled.
         """
 
         url: str = self.endpoints.get_url( Endpoints.TRANSACTION_CANCEL )
         url = url.replace( "{transaction_uuid}", transaction_uuid )
 
-        self.api_caller.delete( url )
+        response = self.api_caller.delete( url )
+        self.invalidate( transaction_uuid )
+
+        if self.store:
+            self.store.forget_transaction( transaction_uuid )
 
-    def show_transaction( self, transaction: dict ) -> None:
-        self.logger.info( f"UUID: {transaction['uuid']}")
-        self.logger.info( f"capture_status: {transaction['capture_status']}")
-        self.logger.info( f"payout_status: {transaction['payout_status']}")
-        self.logger.info( f"amount: {transaction['amount']}")
+        if response.status_code in ( 200, 204 ):
+            self.logger.info( f"Canceled transaction: {transaction_uuid}" )
+            return True
+
+        self.logger.error( f"Failed to cancel transaction {transaction_uuid}: status {response.status_code}" )
+        return False
+
+    def show_transaction( self, transaction: TransactionRecord ) -> None:
+        self.logger.info( f"UUID: {transaction.uuid}")
+        self.logger.info( f"capture_status: {transaction.capture_status}")
+        self.logger.info( f"payout_status: {transaction.payout_status}")
+        self.logger.info( f"amount: {transaction.amount}")
         self.logger.info( "-------------------------------" )
 
-    def refund( self, transaction_uuid: str, amount_in_cents: int ) -> dict[str, Any] | bool:
+    def refund( self, transaction_uuid: str, amount_in_cents: int, idempotency_key: str | None = None ) -> dict[str, Any] | bool:
         """
         This method refunds a transaction with the GrailPay API using a transaction uuid
 
         :param transaction_uuid:
         :param amount_in_cents:
+        :param idempotency_key: Sent as client_reference_id. A random key is generated when omitted.
         :return:
         """
 
         url: str = self.endpoints.get_url( Endpoints.TRANSACTION_REFUND )
         url = url.replace( "{transaction_uuid}", transaction_uuid )
 
-        transaction_refund: TransactionRefund = TransactionRefund( client_reference_id = "", amount = amount_in_cents )
+        transaction_refund: TransactionRefund = TransactionRefund(
+            client_reference_id = idempotency_key or str( uuid.uuid4() ),
+            amount = amount_in_cents
+        )
 
-        response = self.api_caller.post( url, transaction_refund.__dict__ )
+        response = self.post_idempotent( "transaction:refund", url, transaction_refund.__dict__ )
+        self.invalidate( transaction_uuid )
 
         if response.status_code == 201:
-            response_data = response.json()
+            response_data = decode_response( response )
             self.logger.info( f"Created refund: {response_data['data']['uuid']}")
+            if self.store:
+                self.store.upsert_refunds( transaction_uuid, [ response_data[ 'data' ] ] )
             return response_data
 
         return False
 
-    def fetch_refunds( self, transaction_uuid: str ) -> None:
+    def fetch_refunds( self, transaction_uuid: str ) -> bool:
         """
         This method fetches all refunds associated with a transaction.
 
         :param transaction_uuid: The uuid of the transaction to fetch.
-        :return:
+        :return: Whether the refunds could be fetched.
+        """
+
+        refunds: list | None = self.get_refunds( transaction_uuid )
+
+        if refunds is None:
+            return False
+
+        pprint.pprint( refunds )
+        return True
+
+    def get_refunds( self, transaction_uuid: str ) -> List[dict] | None:
+        """
+        This method fetches all refunds associated with a transaction and returns them without showing them.
+
+        :param transaction_uuid: The uuid of the transaction to fetch.
+        :return: The refunds, or None when they could not be fetched.
         """
 
         url: str = self.endpoints.get_url( Endpoints.TRANSACTION_FETCH_REFUNDS )
@@ -158,5 +452,9 @@ class TransactionApi( ApiBase ):
         response = self.api_caller.get( url )
 
         if response.status_code == 200:
-            response_data = response.json()
-            pprint.pprint( response_data[ 'data' ] )
+            response_data = decode_response( response )
+            if self.store:
+                self.store.upsert_refunds( transaction_uuid, response_data[ 'data' ] )
+            return response_data[ 'data' ]
+
+        return None
@@ -0,0 +1,313 @@
+import importlib.util
+import json
+import logging
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from core.config import Config
+
+def request_path( url: str ) -> str:
+    """
+    Returns the path and query of an url, so archives replay against any base url host.
+
+    :param url:
+    :return: str
+    """
+
+    parts = urlsplit( url )
+
+    return parts.path + ( "?" + parts.query if parts.query else "" )
+
+def request_body( request: requests.PreparedRequest ) -> str:
+    body = request.body
+
+    if isinstance( body, bytes ):
+        return body.decode( "utf-8", "replace" )
+
+    return body or ""
+
+def http2_available() -> bool:
+    return importlib.util.find_spec( "h2" ) is not None
+
+def httpx_versions( config: Config, logger: logging.Logger | None = None ) -> dict:
+    """
+    Returns the httpx client protocol options for http.version: 1.1, 2, which negotiates HTTP/2 over TLS and
+    falls back to HTTP/1.1, or 2-prior-knowledge, which also speaks HTTP/2 to cleartext http:// urls.
+    HTTP/1.1 is used when the h2 package is not installed.
+
+    :param config:
+    :param logger:
+    :return: dict
+    """
+
+    if config.HTTP_VERSION not in ( "1.1", "2", "2-prior-knowledge" ):
+        raise ValueError( f"Unknown http version: {config.HTTP_VERSION}" )
+
+    if config.HTTP_VERSION == "1.1":
+        return { "http1": True, "http2": False }
+
+    if not http2_available():
+        if logger:
+            logger.warning( "HTTP/2 needs the h2 package (pip install httpx[http2]), using HTTP/1.1" )
+        return { "http1": True, "http2": False }
+
+    return { "http1": config.HTTP_VERSION == "2", "http2": True }
+
+class HttpxStream:
+    """
+    The raw body of a streamed httpx response, read by requests' Response.iter_content().
+    """
+
+    def __init__( self, response: httpx.Response ) -> None:
+        self.response: httpx.Response = response
+
+    def stream( self, chunk_size: int | None = None, decode_content: bool = True ):
+        try:
+            yield from self.response.iter_bytes( chunk_size )
+        except httpx.TimeoutException as e:
+            raise requests.Timeout( str( e ) )
+        except httpx.TransportError as e:
+            raise requests.ConnectionError( str( e ) )
+
+    def close( self ) -> None:
+        self.response.close()
+
+class Http2Adapter( BaseAdapter ):
+    """
+    Sends the requests of a requests session through an httpx client, so concurrent calls are multiplexed as
+    HTTP/2 streams over a few connections instead of holding one socket each. Responses are converted back to
+    requests responses and transport errors to requests exceptions, so the callers are unchanged.
+    http.pool_maxsize bounds both the connections and the idle connections kept open, as it does for HTTP/1.1.
+
+    The sync httpx client picks a stream id and sends the request headers in two steps without a lock, so threads
+    could send their headers out of stream id order, which the server rejects by closing the connection. Requests
+    therefore take start_lock until their headers are sent; bodies and responses still overlap.
+    """
+
+    def __init__( self, config: Config, logger: logging.Logger | None = None ) -> None:
+        super().__init__()
+        self.start_lock: threading.Lock = threading.Lock()
+        self.client: httpx.Client = httpx.Client(
+            limits = httpx.Limits(
+                max_connections = config.HTTP_POOL_MAXSIZE,
+                max_keepalive_connections = config.HTTP_POOL_MAXSIZE
+            ),
+            timeout = config.HTTP_TIMEOUT,
+            **httpx_versions( config, logger )
+        )
+
+    def send( self, request: requests.PreparedRequest, stream: bool = False, timeout = None, **kwargs ) -> requests.Response:
+        start: float = time.perf_counter()
+        held: list = [ True ]
+
+        def release() -> None:
+            if held[ 0 ]:
+                held[ 0 ] = False
+                self.start_lock.release()
+
+        def trace( event: str, info: dict ) -> None:
+            if event.endswith( ( "send_request_headers.complete", "send_request_headers.failed" ) ):
+                release()
+
+        self.start_lock.acquire()
+
+        try:
+            response: httpx.Response = self.client.send(
+                self.client.build_request(
+                    request.method,
+                    request.url,
+                    headers = dict( request.headers ),
+                    content = request.body,
+                    timeout = timeout if isinstance( timeout, ( int, float ) ) else httpx.USE_CLIENT_DEFAULT,
+                    extensions = { "trace": trace }
+                ),
+                stream = stream
+            )
+        except httpx.TimeoutException as e:
+            raise requests.Timeout( str( e ), request = request )
+        except httpx.TransportError as e:
+            raise requests.ConnectionError( str( e ), request = request )
+        finally:
+            release()
+
+        converted: requests.Response = requests.Response()
+        converted.status_code = response.status_code
+        converted.headers = CaseInsensitiveDict( response.headers )
+        if converted.headers.pop( "Content-Encoding", None ):
+            converted.headers.pop( "Content-Length", None )
+        if stream:
+            converted.raw = HttpxStream( response )
+        else:
+            converted._content = response.content
+            converted._content_consumed = True
+        converted.encoding = response.encoding
+        converted.url = request.url
+        converted.request = request
+        converted.elapsed = timedelta( seconds = time.perf_counter() - start ) if stream else response.elapsed
+        converted.reason = response.reason_phrase
+        converted.http_version = response.http_version
+
+        return converted
+
+    def close( self ) -> None:
+        self.client.close()
+
+class RecordingAdapter( BaseAdapter ):
+    """
+    Sends requests through another adapter and appends every exchange to a JSONL archive:
+    the method, path, request body, status, response headers, response body and the seconds it took.
+    Request headers are not recorded, so archives never hold api keys.
+    """
+
+    def __init__( self, archive: str, adapter: BaseAdapter ) -> None:
+        super().__init__()
+        self.adapter: BaseAdapter = adapter
+        self.archive = open( archive, "a" )
+        self.lock: threading.Lock = threading.Lock()
+
+    def send( self, request: requests.PreparedRequest, **kwargs ) -> requests.Response:
+        start: float = time.perf_counter()
+        response: requests.Response = self.adapter.send( request, **kwargs )
+        content: bytes = response.content
+
+        exchange: dict = {
+            "method": request.method,
+            "path": request_path( request.url ),
+            "body": request_body( request ),
+            "status": response.status_code,
+            "headers": dict( response.headers ),
+            "response": content.decode( "utf-8", "replace" ),
+            "seconds": round( time.perf_counter() - start, 6 )
+        }
+
+        with self.lock:
+            self.archive.write( json.dumps( exchange, separators = ( ",", ":" ) ) + "\n" )
+            self.archive.flush()
+
+        return response
+
+    def close( self ) -> None:
+        self.adapter.close()
+        with self.lock:
+            self.archive.close()
+
+class ReplayAdapter( BaseAdapter ):
+    """
+    Answers requests from a JSONL archive written by RecordingAdapter, without any network access.
+
+    A request is matched on its method, path and body, falling back to its method and path alone so requests
+    carrying generated values such as idempotency keys still match. Both indexes share each exchange, and an exchange
+    is served once before any exchange is repeated: matching exchanges are served in recorded order, and the last one
+    is repeated once they run out. With timing enabled each response is delayed by the recorded seconds multiplied
+    by timing_scale.
+    """
+
+    def __init__( self, archive: str, timing: bool = False, timing_scale: float = 1.0 ) -> None:
+        super().__init__()
+        self.timing: bool = timing
+        self.timing_scale: float = timing_scale
+        self.exact: dict = {}
+        self.loose: dict = {}
+        self.lock: threading.Lock = threading.Lock()
+
+        with open( archive, "r" ) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                exchange: dict = { **json.loads( line ), "served": False }
+                self.exact.setdefault( ( exchange[ "method" ], exchange[ "path" ], exchange[ "body" ] ), deque() ).append( exchange )
+                self.loose.setdefault( ( exchange[ "method" ], exchange[ "path" ] ), deque() ).append( exchange )
+
+    @staticmethod
+    def take( exchanges: deque | None, repeat: bool = False ) -> dict | None:
+        """
+        This method returns the first exchange not served yet through either index and marks it served.
+        Once every exchange was served, the last one is returned again when repeat is set.
+
+        :param exchanges:
+        :param repeat:
+        :return: dict | None
+        """
+
+        if not exchanges:
+            return None
+
+        while len( exchanges ) > 1 and exchanges[ 0 ][ "served" ]:
+            exchanges.popleft()
+
+        exchange: dict = exchanges[ 0 ]
+        if exchange[ "served" ] and not repeat:
+            return None
+
+        exchange[ "served" ] = True
+        if len( exchanges ) > 1:
+            exchanges.popleft()
+
+        return exchange
+
+    def send( self, request: requests.PreparedRequest, **kwargs ) -> requests.Response:
+        path: str = request_path( request.url )
+
+        with self.lock:
+            exact: deque | None = self.exact.get( ( request.method, path, request_body( request ) ) )
+            loose: deque | None = self.loose.get( ( request.method, path ) )
+            exchange: dict | None = self.take( exact ) or self.take( loose ) or self.take( exact, True ) or self.take( loose, True )
+
+        if exchange is None:
+            raise requests.ConnectionError( f"No recorded response for {request.method} {path}", request = request )
+
+        if self.timing and exchange[ "seconds" ]:
+            time.sleep( exchange[ "seconds" ] * self.timing_scale )
+
+        response: requests.Response = requests.Response()
+        response.status_code = exchange[ "status" ]
+        response.headers = CaseInsensitiveDict( exchange[ "headers" ] )
+        response.headers.pop( "Content-Encoding", None )
+        response._content = exchange[ "response" ].encode()
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.elapsed = timedelta( seconds = exchange[ "seconds" ] )
+        response.reason = "Replayed"
+
+        return response
+
+    def close( self ) -> None:
+        pass
+
+def create_adapter( config: Config, logger: logging.Logger | None = None ) -> BaseAdapter:
+    """
+    Returns the transport selected by transport.mode (live, record or replay) speaking the http.version protocol.
+
+    :param config:
+    :param logger:
+    :return: BaseAdapter
+    """
+
+    if config.TRANSPORT_MODE not in ( "live", "record", "replay" ):
+        raise ValueError( f"Unknown transport mode: {config.TRANSPORT_MODE}" )
+
+    if config.TRANSPORT_MODE == "replay":
+        return ReplayAdapter( config.TRANSPORT_ARCHIVE, config.TRANSPORT_TIMING, config.TRANSPORT_TIMING_SCALE )
+
+    adapter: BaseAdapter = HTTPAdapter(
+        pool_connections = config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize = config.HTTP_POOL_MAXSIZE
+    )
+
+    if httpx_versions( config, logger )[ "http2" ]:
+        adapter = Http2Adapter( config, logger )
+
+    if config.TRANSPORT_MODE == "record":
+        return RecordingAdapter( config.TRANSPORT_ARCHIVE, adapter )
+
+    return adapter
@@ -2,50 +2,60 @@ import logging
 from typing import Any
 
 from api.api_base import ApiBase
+from api.api_caller import ApiCaller
 from core.config import Config
+from core.json_codec import decode_response
 from api.endpoints import Endpoints
-from dto import Webhook
+from dto import Webhook, WebhookRecord
 
 class WebhookApi( ApiBase ):
-
-    def __init__( self, config: Config, logger: logging.Logger ):
-        super().__init__( config, logger )
-
-        self.webhook_events: list = [
-            "TransactionStarted",
-            "TransactionCaptureStarted",
-            "TransactionCompleted",
-            "TransactionFailed",
-            "TransactionCanceled",
-            "PayoutCompleted",
-            "ClawbackStarted",
-            "ClawbackFailed",
-            "ClawbackCompleted",
-            "BankLinkedSuccessfully",
-            "BankLinkFailed",
-            "BusinessCreated",
-            "BusinessUpdated",
-            "RefundPending",
-            "RefundCaptureStarted",
-            "RefundCaptureCompleted",
-            "RefundCaptureFailed",
-            "RefundPayoutPending",
-            "RefundPayoutCompleted",
-            "RefundPayoutFailed",
-        ]
-
-    def register( self, webhook_url: str ) -> bool:
+    WEBHOOK_EVENTS: tuple = (
+        "TransactionStarted",
+        "TransactionCaptureStarted",
+        "TransactionCompleted",
+        "TransactionFailed",
+        "TransactionCanceled",
+        "PayoutCompleted",
+        "ClawbackStarted",
+        "ClawbackFailed",
+        "ClawbackCompleted",
+        "BankLinkedSuccessfully",
+        "BankLinkFailed",
+        "BusinessCreated",
+        "BusinessUpdated",
+        "RefundPending",
+        "RefundCaptureStarted",
+        "RefundCaptureCompleted",
+        "RefundCaptureFailed",
+        "RefundPayoutPending",
+        "RefundPayoutCompleted",
+        "RefundPayoutFailed",
+    )
+
+    def __init__( self, config: Config, logger: logging.Logger, api_caller: ApiCaller | None = None ):
+        super().__init__( config, logger, api_caller )
+
+        self.webhook_events: list = list( WebhookApi.WEBHOOK_EVENTS )
+
+    @staticmethod
+    def event_list( event_names: str | list | None ) -> list:
+        if isinstance( event_names, str ):
+            return [ name.strip() for name in event_names.split( "," ) if name.strip() ]
+
+        return list( event_names or [] )
+
+    def register( self, webhook_url: str | list, event_names: list | None = None ) -> bool:
         """
         This method registers a webhook with the GrailPay API
 
+        :param webhook_url: A webhook url, or a list of urls.
+        :param event_names: The events to register the urls for, as a list or comma separated. Defaults to every event.
         :return:
         """
 
         webhook: Webhook = Webhook(
-            webhook_url = [
-                webhook_url
-            ],
-            event_names = self.webhook_events
+            webhook_url = [ webhook_url ] if isinstance( webhook_url, str ) else list( webhook_url ),
+            event_names = WebhookApi.event_list( event_names ) or self.webhook_events
         )
 
         response = self.api_caller.post(
@@ -53,23 +63,25 @@ class WebhookApi( ApiBase ):
             webhook.__dict__
         )
 
+        self.api_caller.invalidate( self.endpoints.get_url( Endpoints.WEBHOOK_FETCH ) )
+
         if response.status_code == 201:
             return True
 
         return False
 
-    def deregister( self, webhook_url: str ) -> bool:
+    def deregister( self, webhook_url: str | list, event_names: list | None = None ) -> bool:
         """
         This method deregisters a webhook with the GrailPay API
 
+        :param webhook_url: A webhook url, or a list of urls.
+        :param event_names: The events to deregister the urls for, as a list or comma separated. Defaults to every event.
         :return:
         """
 
         webhook: Webhook = Webhook(
-            webhook_url = [
-                webhook_url
-            ],
-            event_names = self.webhook_events
+            webhook_url = [ webhook_url ] if isinstance( webhook_url, str ) else list( webhook_url ),
+            event_names = WebhookApi.event_list( event_names ) or self.webhook_events
         )
 
         response = self.api_caller.delete(
@@ -77,11 +89,33 @@ class WebhookApi( ApiBase ):
             webhook.__dict__
         )
 
+        self.api_caller.invalidate( self.endpoints.get_url( Endpoints.WEBHOOK_FETCH ) )
+
         if response.status_code == 200:
             return True
 
         return False
 
+    def subscriptions( self ) -> dict[str, set] | None:
+        """
+        This method fetches the registered webhooks and groups their event names by url.
+
+        :return: dict of url to event names, or None when the fetch failed.
+        """
+
+        response = self.api_caller.get(
+            self.endpoints.get_url( Endpoints.WEBHOOK_FETCH ),
+        )
+
+        if response.status_code != 200:
+            return None
+
+        subscriptions: dict = {}
+        for webhook in map( WebhookRecord.from_dict, decode_response( response )[ 'data' ] ):
+            subscriptions.setdefault( webhook.webhook_url, set() ).add( webhook.event_name )
+
+        return subscriptions
+
     def fetch( self ) -> dict[str, Any]:
         """
         This method fetches a webhook with the GrailPay API
@@ -94,7 +128,7 @@ class WebhookApi( ApiBase ):
         )
 
         if response.status_code == 200:
-            response_data = response.json()
-            for webhook in response_data[ 'data' ]:
-                self.logger.info( f"Event: {webhook['event_name']} Url: {webhook['webhook_url']}" )
+            response_data = decode_response( response )
+            for webhook in map( WebhookRecord.from_dict, response_data[ 'data' ] ):
+                self.logger.info( f"Event: {webhook.event_name} Url: {webhook.webhook_url}" )
             return response_data
@@ -0,0 +1,344 @@
+import copy
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Any, Iterator
+
+from api.api_caller import ApiCaller
+from api.transaction_api import TransactionApi
+from core.config import Config
+from core.store import TransactionStore
+from core.transaction_export import TransactionExport
+from dto import TransactionList
+
+class JsonlShardWriter:
+    """
+    Appends the transactions of one shard to its JSONL part file. On resume the file is cut back to the
+    offset of the last checkpoint, so rows of a page that was not checkpointed are written only once.
+    """
+
+    def __init__( self, path: str, offset: int = 0 ) -> None:
+        self.file = open( path, "r+b" if os.path.exists( path ) else "wb" )
+        self.file.truncate( offset )
+        self.file.seek( offset )
+
+    def write( self, transaction: dict ) -> None:
+        self.file.write( json.dumps( transaction, separators = ( ",", ":" ) ).encode() + b"\n" )
+
+    def commit( self ) -> dict:
+        self.file.flush()
+        os.fsync( self.file.fileno() )
+        return { "offset": self.file.tell() }
+
+    def close( self ) -> None:
+        self.file.close()
+
+class StoreShardWriter:
+    """
+    Upserts the transactions of one shard into the SQLite store, a page per database commit.
+    Upserts are idempotent, so a page replayed after an interruption is harmless.
+    """
+
+    def __init__( self, path: str ) -> None:
+        self.store: TransactionStore = TransactionStore( path )
+        self.store.connection.execute( "PRAGMA busy_timeout=30000" )
+        self.batch: list = []
+
+    def write( self, transaction: dict ) -> None:
+        self.batch.append( transaction )
+
+    def commit( self ) -> dict:
+        if self.batch:
+            self.store.upsert_transactions( self.batch )
+            self.batch = []
+        return {}
+
+    def close( self ) -> None:
+        self.store.close()
+
+class TransactionBackfill:
+    """
+    Backfills the transaction history of a date range by splitting it into shards of a few days and running
+    the shards in a process pool. Each process has its own connection pool and parses pages as they stream in,
+    so decoding runs on every core instead of one.
+
+    Progress is checkpointed per shard after every page, and a rerun with the same arguments skips completed
+    shards and resumes the others from their last page. JSONL and parquet or csv sinks write one part file
+    per shard into the output directory; the sqlite sink upserts into the store at output. Columnar part files
+    cannot be appended to, so an interrupted columnar shard starts over.
+    """
+
+    SINKS: tuple = ( "jsonl", "sqlite", "parquet", "csv" )
+
+    def __init__( self, config: Config, logger: logging.Logger, workers: int | None = None ) -> None:
+        self.config: Config = config
+        self.logger: logging.Logger = logger
+        self.workers: int = workers or os.cpu_count() or 1
+
+    @staticmethod
+    def shards( start_date: str, end_date: str, days: int ) -> list:
+        """
+        This method splits an inclusive date range into consecutive ranges of at most days days.
+
+        :param start_date: YYYY-MM-DD
+        :param end_date: YYYY-MM-DD
+        :param days:
+        :return: list of ( start_date, end_date ) tuples.
+        """
+
+        start: date = date.fromisoformat( start_date )
+        end: date = date.fromisoformat( end_date )
+
+        if end < start:
+            raise ValueError( f"end_date {end_date} is before start_date {start_date}" )
+
+        shards: list = []
+        while start <= end:
+            shard_end: date = min( end, start + timedelta( days = days - 1 ) )
+            shards.append( ( start.isoformat(), shard_end.isoformat() ) )
+            start = shard_end + timedelta( days = 1 )
+
+        return shards
+
+    def shard_config( self, workers: int ) -> Config:
+        """
+        This method returns the config used by each shard process. The rate limit is divided between
+        the processes so together they stay within it.
+
+        :param workers: The number of shard processes.
+        :return: Config
+        """
+
+        config: Config = copy.copy( self.config )
+        config.RATE_LIMIT_RPS = self.config.RATE_LIMIT_RPS / workers
+        config.RATE_LIMIT_BURST = self.config.RATE_LIMIT_BURST / workers
+        config.RATE_LIMIT_CLASSES = { name: float( rate ) / workers for name, rate in self.config.RATE_LIMIT_CLASSES.items() }
+
+        return config
+
+    def run(
+        self,
+        start_date: str,
+        end_date: str,
+        output: str,
+        sink: str = "jsonl",
+        days: int | str = 7,
+        workers: int | str | None = None,
+        page_size: int | str = 200,
+        status: str | None = None,
+        checkpoint: str | None = None
+    ) -> dict:
+        """
+        This method backfills the transactions created between start_date and end_date into output.
+
+        :param start_date: The first day to backfill (YYYY-MM-DD).
+        :param end_date: The last day to backfill (YYYY-MM-DD).
+        :param output: The directory of part files, or the database file for the sqlite sink.
+        :param sink: jsonl, sqlite, parquet or csv
+        :param days: The number of days per shard.
+        :param workers: The number of shard processes. Defaults to the number of cpus.
+        :param page_size: The number of transactions fetched per call.
+        :param status: Only backfill transactions with this status.
+        :param checkpoint: The directory of shard checkpoints. Defaults to output.checkpoints.
+        :return: The number of shards done, skipped and failed, and of transactions written.
+        """
+
+        if sink not in self.SINKS:
+            raise ValueError( f"Unknown sink {sink}. Use one of {', '.join( self.SINKS )}." )
+
+        workers = int( workers ) if workers else self.workers
+        checkpoint = checkpoint or output.rstrip( "/" ) + ".checkpoints"
+        shards: list = self.shards( start_date, end_date, int( days ) )
+
+        os.makedirs( checkpoint, exist_ok = True )
+        if sink != "sqlite":
+            os.makedirs( output, exist_ok = True )
+
+        config: Config = self.shard_config( min( workers, len( shards ) ) )
+        summary: dict = { "shards": len( shards ), "done": 0, "skipped": 0, "failed": 0, "count": 0 }
+
+        with ProcessPoolExecutor( max_workers = min( workers, len( shards ) ) ) as executor:
+            futures: dict = {
+                executor.submit( backfill_shard, config, self.logger, shard, output, sink, int( page_size ), status, checkpoint ): shard
+                for shard in shards
+            }
+
+            try:
+                for future in as_completed( futures ):
+                    shard: tuple = futures[ future ]
+                    try:
+                        result: dict = future.result()
+                    except Exception as e:
+                        self.logger.error( f"Shard {shard[ 0 ]} to {shard[ 1 ]} failed: {e}" )
+                        summary[ "failed" ] += 1
+                        continue
+
+                    summary[ "skipped" if result[ "skipped" ] else "done" ] += 1
+                    summary[ "count" ] += result[ "count" ]
+                    self.logger.info( f"Shard {shard[ 0 ]} to {shard[ 1 ]}: {result[ 'count' ]} transactions" )
+            except KeyboardInterrupt:
+                executor.shutdown( wait = False, cancel_futures = True )
+                raise
+
+        self.logger.info(
+            f"Backfilled {summary['count']} transactions in {summary['shards']} shards: "
+            f"{summary['done']} done, {summary['skipped']} skipped, {summary['failed']} failed"
+        )
+
+        return summary
+
+class ShardBackfill:
+    """
+    Fetches one shard page by page in a shard process, writing to its sink and checkpointing after each page.
+    """
+
+    def __init__( self, config: Config, logger: logging.Logger, shard: tuple, page_size: int, status: str | None, checkpoint: str ) -> None:
+        self.config: Config = config
+        self.logger: logging.Logger = logger
+        self.shard: tuple = shard
+        self.page_size: int = page_size
+        self.status: str | None = status
+        self.name: str = f"{shard[ 0 ]}_{shard[ 1 ]}"
+        self.checkpoint_path: str = os.path.join( checkpoint, f"{self.name}.json" )
+
+    def load_checkpoint( self ) -> dict:
+        """
+        This method returns the checkpoint of the shard, or an empty one when there is none or it was written
+        for another page size or status filter.
+
+        :return: dict
+        """
+
+        try:
+            with open( self.checkpoint_path, "r" ) as f:
+                state: dict = json.load( f )
+        except ( FileNotFoundError, ValueError ):
+            return {}
+
+        if state.get( "page_size" ) != self.page_size or state.get( "status" ) != self.status:
+            return {}
+
+        return state
+
+    def save_checkpoint( self, state: dict ) -> None:
+        """
+        This method replaces the checkpoint of the shard atomically.
+
+        :param state:
+        :return:
+        """
+
+        temporary: str = self.checkpoint_path + ".tmp"
+
+        with open( temporary, "w" ) as f:
+            json.dump( { **state, "page_size": self.page_size, "status": self.status }, f )
+            f.flush()
+            os.fsync( f.fileno() )
+
+        os.replace( temporary, self.checkpoint_path )
+
+    def iter_transactions( self, transaction_api: Any, page: int, on_page: Any ) -> Iterator[dict]:
+        """
+        This method yields the transactions of the shard from page onwards, calling on_page( page, count )
+        once the transactions of each page have been consumed. A failed page raises RuntimeError.
+
+        :param transaction_api:
+        :param page: The first page to fetch.
+        :param on_page:
+        :return: Iterator[dict]
+        """
+
+        while True:
+            state: dict = {}
+            count: int = 0
+
+            for transaction in transaction_api.stream_page(
+                TransactionList(
+                    pageSize = self.page_size,
+                    page = page,
+                    status = self.status,
+                    fromDate = self.shard[ 0 ],
+                    toDate = self.shard[ 1 ]
+                ),
+                state
+            ):
+                count += 1
+                yield transaction
+
+            on_page( page, count )
+
+            if not state[ "has_more" ]:
+                return
+
+            page += 1
+
+    def run( self, output: str, sink: str ) -> dict:
+        """
+        This method backfills the shard into the sink, resuming from its checkpoint.
+
+        :param output: The directory of part files, or the database file for the sqlite sink.
+        :param sink: jsonl, sqlite, parquet or csv
+        :return: The number of transactions in the shard and whether it was already complete.
+        """
+
+        state: dict = self.load_checkpoint()
+
+        if state.get( "done" ):
+            return { "count": state[ "count" ], "skipped": True }
+
+        with ApiCaller( self.config, self.logger ) as api_caller:
+            transaction_api: TransactionApi = TransactionApi( self.config, self.logger, api_caller )
+
+            if sink in ( "parquet", "csv" ):
+                transactions: Iterator[dict] = self.iter_transactions( transaction_api, 1, lambda page, count: None )
+                aggregates = TransactionExport( transaction_api, self.logger ).export_chunks(
+                    transactions,
+                    os.path.join( output, f"{self.name}.{sink}" ),
+                    sink
+                )
+                state = { "page": None, "count": aggregates.count, "done": True }
+                self.save_checkpoint( state )
+
+                return { "count": state[ "count" ], "skipped": False }
+
+            if sink == "jsonl":
+                writer = JsonlShardWriter( os.path.join( output, f"{self.name}.jsonl" ), state.get( "offset", 0 ) )
+            else:
+                writer = StoreShardWriter( output )
+
+            total: int = state.get( "count", 0 )
+
+            def on_page( page: int, count: int ) -> None:
+                nonlocal total
+                total += count
+                self.save_checkpoint( { "page": page, "count": total, "done": False, **writer.commit() } )
+
+            try:
+                for transaction in self.iter_transactions( transaction_api, state.get( "page", 0 ) + 1, on_page ):
+                    writer.write( transaction )
+
+                self.save_checkpoint( { "page": None, "count": total, "done": True } )
+            finally:
+                writer.close()
+
+        return { "count": total, "skipped": False }
+
+def backfill_shard(
+    config: Config,
+    logger: logging.Logger,
+    shard: tuple,
+    output: str,
+    sink: str,
+    page_size: int,
+    status: str | None,
+    checkpoint: str
+) -> dict:
+    """
+    The entry point of a shard process.
+
+    :return: dict
+    """
+
+    return ShardBackfill( config, logger, shard, page_size, status, checkpoint ).run( output, sink )
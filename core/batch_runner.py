@@ -0,0 +1,259 @@
+import csv
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Iterator, TextIO
+
+from core.bounded_pool import map_unordered
+from core.request_journal import RequestJournal
+
+class BatchRunner:
+    """
+    Runs grailpay.py actions read from a JSONL or CSV file on a bounded worker pool.
+
+    JSONL rows look like {"action": "transaction:create", "params": ["payer", "payee", 1000]}.
+    CSV rows hold the action in the first column and its params in the following columns.
+    A row fails when its action raises or returns None, False or an empty string.
+
+    Actions accepting an idempotency_key get one per row, taken from the row's idempotency_key or client_reference_id
+    field or derived from the batch file name and row content. Identical rows are told apart by how many identical rows
+    precede them, so inserting, removing or reordering other rows never changes a row's key. With a journal configured,
+    rerunning a batch skips every row whose key already succeeded and resends the rest under the same key, so an
+    interrupted batch never pays twice. Keys derived for a tenant include its name, so two tenants running the same
+    file never share keys.
+    """
+
+    KEY_FIELDS: tuple = ( "idempotency_key", "client_reference_id" )
+
+    def __init__(
+        self,
+        actions: dict,
+        logger: logging.Logger,
+        workers: int = 10,
+        journal: RequestJournal | None = None,
+        tenant: str | None = None
+    ) -> None:
+        self.actions: dict = actions
+        self.logger: logging.Logger = logger
+        self.workers: int = workers
+        self.journal: RequestJournal | None = journal
+        self.tenant: str | None = tenant
+
+    @staticmethod
+    def read_rows( file: str ) -> Iterator[dict]:
+        """
+        This method streams the rows of a batch file one at a time so large files are never loaded into memory.
+        A CSV header row starting with "action" may name an idempotency_key or client_reference_id column.
+
+        :param file: The path of a .jsonl or .csv file.
+        :return: Iterator[dict]
+        """
+
+        with open( file, "r", newline = "" ) as f:
+            if file.endswith( ".csv" ):
+                key_column: int | None = None
+
+                for values in csv.reader( f ):
+                    if not values or values[ 0 ] == "":
+                        continue
+
+                    if values[ 0 ] == "action":
+                        key_column = next( ( index for index, name in enumerate( values ) if name in BatchRunner.KEY_FIELDS ), None )
+                        continue
+
+                    row: dict = { "action": values[ 0 ] }
+                    params: list = list( values[ 1: ] )
+
+                    if key_column is not None and key_column < len( values ):
+                        row[ "idempotency_key" ] = params.pop( key_column - 1 )
+
+                    while params and params[ -1 ] == "":
+                        params.pop()
+
+                    row[ "params" ] = params
+                    yield row
+                return
+
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+
+                try:
+                    yield json.loads( line )
+                except ValueError as e:
+                    yield { "invalid": f"Invalid row: {e}" }
+
+    @staticmethod
+    def extract_uuid( result: Any ) -> str | None:
+        """
+        This method returns the uuid of the entity created by an action, if there is one.
+
+        :param result: The value returned by the action.
+        :return: str | None
+        """
+
+        if isinstance( result, str ) and result:
+            return result
+
+        if isinstance( result, dict ):
+            data = result.get( "data" )
+            if isinstance( data, dict ):
+                return data.get( "uuid" )
+
+        return None
+
+    def row_content( self, file: str, row: dict ) -> str:
+        """
+        This method returns the canonical content a row's derived key is hashed from: the tenant, the batch file name,
+        the action and its params and options. Params are compared as strings, so a CSV row and a JSONL row
+        sending the same request have the same content.
+
+        :param file: The path of the batch file.
+        :param row: The action name and params.
+        :return: str
+        """
+
+        params: list = [ str( param ) for param in row.get( "params" ) or [] ]
+        options: str = json.dumps( row.get( "options" ) or {}, sort_keys = True, default = str )
+
+        return f"{self.tenant or ''}:{os.path.basename( file )}:{row.get( 'action' )}:{json.dumps( params )}:{options}"
+
+    def row_key( self, file: str, row: dict, occurrence: int = 0 ) -> str:
+        """
+        This method returns the idempotency key of a row, which stays the same each time the batch is run
+        for the same tenant, wherever the file is moved to and wherever the row sits in it. Editing a row changes its key.
+
+        :param file: The path of the batch file.
+        :param row: The action name and params.
+        :param occurrence: The number of identical rows before this one.
+        :return: str
+        """
+
+        for field in self.KEY_FIELDS:
+            if row.get( field ):
+                return str( row[ field ] )
+
+        source: str = f"{self.row_content( file, row )}:{occurrence}"
+
+        return hashlib.sha256( source.encode() ).hexdigest()[ :32 ]
+
+    def keyed_row( self, file: str, row: dict, occurrences: dict ) -> dict:
+        """
+        This method adds the idempotency key to rows whose action accepts one.
+
+        :param file: The path of the batch file.
+        :param row: The action name and params.
+        :param occurrences: The number of rows seen so far per row content digest, updated by this call.
+        :return: dict
+        """
+
+        action = self.actions.get( row.get( "action" ) ) if "invalid" not in row else None
+
+        if action and "idempotency_key" in inspect.signature( action[ 0 ] ).parameters:
+            occurrence: int = 0
+
+            if not any( row.get( field ) for field in self.KEY_FIELDS ):
+                content: bytes = hashlib.sha256( self.row_content( file, row ).encode() ).digest()
+                occurrence = occurrences.get( content, 0 )
+                occurrences[ content ] = occurrence + 1
+
+            row[ "idempotency_key" ] = self.row_key( file, row, occurrence )
+        else:
+            row.pop( "idempotency_key", None )
+
+        row.pop( "client_reference_id", None )
+
+        return row
+
+    def run_row( self, row_number: int, row: dict, completed: dict | None = None ) -> dict:
+        """
+        This method runs a single row and returns its result record.
+
+        :param row_number: The position of the row in the batch file.
+        :param row: The action name and params.
+        :param completed: The journal state of keys that already succeeded.
+        :return: dict
+        """
+
+        action: str = row.get( "action", "" )
+        params: list = row.get( "params" ) or []
+        options: dict = row.get( "options" ) or {}
+
+        result: dict = { "row": row_number, "action": action, "status": "error", "uuid": None, "latency_ms": 0.0, "error": None }
+
+        if "invalid" in row:
+            result[ "error" ] = row[ "invalid" ]
+            return result
+
+        if action not in self.actions or action == "batch":
+            result[ "error" ] = f"Unknown action: {action}"
+            return result
+
+        func, param_count, param_desc = self.actions[ action ]
+
+        if len( params ) != param_count:
+            result[ "error" ] = f"Expected params: {param_desc}"
+            return result
+
+        if "idempotency_key" in row:
+            key: str = row[ "idempotency_key" ]
+            result[ "idempotency_key" ] = key
+            options = { **options, "idempotency_key": key }
+
+            if completed and key in completed:
+                result[ "status" ] = "skipped"
+                result[ "uuid" ] = completed[ key ].get( "uuid" )
+                return result
+
+        start: float = time.perf_counter()
+
+        try:
+            value = func( *params, **options )
+            result[ "uuid" ] = self.extract_uuid( value )
+            result[ "status" ] = "error" if value is None or value is False or value == "" else "ok"
+        except Exception as e:
+            result[ "error" ] = str( e )
+
+        result[ "latency_ms" ] = round( ( time.perf_counter() - start ) * 1000, 3 )
+
+        return result
+
+    def run( self, file: str, output: str | None = None, workers: int | str | None = None ) -> dict:
+        """
+        This method runs every row of a batch file and writes one JSON result line per row as soon as it completes.
+
+        :param file: The path of a .jsonl or .csv file.
+        :param output: The path of the results file. Results are written to stdout when omitted.
+        :param workers: The number of rows run concurrently.
+        :return: dict
+        """
+
+        worker_count: int = int( workers ) if workers else self.workers
+        summary: dict = { "ok": 0, "error": 0, "skipped": 0 }
+
+        completed: dict = {}
+        if self.journal:
+            completed = { key: state for key, state in self.journal.load().items() if state[ "status" ] == "ok" }
+
+        occurrences: dict = {}
+        out: TextIO = open( output, "w" ) if output else sys.stdout
+
+        try:
+            rows: Iterator = ( ( row_number, self.keyed_row( file, row, occurrences ), completed ) for row_number, row in enumerate( self.read_rows( file ), start = 1 ) )
+
+            for result in map_unordered( self.run_row, rows, worker_count ):
+                summary[ result[ "status" ] ] += 1
+                out.write( json.dumps( result ) + "\n" )
+                out.flush()
+        finally:
+            if output:
+                out.close()
+
+        self.logger.info( f"Batch complete. Succeeded: {summary['ok']} Failed: {summary['error']} Skipped: {summary['skipped']}" )
+
+        return summary
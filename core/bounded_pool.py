@@ -0,0 +1,34 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Iterable, Iterator
+
+def map_unordered( func: Callable[..., Any], items: Iterable, workers: int, max_pending: int | None = None ) -> Iterator[Any]:
+    """
+    Runs func over items on a thread pool and yields results as they complete.
+
+    Items are pulled from the iterable only as slots free up, so at most max_pending items are held in memory
+    no matter how long the input is. Each item is passed to func as a tuple of arguments.
+
+    :param func:
+    :param items: An iterable of argument tuples.
+    :param workers: The number of threads.
+    :param max_pending: The number of submitted but unfinished items. Defaults to twice the number of workers.
+    :return: Iterator[Any]
+    """
+
+    max_pending = max_pending or workers * 2
+
+    with ThreadPoolExecutor( max_workers = workers ) as executor:
+        pending: set = set()
+
+        for item in items:
+            if len( pending ) >= max_pending:
+                done, pending = wait( pending, return_when = FIRST_COMPLETED )
+                for future in done:
+                    yield future.result()
+
+            pending.add( executor.submit( func, *item ) )
+
+        while pending:
+            done, pending = wait( pending, return_when = FIRST_COMPLETED )
+            for future in done:
+                yield future.result()
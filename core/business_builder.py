@@ -1,16 +1,82 @@
+import json
 import random
 import string
+from typing import Iterator
 from core.config import Config
 from dto import AccountRouting, Business
 from core.account_routing_factory import AccountRoutingFactory
 
+BUSINESS_DETAILS: dict = {
+    "name": "John Incorporation",
+    "tin": "",
+    "trading_name": "John Incorporation",
+    "entity_type": "Sole Trader",
+    "incorporation_date": "2024-02-02",
+    "incorporation_state": "CO",
+    "industry": "Nature of business",
+    "industry_classification": {
+        "code_type": "SIC",
+        "codes": [
+            "NAICS 42",
+            "NAICS 45"
+        ],
+        "description": "abcdefg"
+    },
+    "source_of_wealth": "2344",
+    "source_of_funds": "Business revenue",
+    "first_transaction_completed_at": "2024-05-02 16:14:25",
+    "product_type": "financial",
+    "registered_as_inactive": False,
+    "address_type": "Registered",
+    "address": {
+        "line_1": "10554 W Quarles Ave",
+        "city": "Littleton",
+        "state": "CO",
+        "zip": "8012"
+    }
+}
+
+BUSINESS_OWNER: dict = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "dob": "2023-04-11",
+    "ssn9": "123456789",
+    "address": {
+        "line_1": "10554 W Quarles Ave",
+        "city": "Littleton",
+        "state": "CO",
+        "zip": "80127"
+    },
+    "is_beneficial_owner": True,
+    "is_director": False,
+    "is_account_owner": False,
+    "is_share_holder": False,
+    "is_significant_control_person": False,
+    "ownership_percentage": 25,
+    "email": "",
+    "phone": "1234567890",
+    "occupation": "Co-founder",
+    "first_transaction_completed_at": "2024-05-02 16:14:25",
+    "product_type": "financial"
+}
+
+BANK_ACCOUNT: dict = {
+    "account_number": "",
+    "routing_number": "",
+    "account_name": "Jack Jones",
+    "account_type": "checking"
+}
+
 class BusinessBuilder:
 
+    EMAIL_ALPHABET: str = string.ascii_lowercase + string.digits
+
     def __init__( self, config: Config ) -> None:
         self.config: Config = config
         self.email: str = ""
         self.tin: str = ""
         self.account_routing: AccountRouting = None
+        self.account_routing_factory: AccountRoutingFactory = AccountRoutingFactory( config )
 
     @staticmethod
     def generate_random_email() -> str:
@@ -35,7 +101,7 @@ class BusinessBuilder:
         return ''.join( random.choices('0123456789', k=9 ) )
 
     def generate_random_account_routing( self ) -> AccountRouting:
-        return AccountRoutingFactory( self.config ).build()
+        return self.account_routing_factory.build()
 
     def random_email(self) -> 'BusinessBuilder':
         self.email: str = self.generate_random_email()
@@ -49,82 +115,152 @@ class BusinessBuilder:
         self.account_routing: AccountRouting = self.generate_random_account_routing()
         return self
 
-    def build( self ) -> Business:
+    @staticmethod
+    def random_characters( rng: random.Random, alphabet: str, count: int ) -> str:
         """
-        This method builds a Business object with random data
+        This method draws count characters from alphabet in one pass over random bytes.
+        Bytes that would bias the result are discarded rather than wrapped.
+
+        :param rng:
+        :param alphabet: At most 256 ASCII characters.
+        :param count:
+        :return: str
+        """
+
+        limit: int = 256 - 256 % len( alphabet )
+        table: bytes = bytes( ord( alphabet[ i % len( alphabet ) ] ) for i in range( 256 ) )
+        discarded: bytes = bytes( range( limit, 256 ) )
+
+        characters: bytes = b""
+        while len( characters ) < count:
+            needed: int = count - len( characters )
+            characters += rng.randbytes( needed + needed // 8 + 8 ).translate( table, discarded )
+
+        return characters[ :count ].decode()
+
+    def make_business( self, email: str, tin: str, account_number: str, routing_number: str ) -> Business:
+        """
+        This method fills the business template with the fields that differ between businesses.
+        Every nested dict and list of the template is copied one level deep, so a caller changing one business
+        never changes another or the template, without paying for a deep copy of the flat fields.
 
         :return: Business
         """
 
-        business: Business = Business(
+        industry_classification: dict = BUSINESS_DETAILS[ "industry_classification" ]
+
+        return Business(
             client_reference_id = "",
             kyb = self.config.KYB,
             first_name = "John",
             last_name = "Doe",
-            email = self.email,
+            email = email,
             phone = "1234567890",
             business = {
-                "name": "John Incorporation",
-                "tin": f"{self.tin}",
-                "trading_name": "John Incorporation",
-                "entity_type": "Sole Trader",
-                "incorporation_date": "2024-02-02",
-                "incorporation_state": "CO",
-                "industry": "Nature of business",
-                "industry_classification": {
-                    "code_type": "SIC",
-                    "codes": [
-                        "NAICS 42",
-                        "NAICS 45"
-                    ],
-                    "description": "abcdefg"
-                },
-                "source_of_wealth": "2344",
-                "source_of_funds": "Business revenue",
-                "first_transaction_completed_at": "2024-05-02 16:14:25",
-                "product_type": "financial",
-                "registered_as_inactive": False,
-                "address_type": "Registered",
-                "address": {
-                    "line_1": "10554 W Quarles Ave",
-                    "city": "Littleton",
-                    "state": "CO",
-                    "zip": "8012"
-                }
+                **BUSINESS_DETAILS,
+                "tin": tin,
+                "industry_classification": { **industry_classification, "codes": [ *industry_classification[ "codes" ] ] },
+                "address": { **BUSINESS_DETAILS[ "address" ] }
             },
-            business_owners = [
-                {
-                    "first_name": "John",
-                    "last_name": "Doe",
-                    "dob": "2023-04-11",
-                    "ssn9": "123456789",
-                    "address": {
-                        "line_1": "10554 W Quarles Ave",
-                        "city": "Littleton",
-                        "state": "CO",
-                        "zip": "80127"
-                    },
-                    "is_beneficial_owner": True,
-                    "is_director": False,
-                    "is_account_owner": False,
-                    "is_share_holder": False,
-                    "is_significant_control_person": False,
-                    "ownership_percentage": 25,
-                    "email": self.email,
-                    "phone": "1234567890",
-                    "occupation": "Co-founder",
-                    "first_transaction_completed_at": "2024-05-02 16:14:25",
-                    "product_type": "financial"
-                }
-            ],
+            business_owners = [ { **BUSINESS_OWNER, "email": email, "address": { **BUSINESS_OWNER[ "address" ] } } ],
             bank_account = {
-                "custom": {
-                    "account_number": f"{self.account_routing.account_number}",
-                    "routing_number": f"{self.account_routing.routing_number}",
-                    "account_name": "Jack Jones",
-                    "account_type": "checking"
-                }
+                "custom": { **BANK_ACCOUNT, "account_number": account_number, "routing_number": routing_number }
             }
         )
 
-        return business
+    def build( self ) -> Business:
+        """
+        This method builds a Business object with random data
+
+        :return: Business
+        """
+
+        return self.make_business(
+            self.email,
+            f"{self.tin}",
+            f"{self.account_routing.account_number}",
+            f"{self.account_routing.routing_number}"
+        )
+
+    def serialized_template( self ) -> str:
+        """
+        This method returns the business payload as a JSON %-format string with email, tin and account_number placeholders.
+
+        :return: str
+        """
+
+        business: Business = self.make_business( "\0email\0", "\0tin\0", "\0account_number\0", str( self.config.ROUTING_NUMBER ) )
+
+        template: str = json.dumps( business.__dict__ ).replace( "%", "%%" )
+        for field in ( "email", "tin", "account_number" ):
+            template = template.replace( json.dumps( f"\0{field}\0" ), f"\"%({field})s\"" )
+
+        return template
+
+    def generate_many(
+        self,
+        n: int,
+        seed: int | None = None,
+        unique: bool = True,
+        serialized: bool = False,
+        batch_size: int = 1000
+    ) -> Iterator[Business | str]:
+        """
+        This method streams n random businesses for seeding load-test environments.
+
+        Random fields are drawn a batch at a time and poured into a precomputed template, which is much
+        cheaper than building each business through the random_* methods.
+
+        :param n: The number of businesses to generate.
+        :param seed: Seed for reproducible output.
+        :param unique: Guarantee that emails, TINs and account numbers are not repeated.
+        :param serialized: Yield JSON strings instead of Business objects.
+        :param batch_size: The number of businesses whose random fields are drawn at once.
+        :return: Iterator[Business | str]
+        """
+
+        rng: random.Random = random.Random( seed )
+        routing_number: str = str( self.config.ROUTING_NUMBER )
+        template: str = self.serialized_template() if serialized else ""
+        seen: dict = { "email": set(), "tin": set(), "account_number": set() }
+
+        def draw( field: str, values: list, redraw ) -> list:
+            if not unique:
+                return values
+
+            used: set = seen[ field ]
+            for index, value in enumerate( values ):
+                while value in used:
+                    value = redraw()
+                used.add( value )
+                values[ index ] = value
+
+            return values
+
+        def chunks( alphabet: str, width: int, count: int ) -> list:
+            characters: str = self.random_characters( rng, alphabet, width * count )
+            return [ characters[ i:i + width ] for i in range( 0, width * count, width ) ]
+
+        def account_numbers( count: int ) -> list:
+            return [
+                first + rest
+                for first, rest in zip( self.random_characters( rng, "123456789", count ), chunks( string.digits, 11, count ) )
+            ]
+
+        produced: int = 0
+        while produced < n:
+            size: int = min( batch_size, n - produced )
+
+            users: list = draw( "email", chunks( self.EMAIL_ALPHABET, 10, size ), lambda: chunks( self.EMAIL_ALPHABET, 10, 1 )[ 0 ] )
+            tins: list = draw( "tin", chunks( string.digits, 9, size ), lambda: chunks( string.digits, 9, 1 )[ 0 ] )
+            accounts: list = draw( "account_number", account_numbers( size ), lambda: account_numbers( 1 )[ 0 ] )
+
+            for user, tin, account in zip( users, tins, accounts ):
+                email: str = f"{user}@test.com"
+
+                if serialized:
+                    yield template % { "email": email, "tin": tin, "account_number": account }
+                else:
+                    yield self.make_business( email, tin, account, routing_number )
+
+            produced += size
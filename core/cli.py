@@ -0,0 +1,301 @@
+import importlib
+import inspect
+import sys
+import logging
+from core.config import Config
+from core.metrics import metrics
+from core.batch_runner import BatchRunner
+from core.business_builder import BusinessBuilder
+from core.request_journal import RequestJournal
+from core.store import TransactionStore
+from core.webhook_server import WebhookServer
+from core.webhook_dispatcher import WebhookDispatcher
+from core.webhook_sync import WebhookSync
+from core.daemon import CommandDaemon
+from core.tenant_registry import TenantRegistry
+from core.refund_reconciler import RefundReconciler
+from core.status_tracker import StatusTracker
+from core.transaction_export import TransactionExport
+from core.backfill import TransactionBackfill
+from api.api_caller import ApiCaller
+from api.webhook_api import WebhookApi
+from api.business_api import BusinessApi
+from api.transaction_api import TransactionApi
+
+def get_log_level( level: str) -> int:
+    level_map: dict = {
+        'DEBUG': logging.DEBUG,
+        'INFO': logging.INFO,
+        'WARNING': logging.WARNING,
+        'ERROR': logging.ERROR
+    }
+
+    return level_map[ level.upper() ]
+
+def show_commands(actions):
+    for action, (func, param_count, param_desc) in actions.items():
+        if param_count == 0 and not param_desc:
+            print(f"  {action}")
+            continue
+
+        print(f"  {action} {param_desc} ")
+
+def parse_args( args: list ) -> tuple[list, dict]:
+    """
+    Splits command line arguments into positional params and --name value options.
+
+    :param args: The arguments following the action.
+    :return: tuple[list, dict]
+    """
+
+    params: list = []
+    options: dict = {}
+
+    index: int = 0
+    while index < len( args ):
+        arg: str = args[ index ]
+
+        if arg.startswith( "--" ):
+            name, separator, value = arg[ 2: ].partition( "=" )
+            if not separator and index + 1 < len( args ) and not args[ index + 1 ].startswith( "--" ):
+                index += 1
+                value = args[ index ]
+            options[ name.replace( "-", "_" ) ] = value
+        else:
+            params.append( arg )
+
+        index += 1
+
+    return params, options
+
+def pop_option( args: list, name: str ) -> tuple[str | None, list]:
+    """
+    Removes a --name value option from the arguments.
+
+    :param args:
+    :param name:
+    :return: The option value, or None when absent, and the remaining arguments.
+    """
+
+    remaining: list = list( args )
+
+    for index, arg in enumerate( remaining ):
+        if arg == f"--{name}" and index + 1 < len( remaining ):
+            value: str = remaining[ index + 1 ]
+            del remaining[ index:index + 2 ]
+            return value, remaining
+
+        if arg.startswith( f"--{name}=" ):
+            del remaining[ index ]
+            return arg.partition( "=" )[ 2 ], remaining
+
+    return None, remaining
+
+def unknown_options( func, param_count: int, options: dict ) -> list:
+    """
+    Returns the options an action does not accept: options naming none of its parameters,
+    or naming one of the param_count parameters already filled by positional params.
+
+    :param func: The action's function.
+    :param param_count: The number of positional params the action takes.
+    :param options: The --name value options.
+    :return: list
+    """
+
+    parameters: list = list( inspect.signature( func ).parameters.values() )
+
+    if any( parameter.kind == inspect.Parameter.VAR_KEYWORD for parameter in parameters ):
+        return []
+
+    accepted: set = {
+        parameter.name for parameter in parameters[ param_count: ]
+        if parameter.kind in ( inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY )
+    }
+
+    return [ name for name in options if name not in accepted ]
+
+def succeeded( func, result ) -> bool:
+    """
+    Returns whether an action succeeded. Like batch rows, an action fails when it returns None, False or an empty
+    string, except actions annotated to return None, which succeed by returning at all.
+
+    :param func: The action's function.
+    :param result: The value the action returned.
+    :return: bool
+    """
+
+    if result is None and inspect.signature( func ).return_annotation is None:
+        return True
+
+    return not ( result is None or result is False or result == "" )
+
+def build_actions(
+    config: Config,
+    logger: logging.Logger,
+    api_caller: ApiCaller,
+    store: TransactionStore | None = None,
+    journal: RequestJournal | None = None
+) -> dict:
+    webhook_api = WebhookApi( config, logger, api_caller )
+    business_api = BusinessApi( config, logger, api_caller, store )
+    transaction_api = TransactionApi( config, logger, api_caller, store, journal )
+
+    actions: dict = {
+        "webhook:register": ( webhook_api.register, 1, "{webhook_url} [--event_names A,B]" ),
+        "webhook:deregister": ( webhook_api.deregister, 1, "{webhook_url} [--event_names A,B]" ),
+        "webhook:fetch": ( webhook_api.fetch, 0, "" ),
+        "webhook:sync": ( WebhookSync( config, webhook_api, logger, config.HTTP_POOL_MAXSIZE ).run, 0, "[--dry_run] [--prune] [--workers N]" ),
+        "business:create": ( business_api.create, 0, "" ),
+        "transaction:create": ( transaction_api.create, 3, "{payer_uuid} {payee_uuid} {amount_in_cents}" ),
+        "transaction:create_mid": ( transaction_api.create_mid, 3, "{payer_uuid} {payee_mid} {amount_in_cents}" ),
+        "transaction:cancel": ( transaction_api.cancel, 1, "{transaction_uuid}" ),
+        "transaction:refund": ( transaction_api.refund, 2, "{transaction_uuid} {amount_in_cents}" ),
+        "transaction:fetch_refunds": ( transaction_api.fetch_refunds, 1, "{transaction_uuid}" ),
+        "transaction:fetch": ( transaction_api.fetch, 1, "{transaction_uuid}" ),
+        "transaction:reconcile_refunds": (
+            RefundReconciler( transaction_api, logger, config.HTTP_POOL_MAXSIZE ).run,
+            0,
+            "[--file uuids.txt] [--output report.jsonl] [--workers N] [--status status] [--start_date YYYY-MM-DD] [--end_date YYYY-MM-DD] [--limit N]"
+        ),
+        "transaction:track": (
+            StatusTracker( transaction_api, logger, config.HTTP_POOL_MAXSIZE ).run,
+            1,
+            "{file} [--output transitions.jsonl] [--workers N] [--min_interval seconds] [--max_interval seconds] [--timeout seconds]"
+        ),
+        "transaction:export": (
+            TransactionExport( transaction_api, logger ).export,
+            1,
+            "{output} [--format parquet|csv] [--report report.json] [--status status] [--start_date YYYY-MM-DD] [--end_date YYYY-MM-DD] [--limit N]"
+        ),
+        "transaction:backfill": (
+            TransactionBackfill( config, logger ).run,
+            3,
+            "{start_date} {end_date} {output} [--sink jsonl|sqlite|parquet|csv] [--days N] [--workers N] [--page_size N] [--status status] [--checkpoint dir]"
+        ),
+        "transaction:list": ( transaction_api.list, 0, "[--limit N] [--status status] [--start_date YYYY-MM-DD] [--end_date YYYY-MM-DD]" ),
+    }
+
+    def serve_webhooks( host: str | None = None, port: str | None = None, handlers: str | None = None ) -> None:
+        server: WebhookServer = WebhookServer( config, logger )
+
+        if handlers:
+            dispatcher: WebhookDispatcher = WebhookDispatcher( config, logger )
+            importlib.import_module( handlers ).register( dispatcher )
+            server.handler = dispatcher
+
+        server.run( host, port )
+
+    actions[ "webhook:serve" ] = ( serve_webhooks, 0, "[--host host] [--port port] [--handlers module]" )
+
+    def generate_businesses( count: str, seed: str | None = None, output: str | None = None ) -> int:
+        businesses = BusinessBuilder( config ).generate_many( int( count ), int( seed ) if seed else None, serialized = True )
+
+        out = open( output, "w" ) if output else sys.stdout
+        try:
+            for business in businesses:
+                out.write( business + "\n" )
+        finally:
+            if output:
+                out.close()
+
+        return int( count )
+
+    actions[ "business:generate" ] = ( generate_businesses, 1, "{count} [--seed N] [--output businesses.jsonl]" )
+
+    if store:
+        def sync_store( full: str | None = None ) -> int:
+            count: int = store.sync( transaction_api, full = full is not None )
+            logger.info( f"Mirrored transactions: {count}" )
+            return count
+
+        actions[ "store:sync" ] = ( sync_store, 0, "[--full]" )
+
+    batch_runner = BatchRunner( actions, logger, config.HTTP_POOL_MAXSIZE, journal, config.TENANT )
+    actions[ "batch" ] = ( batch_runner.run, 1, "{file} [--workers N] [--output results.jsonl]" )
+
+    return actions
+
+def run_action( actions: dict, args: list ) -> int:
+    """
+    Runs the action named by the first argument with the remaining arguments.
+
+    :param actions: The actions returned by build_actions.
+    :param args: The command line arguments, starting with the action.
+    :return: The exit code, 1 when the action failed or was called with unknown options.
+    """
+
+    if len( args ) < 1:
+        print( "Usage: python grailpay.py <action> [params]" )
+        print( "Actions:" )
+        show_commands( actions )
+
+        return 1
+
+    action = args[ 0 ]
+
+    if not action in actions:
+        print( f"Unknown action: {action}" )
+        return 1
+
+    func, param_count, param_desc = actions[ action ]
+    params, options = parse_args( args[ 1: ] )
+
+    if len( params ) != param_count:
+        print( f"Usage: python grailpay.py {action} {param_desc}" )
+        return 1
+
+    metrics_format: str | None = options.pop( "metrics", None )
+    unknown: list = unknown_options( func, param_count, options )
+
+    if unknown:
+        print( f"Unknown option for {action}: {', '.join( f'--{name}' for name in unknown )}" )
+        print( f"Usage: python grailpay.py {action} {param_desc}" )
+        return 1
+
+    try:
+        result = func( *params, **options )
+    finally:
+        if metrics_format is not None:
+            print( metrics.export( metrics_format or "json" ), file = sys.stderr )
+
+    return 0 if succeeded( func, result ) else 1
+
+def run( args: list ) -> int:
+    CONFIG_FILE: str = "config.yaml"
+
+    config: Config = Config( CONFIG_FILE )
+    logging.basicConfig( level = get_log_level( config.LOG_LEVEL ) )
+    logger = logging.getLogger( "GrailPay" )
+
+    stores: dict = {}
+    journals: dict = {}
+
+    def tenant_actions( tenant_config: Config, api_caller: ApiCaller ) -> dict:
+        # Each tenant keeps its own store and journal, reused when its client is evicted and created again.
+        if tenant_config.TENANT not in stores:
+            stores[ tenant_config.TENANT ] = TransactionStore.from_config( tenant_config )
+            journals[ tenant_config.TENANT ] = RequestJournal.from_config( tenant_config )
+
+        return build_actions( tenant_config, logger, api_caller, stores[ tenant_config.TENANT ], journals[ tenant_config.TENANT ] )
+
+    try:
+        with TenantRegistry( config, logger, tenant_actions ) as registry:
+
+            def run_command( command: list ) -> int:
+                tenant, command = pop_option( command, "tenant" )
+
+                if tenant is not None and tenant not in config.TENANTS:
+                    print( f"Unknown tenant: {tenant}" )
+                    return 1
+
+                with registry.acquire( tenant ) as client:
+                    return run_action( { **client.context, "serve": serve }, command )
+
+            daemon = CommandDaemon( run_command, logger )
+            serve: tuple = ( daemon.serve, 0, "[--socket grailpay.sock] [--stdin]" )
+
+            return run_command( args )
+    finally:
+        for resource in [ *stores.values(), *journals.values() ]:
+            if resource is not None:
+                resource.close()
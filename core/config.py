@@ -1,3 +1,4 @@
+import copy
 import yaml
 import os
 from datetime import datetime, time as dttime
@@ -11,6 +12,56 @@ class Config:
     KYB: bool = False
     ROUTING_NUMBER: str = ""
     LOG_LEVEL: str = "INFO"
+    BASE_URL: str = ""
+    HTTP_POOL_CONNECTIONS: int = 10
+    HTTP_POOL_MAXSIZE: int = 10
+    HTTP_TIMEOUT: float = 30.0
+    HTTP_MAX_CONCURRENCY: int = 100
+    HTTP_VERSION: str = "1.1"
+    HTTP_STREAM_LISTS: bool = False
+    STORE_PATH: str = ""
+    STORE_MAX_AGE: float = 300.0
+    TRANSPORT_MODE: str = "live"
+    TRANSPORT_ARCHIVE: str = "traffic.jsonl"
+    TRANSPORT_TIMING: bool = False
+    TRANSPORT_TIMING_SCALE: float = 1.0
+    RATE_LIMIT_RPS: float = 0.0
+    RATE_LIMIT_BURST: float = 0.0
+    RATE_LIMIT_CLASSES: dict = {}
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BACKOFF_BASE: float = 0.5
+    RETRY_BACKOFF_MAX: float = 30.0
+    CACHE_MAX_ENTRIES: int = 1024
+    CACHE_TTL: float = 0.0
+    CACHE_ENDPOINTS: dict = {}
+    HEDGING_ENABLED: bool = False
+    HEDGING_ENDPOINTS: list = [ "/api/v1/transaction/{id}", "/api/v1/transactions/{id}/refunds", "/api/v1/webhook" ]
+    HEDGING_MIN_SAMPLES: int = 20
+    HEDGING_MIN_DELAY: float = 0.05
+    CIRCUIT_BREAKER_ERROR_RATE: float = 0.0
+    CIRCUIT_BREAKER_MIN_CALLS: int = 20
+    CIRCUIT_BREAKER_WINDOW: float = 30.0
+    CIRCUIT_BREAKER_COOLDOWN: float = 10.0
+    JOURNAL_PATH: str = ""
+    JOURNAL_FSYNC: bool = True
+    WEBHOOK_SUBSCRIPTIONS: dict = {}
+    WEBHOOK_SUBSCRIPTIONS_PRUNE: bool = False
+    WEBHOOK_SUBSCRIPTIONS_BATCH_SIZE: int = 20
+    WEBHOOK_SERVER_HOST: str = "0.0.0.0"
+    WEBHOOK_SERVER_PORT: int = 8080
+    WEBHOOK_SERVER_QUEUE_SIZE: int = 10000
+    WEBHOOK_SERVER_WORKERS: int = 4
+    WEBHOOK_SERVER_DEDUPE_SIZE: int = 100000
+    WEBHOOK_SERVER_OUTPUT: str = "webhook_events.jsonl"
+    WEBHOOK_DISPATCHER_WORKERS: int = 16
+    WEBHOOK_DISPATCHER_QUEUE_SIZE: int = 1000
+    WEBHOOK_DISPATCHER_TIMEOUT: float = 30.0
+    WEBHOOK_DISPATCHER_DEAD_LETTERS: str = "webhook_dead_letters.jsonl"
+    TENANTS: dict = {}
+    TENANT: str | None = None
+    TENANT_MAX_CONCURRENCY: int = 200
+    TENANT_IDLE_TIMEOUT: float = 300.0
+    TENANT_MAX_CLIENTS: int = 100
 
     def __init__( self, file: str ) -> None:
         self.CONFIG_FILE = file
@@ -33,6 +84,130 @@ class Config:
             self.KYB = config[ "onboarding" ][ "kyb" ]
             self.ROUTING_NUMBER = config[ "routing_number" ]
             self.LOG_LEVEL = config[ "log_level" ]
+            self.BASE_URL = config.get( "base_url", self.BASE_URL )
+
+            http: dict = config.get( "http" ) or {}
+            self.HTTP_POOL_CONNECTIONS = int( http.get( "pool_connections", self.HTTP_POOL_CONNECTIONS ) )
+            self.HTTP_POOL_MAXSIZE = int( http.get( "pool_maxsize", self.HTTP_POOL_MAXSIZE ) )
+            self.HTTP_TIMEOUT = float( http.get( "timeout", self.HTTP_TIMEOUT ) )
+            self.HTTP_MAX_CONCURRENCY = int( http.get( "max_concurrency", self.HTTP_MAX_CONCURRENCY ) )
+            self.HTTP_VERSION = str( http.get( "version", self.HTTP_VERSION ) )
+            self.HTTP_STREAM_LISTS = bool( http.get( "stream_lists", self.HTTP_STREAM_LISTS ) )
+
+            transport: dict = config.get( "transport" ) or {}
+            self.TRANSPORT_MODE = transport.get( "mode", self.TRANSPORT_MODE )
+            self.TRANSPORT_ARCHIVE = transport.get( "archive", self.TRANSPORT_ARCHIVE )
+            self.TRANSPORT_TIMING = bool( transport.get( "timing", self.TRANSPORT_TIMING ) )
+            self.TRANSPORT_TIMING_SCALE = float( transport.get( "timing_scale", self.TRANSPORT_TIMING_SCALE ) )
+
+            rate_limit: dict = config.get( "rate_limit" ) or {}
+            self.RATE_LIMIT_RPS = float( rate_limit.get( "requests_per_second", self.RATE_LIMIT_RPS ) )
+            self.RATE_LIMIT_BURST = float( rate_limit.get( "burst", self.RATE_LIMIT_BURST ) )
+            self.RATE_LIMIT_CLASSES = rate_limit.get( "classes" ) or {}
+
+            retry: dict = config.get( "retry" ) or {}
+            self.RETRY_MAX_ATTEMPTS = int( retry.get( "max_attempts", self.RETRY_MAX_ATTEMPTS ) )
+            self.RETRY_BACKOFF_BASE = float( retry.get( "backoff_base", self.RETRY_BACKOFF_BASE ) )
+            self.RETRY_BACKOFF_MAX = float( retry.get( "backoff_max", self.RETRY_BACKOFF_MAX ) )
+
+            store: dict = config.get( "store" ) or {}
+            self.STORE_PATH = store.get( "path", self.STORE_PATH )
+            self.STORE_MAX_AGE = float( store.get( "max_age", self.STORE_MAX_AGE ) )
+
+            cache: dict = config.get( "cache" ) or {}
+            self.CACHE_MAX_ENTRIES = int( cache.get( "max_entries", self.CACHE_MAX_ENTRIES ) )
+            self.CACHE_TTL = float( cache.get( "ttl", self.CACHE_TTL ) )
+            self.CACHE_ENDPOINTS = cache.get( "endpoints" ) or self.CACHE_ENDPOINTS
+
+            hedging: dict = config.get( "hedging" ) or {}
+            self.HEDGING_ENABLED = bool( hedging.get( "enabled", self.HEDGING_ENABLED ) )
+            self.HEDGING_ENDPOINTS = hedging.get( "endpoints" ) or self.HEDGING_ENDPOINTS
+            self.HEDGING_MIN_SAMPLES = int( hedging.get( "min_samples", self.HEDGING_MIN_SAMPLES ) )
+            self.HEDGING_MIN_DELAY = float( hedging.get( "min_delay", self.HEDGING_MIN_DELAY ) )
+
+            circuit_breaker: dict = config.get( "circuit_breaker" ) or {}
+            self.CIRCUIT_BREAKER_ERROR_RATE = float( circuit_breaker.get( "error_rate", self.CIRCUIT_BREAKER_ERROR_RATE ) )
+            self.CIRCUIT_BREAKER_MIN_CALLS = int( circuit_breaker.get( "min_calls", self.CIRCUIT_BREAKER_MIN_CALLS ) )
+            self.CIRCUIT_BREAKER_WINDOW = float( circuit_breaker.get( "window", self.CIRCUIT_BREAKER_WINDOW ) )
+            self.CIRCUIT_BREAKER_COOLDOWN = float( circuit_breaker.get( "cooldown", self.CIRCUIT_BREAKER_COOLDOWN ) )
+
+            journal: dict = config.get( "journal" ) or {}
+            self.JOURNAL_PATH = journal.get( "path", self.JOURNAL_PATH )
+            self.JOURNAL_FSYNC = bool( journal.get( "fsync", self.JOURNAL_FSYNC ) )
+
+            webhook_subscriptions: dict = config.get( "webhook_subscriptions" ) or {}
+            self.WEBHOOK_SUBSCRIPTIONS = webhook_subscriptions.get( "urls" ) or self.WEBHOOK_SUBSCRIPTIONS
+            self.WEBHOOK_SUBSCRIPTIONS_PRUNE = bool( webhook_subscriptions.get( "prune", self.WEBHOOK_SUBSCRIPTIONS_PRUNE ) )
+            self.WEBHOOK_SUBSCRIPTIONS_BATCH_SIZE = int( webhook_subscriptions.get( "batch_size", self.WEBHOOK_SUBSCRIPTIONS_BATCH_SIZE ) )
+
+            webhook_server: dict = config.get( "webhook_server" ) or {}
+            self.WEBHOOK_SERVER_HOST = webhook_server.get( "host", self.WEBHOOK_SERVER_HOST )
+            self.WEBHOOK_SERVER_PORT = int( webhook_server.get( "port", self.WEBHOOK_SERVER_PORT ) )
+            self.WEBHOOK_SERVER_QUEUE_SIZE = int( webhook_server.get( "queue_size", self.WEBHOOK_SERVER_QUEUE_SIZE ) )
+            self.WEBHOOK_SERVER_WORKERS = int( webhook_server.get( "workers", self.WEBHOOK_SERVER_WORKERS ) )
+            self.WEBHOOK_SERVER_DEDUPE_SIZE = int( webhook_server.get( "dedupe_size", self.WEBHOOK_SERVER_DEDUPE_SIZE ) )
+            self.WEBHOOK_SERVER_OUTPUT = webhook_server.get( "output", self.WEBHOOK_SERVER_OUTPUT )
+
+            webhook_dispatcher: dict = config.get( "webhook_dispatcher" ) or {}
+            self.WEBHOOK_DISPATCHER_WORKERS = int( webhook_dispatcher.get( "workers", self.WEBHOOK_DISPATCHER_WORKERS ) )
+            self.WEBHOOK_DISPATCHER_QUEUE_SIZE = int( webhook_dispatcher.get( "queue_size", self.WEBHOOK_DISPATCHER_QUEUE_SIZE ) )
+            self.WEBHOOK_DISPATCHER_TIMEOUT = float( webhook_dispatcher.get( "timeout", self.WEBHOOK_DISPATCHER_TIMEOUT ) )
+            self.WEBHOOK_DISPATCHER_DEAD_LETTERS = webhook_dispatcher.get( "dead_letters", self.WEBHOOK_DISPATCHER_DEAD_LETTERS )
+
+            self.TENANTS = config.get( "tenants" ) or self.TENANTS
+
+            tenant_pool: dict = config.get( "tenant_pool" ) or {}
+            self.TENANT_MAX_CONCURRENCY = int( tenant_pool.get( "max_concurrency", self.TENANT_MAX_CONCURRENCY ) )
+            self.TENANT_IDLE_TIMEOUT = float( tenant_pool.get( "idle_timeout", self.TENANT_IDLE_TIMEOUT ) )
+            self.TENANT_MAX_CLIENTS = int( tenant_pool.get( "max_clients", self.TENANT_MAX_CLIENTS ) )
 
         except Exception as e:
             print( "Error loading config file. Key: " + str( e ) )
+
+    @staticmethod
+    def tenant_path( path: str, tenant: str ) -> str:
+        """
+        This method suffixes a file path with a tenant name, e.g. grailpay.db becomes grailpay.acme.db.
+
+        :param path:
+        :param tenant:
+        :return: str
+        """
+
+        if not path:
+            return path
+
+        root, extension = os.path.splitext( path )
+
+        return f"{root}.{tenant}{extension}"
+
+    def for_tenant( self, tenant: str ) -> 'Config':
+        """
+        This method returns a copy of the configuration with the keys, environment, base url and rate limit
+        of a profile from the tenants section. The store and journal paths are suffixed with the tenant name,
+        so tenants never see each other's mirrored transactions or journaled requests.
+
+        :param tenant: The name of the profile.
+        :return: Config
+        """
+
+        if tenant not in self.TENANTS:
+            raise ValueError( f"Unknown tenant: {tenant}" )
+
+        profile: dict = self.TENANTS[ tenant ] or {}
+        config: Config = copy.copy( self )
+
+        config.VENDOR_API_KEY = profile.get( "vendor_api_key", self.VENDOR_API_KEY )
+        config.PROCESSOR_API_KEY = profile.get( "processor_api_key", self.PROCESSOR_API_KEY )
+        config.ENVIRONMENT = profile.get( "environment", self.ENVIRONMENT )
+        config.BASE_URL = profile.get( "base_url", self.BASE_URL )
+        config.TENANT = tenant
+        config.STORE_PATH = self.tenant_path( self.STORE_PATH, tenant )
+        config.JOURNAL_PATH = self.tenant_path( self.JOURNAL_PATH, tenant )
+
+        rate_limit: dict = profile.get( "rate_limit" ) or {}
+        config.RATE_LIMIT_RPS = float( rate_limit.get( "requests_per_second", self.RATE_LIMIT_RPS ) )
+        config.RATE_LIMIT_BURST = float( rate_limit.get( "burst", self.RATE_LIMIT_BURST ) )
+        config.RATE_LIMIT_CLASSES = rate_limit.get( "classes" ) or self.RATE_LIMIT_CLASSES
+
+        return config
@@ -0,0 +1,257 @@
+import io
+import json
+import logging
+import os
+import shlex
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from typing import Callable
+
+DEFAULT_SOCKET: str = "grailpay.sock"
+
+# Short request/response commands. Everything else runs locally, so long-running commands keep streaming their output
+# and relative paths resolve against the caller's working directory.
+FORWARDED_ACTIONS: tuple = (
+    "webhook:register",
+    "webhook:deregister",
+    "webhook:fetch",
+    "business:create",
+    "transaction:create",
+    "transaction:create_mid",
+    "transaction:cancel",
+    "transaction:refund",
+    "transaction:fetch_refunds",
+    "transaction:fetch",
+    "transaction:list"
+)
+
+def socket_path() -> str:
+    return os.environ.get( "GRAILPAY_SOCKET", DEFAULT_SOCKET )
+
+def is_forwarded( args: list ) -> bool:
+    """
+    Returns whether the command is one of FORWARDED_ACTIONS, skipping a leading --tenant option.
+
+    :param args: The command line arguments, starting with the action.
+    :return: bool
+    """
+
+    actions: list = [
+        arg for index, arg in enumerate( args )
+        if not arg.startswith( "--" ) and not ( index and args[ index - 1 ] == "--tenant" )
+    ]
+
+    return bool( actions ) and actions[ 0 ] in FORWARDED_ACTIONS
+
+def forward( args: list, path: str | None = None ) -> int | None:
+    """
+    Sends a command to a running daemon and prints its output. Only FORWARDED_ACTIONS are sent.
+
+    Once connected, the command is never run locally as well: if the daemon fails before replying, the command
+    may already have run, so the error is reported instead of risking a second money-moving request.
+
+    :param args: The command line arguments, starting with the action.
+    :param path: The daemon socket. Defaults to $GRAILPAY_SOCKET or grailpay.sock.
+    :return: The command's exit code, or None when the command is not forwarded or no daemon is running.
+    """
+
+    if not is_forwarded( args ):
+        return None
+
+    path = path or socket_path()
+    if not hasattr( socket, "AF_UNIX" ) or not os.path.exists( path ):
+        return None
+
+    with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as connection:
+        try:
+            connection.connect( path )
+        except ( ConnectionError, FileNotFoundError ):
+            return None
+
+        try:
+            connection.sendall( json.dumps( { "args": args } ).encode() + b"\n" )
+
+            with connection.makefile( "r" ) as reader:
+                response: dict = json.loads( reader.readline() )
+        except ( OSError, ValueError ) as e:
+            print( f"The daemon on {path} failed before replying, the command may or may not have run: {e}", file = sys.stderr )
+            return 1
+
+    sys.stdout.write( response.get( "output", "" ) )
+    sys.stdout.flush()
+
+    return int( response.get( "exit_code", 1 ) )
+
+class ThreadOutput( io.TextIOBase ):
+    """
+    Stream that writes to the calling thread's capture buffer when one is set, and to the fallback stream otherwise.
+    """
+
+    def __init__( self, fallback, local: threading.local ) -> None:
+        self.fallback = fallback
+        self.local: threading.local = local
+
+    def write( self, text: str ) -> int:
+        buffer: io.StringIO | None = getattr( self.local, "buffer", None )
+        return ( buffer or self.fallback ).write( text )
+
+    def flush( self ) -> None:
+        self.fallback.flush()
+
+class ThreadLogHandler( logging.Handler ):
+    """
+    Copies log records emitted while a command runs into that command's capture buffer.
+    """
+
+    def __init__( self, local: threading.local ) -> None:
+        super().__init__()
+        self.local: threading.local = local
+        self.setFormatter( logging.Formatter( logging.BASIC_FORMAT ) )
+
+    def emit( self, record: logging.LogRecord ) -> None:
+        buffer: io.StringIO | None = getattr( self.local, "buffer", None )
+        if buffer is not None:
+            buffer.write( self.format( record ) + "\n" )
+
+class CommandDaemon:
+    """
+    Keeps the config, API objects and connection pool resident and runs commands sent over a Unix socket or stdin.
+
+    Each command's printed output and log lines are captured and returned to the client that sent it.
+    """
+
+    def __init__( self, runner: Callable[[list], int], logger: logging.Logger ) -> None:
+        self.runner: Callable[[list], int] = runner
+        self.logger: logging.Logger = logger
+        self.local: threading.local = threading.local()
+
+    def execute( self, args: list ) -> dict:
+        """
+        This method runs one command and returns its exit code and captured output.
+
+        :param args: The command line arguments, starting with the action.
+        :return: dict
+        """
+
+        if args and args[ 0 ] == "serve":
+            return { "exit_code": 1, "output": "The daemon is already running.\n" }
+
+        self.local.buffer = io.StringIO()
+
+        try:
+            exit_code: int = self.runner( args )
+        except SystemExit as e:
+            exit_code = e.code if isinstance( e.code, int ) else 1
+        except Exception as e:
+            self.logger.exception( f"Command failed: {args}" )
+            self.local.buffer.write( f"Error: {e}\n" )
+            exit_code = 1
+        finally:
+            output: str = self.local.buffer.getvalue()
+            self.local.buffer = None
+
+        return { "exit_code": exit_code, "output": output }
+
+    def respond( self, line: str, command_lines: bool = False ) -> dict:
+        """
+        This method runs the command sent on one request line. A line that is not a valid command is answered
+        with an error instead of ending the connection.
+
+        :param line: A JSON request with an args list.
+        :param command_lines: Also accept a plain command line.
+        :return: dict
+        """
+
+        try:
+            args = shlex.split( line ) if command_lines and not line.startswith( "{" ) else json.loads( line )[ "args" ]
+        except ( ValueError, KeyError, TypeError ) as e:
+            return { "exit_code": 1, "output": f"Malformed command: {e}\n" }
+
+        if not isinstance( args, list ) or not all( isinstance( arg, str ) for arg in args ):
+            return { "exit_code": 1, "output": "Malformed command: args must be a list of strings.\n" }
+
+        return self.execute( args )
+
+    def install_capture( self ) -> None:
+        sys.stdout = ThreadOutput( sys.stdout, self.local )
+        sys.stderr = ThreadOutput( sys.stderr, self.local )
+        logging.getLogger().addHandler( ThreadLogHandler( self.local ) )
+
+    def serve( self, socket: str | None = None, stdin: str | None = None ) -> None:
+        """
+        This method runs the daemon until interrupted.
+
+        :param socket: The Unix socket to listen on. Defaults to $GRAILPAY_SOCKET or grailpay.sock.
+        :param stdin: Read commands from stdin instead, one per line, either as JSON or as a command line.
+        :return:
+        """
+
+        if stdin is not None:
+            self.serve_stdin()
+            return
+
+        self.serve_socket( socket or socket_path() )
+
+    def serve_stdin( self ) -> None:
+        output = sys.stdout
+        self.install_capture()
+
+        for line in sys.stdin:
+            line = line.strip()
+            if not line:
+                continue
+
+            output.write( json.dumps( self.respond( line, command_lines = True ) ) + "\n" )
+            output.flush()
+
+    def serve_socket( self, path: str ) -> None:
+        if os.path.exists( path ):
+            if is_listening( path ):
+                raise RuntimeError( f"A daemon is already listening on {path}" )
+            os.unlink( path )
+
+        daemon: CommandDaemon = self
+
+        class Handler( socketserver.StreamRequestHandler ):
+            def handle( self ) -> None:
+                for line in self.rfile:
+                    self.wfile.write( json.dumps( daemon.respond( line.decode( errors = "replace" ).strip() ) ).encode() + b"\n" )
+                    self.wfile.flush()
+
+        class Server( socketserver.ThreadingMixIn, socketserver.UnixStreamServer ):
+            daemon_threads: bool = True
+
+        def stop( signum, frame ) -> None:
+            raise KeyboardInterrupt
+
+        signal.signal( signal.SIGTERM, stop )
+        self.install_capture()
+
+        with Server( path, Handler ) as server:
+            os.chmod( path, 0o600 )
+            self.logger.info( f"Daemon listening on {path}" )
+
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                self.logger.info( "Daemon stopped" )
+            finally:
+                os.unlink( path )
+
+def is_listening( path: str ) -> bool:
+    """
+    Returns whether something is accepting connections on the socket.
+
+    :param path:
+    :return: bool
+    """
+
+    try:
+        with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as connection:
+            connection.connect( path )
+        return True
+    except OSError:
+        return False
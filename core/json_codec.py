@@ -0,0 +1,41 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    BACKEND: str = "orjson"
+    loads = orjson.loads
+elif msgspec is not None:
+    BACKEND: str = "msgspec"
+    loads = msgspec.json.Decoder().decode
+else:
+    BACKEND: str = "json"
+    loads = json.loads
+
+def decode_response( response ) -> Any:
+    """
+    Decodes a response body as JSON once, using the fastest available backend, and caches the result on the response.
+
+    :param response: A requests or httpx response.
+    :return: Any
+    """
+
+    try:
+        return response.grailpay_json
+    except AttributeError:
+        pass
+
+    content: bytes = response.content
+    decoded: Any = loads( content ) if content else None
+    response.grailpay_json = decoded
+
+    return decoded
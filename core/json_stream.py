@@ -0,0 +1,162 @@
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+TOKEN = re.compile( r'[\[\]{}",]' )
+STRING_END = re.compile( r'[^"\\]*(?:\\.[^"\\]*)*"' )
+
+class JsonArrayStream:
+    """
+    Incremental parser yielding the items of one array inside a JSON document as its bytes arrive,
+    e.g. data.transactions of a transaction list page.
+
+    Only the item being parsed is buffered, and each item is decoded by the C scanner of the json module.
+    Everything outside the array is kept, with the array emptied, and decoded by close(), so fields such as
+    pagination are available once the stream ends.
+    """
+
+    def __init__( self, path: tuple ) -> None:
+        self.path: tuple = path
+        self.text = codecs.getincrementaldecoder( "utf-8" )()
+        self.decoder: json.JSONDecoder = json.JSONDecoder()
+        self.buffer: str = ""
+        self.position: int = 0
+        self.frames: list = []
+        self.skeleton: list = []
+        self.copy_from: int | None = 0
+        self.target_depth: int | None = None
+        self.item_start: int | None = None
+
+    def feed( self, data: bytes ) -> list:
+        """
+        This method parses the next chunk of the document.
+
+        :param data:
+        :return: The array items completed by this chunk.
+        """
+
+        self.buffer += self.text.decode( data )
+        items: list = []
+
+        while self.scan_item( items ) if self.item_start is not None else self.scan():
+            pass
+
+        self.compact()
+
+        return items
+
+    def scan( self ) -> bool:
+        buffer: str = self.buffer
+        match = TOKEN.search( buffer, self.position )
+
+        if match is None:
+            self.position = len( buffer )
+            return False
+
+        index: int = match.start()
+        char: str = buffer[ index ]
+        frame: list | None = self.frames[ -1 ] if self.frames else None
+
+        if char == '"':
+            end = STRING_END.match( buffer, index + 1 )
+            if end is None:
+                self.position = index
+                return False
+            if frame is not None and frame[ 0 ] == "object" and frame[ 2 ]:
+                frame[ 3 ] = json.loads( buffer[ index:end.end() ] )
+                frame[ 2 ] = False
+            self.position = end.end()
+            return True
+
+        if char in "{[":
+            if self.target_depth is not None and len( self.frames ) == self.target_depth:
+                self.item_start = index
+                return True
+
+            if frame is None:
+                path: tuple = ()
+            else:
+                path = frame[ 1 ] + ( frame[ 3 ] if frame[ 0 ] == "object" else None, )
+
+            self.frames.append( [ "object" if char == "{" else "array", path, True, None ] )
+
+            if char == "[" and path == self.path and self.target_depth is None:
+                self.target_depth = len( self.frames )
+                self.skeleton.append( buffer[ self.copy_from:index + 1 ] )
+                self.copy_from = None
+        elif char in "}]":
+            if self.target_depth is not None and len( self.frames ) == self.target_depth:
+                self.target_depth = -1
+                self.copy_from = index
+            self.frames.pop()
+        elif frame is not None and frame[ 0 ] == "object":
+            frame[ 2 ] = True
+
+        self.position = index + 1
+        return True
+
+    def scan_item( self, items: list ) -> bool:
+        try:
+            item, end = self.decoder.raw_decode( self.buffer, self.item_start )
+        except json.JSONDecodeError:
+            return False
+
+        items.append( item )
+        self.position = end
+        self.item_start = None
+
+        return True
+
+    def compact( self ) -> None:
+        if self.copy_from is not None:
+            self.skeleton.append( self.buffer[ self.copy_from:self.position ] )
+            self.copy_from = self.position
+
+        keep: int = self.item_start if self.item_start is not None else self.position
+        if keep:
+            self.buffer = self.buffer[ keep: ]
+            self.position -= keep
+            if self.item_start is not None:
+                self.item_start -= keep
+            if self.copy_from is not None:
+                self.copy_from -= keep
+
+    def close( self ) -> Any:
+        """
+        This method returns the rest of the document, with the streamed array left empty.
+        A ValueError is raised when the document ended inside an item.
+
+        :return: Any
+        """
+
+        self.buffer += self.text.decode( b"", final = True )
+
+        if self.item_start is not None:
+            self.decoder.raw_decode( self.buffer, self.item_start )
+
+        if self.copy_from is not None:
+            self.skeleton.append( self.buffer[ self.copy_from: ] )
+
+        document: str = "".join( self.skeleton )
+
+        return json.loads( document ) if document.strip() else None
+
+def iter_json_array( chunks: Iterable[bytes], path: tuple, rest: dict | None = None ) -> Iterator[Any]:
+    """
+    Yields the items of the array at path as chunks of the document arrive.
+
+    :param chunks: The document bytes, e.g. response.iter_content( 65536 ).
+    :param path: The keys leading to the array, e.g. ( "data", "transactions" ).
+    :param rest: When given, filled with the rest of the document once the stream ends.
+    :return: Iterator[Any]
+    """
+
+    stream: JsonArrayStream = JsonArrayStream( path )
+
+    for chunk in chunks:
+        yield from stream.feed( chunk )
+
+    document = stream.close()
+    if rest is not None and isinstance( document, dict ):
+        rest.update( document )
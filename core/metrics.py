@@ -0,0 +1,299 @@
+import bisect
+import json
+import re
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+class Histogram:
+    """
+    Latency histogram with log-spaced buckets from 0.5ms to about a minute.
+    Percentiles are interpolated within a bucket, which keeps them within a few percent of the exact value.
+    """
+
+    BOUNDS: tuple = tuple( 0.0005 * 1.2 ** i for i in range( 66 ) )
+
+    __slots__ = ( "counts", "total", "sum" )
+
+    def __init__( self ) -> None:
+        self.counts: list = [ 0 ] * ( len( self.BOUNDS ) + 1 )
+        self.total: int = 0
+        self.sum: float = 0.0
+
+    def observe( self, seconds: float ) -> None:
+        self.counts[ bisect.bisect_left( self.BOUNDS, seconds ) ] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def merge( self, other: 'Histogram' ) -> None:
+        for index, count in enumerate( other.counts ):
+            self.counts[ index ] += count
+        self.total += other.total
+        self.sum += other.sum
+
+    def percentile( self, p: float ) -> float:
+        if not self.total:
+            return 0.0
+
+        rank: float = p * self.total
+        seen: int = 0
+
+        for index, count in enumerate( self.counts ):
+            if count and seen + count >= rank:
+                lower: float = self.BOUNDS[ index - 1 ] if index > 0 else 0.0
+                upper: float = self.BOUNDS[ index ] if index < len( self.BOUNDS ) else lower * 1.2
+                return lower + ( upper - lower ) * ( rank - seen ) / count
+            seen += count
+
+        return self.BOUNDS[ -1 ]
+
+class EndpointStats:
+
+    __slots__ = ( "latency", "server_latency", "status_codes", "bytes_sent", "bytes_received", "retries", "cache_hits", "hedges", "stale" )
+
+    def __init__( self ) -> None:
+        self.latency: Histogram = Histogram()
+        self.server_latency: Histogram = Histogram()
+        self.status_codes: dict = {}
+        self.bytes_sent: int = 0
+        self.bytes_received: int = 0
+        self.retries: int = 0
+        self.cache_hits: int = 0
+        self.hedges: int = 0
+        self.stale: int = 0
+
+    def merge( self, other: 'EndpointStats' ) -> None:
+        self.latency.merge( other.latency )
+        self.server_latency.merge( other.server_latency )
+        for status, count in other.status_codes.items():
+            self.status_codes[ status ] = self.status_codes.get( status, 0 ) + count
+        self.bytes_sent += other.bytes_sent
+        self.bytes_received += other.bytes_received
+        self.retries += other.retries
+        self.cache_hits += other.cache_hits
+        self.hedges += other.hedges
+        self.stale += other.stale
+
+class ShardHolder:
+    """
+    Holds a thread's shard in its thread-local storage. It is freed when the thread exits, which folds the shard
+    into the merged base.
+    """
+
+    __slots__ = ( "shard", "__weakref__" )
+
+    def __init__( self, shard: dict ) -> None:
+        self.shard: dict = shard
+
+class Metrics:
+    """
+    Per-endpoint call metrics.
+
+    Each thread records into its own shard, so recording never takes a lock. Shards are merged when the
+    metrics are exported. Asyncio callers share their event loop thread's shard. The shard of a thread that
+    exited is folded into a merged base, so short-lived threads do not leave shards behind.
+    """
+
+    ID_SEGMENT = re.compile( r"^(?:[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}|[0-9]+|[0-9a-zA-Z_-]{20,})$" )
+
+    def __init__( self ) -> None:
+        self.local: threading.local = threading.local()
+        self.shards: list = []
+        self.shards_lock: threading.Lock = threading.Lock()
+        self.base: dict = {}
+
+    def shard( self ) -> dict:
+        holder: ShardHolder | None = getattr( self.local, "holder", None )
+
+        if holder is None:
+            holder = ShardHolder( {} )
+            self.local.holder = holder
+            with self.shards_lock:
+                self.shards.append( holder.shard )
+            weakref.finalize( holder, self.retire, holder.shard )
+
+        return holder.shard
+
+    def retire( self, shard: dict ) -> None:
+        """
+        This method folds the shard of a thread that exited into the merged base.
+
+        :param shard:
+        :return:
+        """
+
+        with self.shards_lock:
+            for endpoint, stats in shard.items():
+                self.base.setdefault( endpoint, EndpointStats() ).merge( stats )
+            self.shards = [ other for other in self.shards if other is not shard ]
+
+    @classmethod
+    def endpoint_key( cls, method: str, url: str ) -> str:
+        """
+        This method returns the endpoint a call belongs to, with ids in the path replaced by a placeholder.
+
+        :param method:
+        :param url:
+        :return: str
+        """
+
+        segments: list = [
+            "{id}" if cls.ID_SEGMENT.match( segment ) else segment
+            for segment in urlsplit( url ).path.split( "/" )
+        ]
+
+        return f"{method.upper()} {'/'.join( segments )}"
+
+    def stats( self, endpoint: str ) -> EndpointStats:
+        shard: dict = self.shard()
+        stats: EndpointStats | None = shard.get( endpoint )
+
+        if stats is None:
+            stats = shard[ endpoint ] = EndpointStats()
+
+        return stats
+
+    def record(
+        self,
+        method: str,
+        url: str,
+        status: int | str,
+        seconds: float,
+        server_seconds: float | None = None,
+        bytes_sent: int = 0,
+        bytes_received: int = 0
+    ) -> None:
+        stats: EndpointStats = self.stats( self.endpoint_key( method, url ) )
+        stats.latency.observe( seconds )
+        if server_seconds is not None:
+            stats.server_latency.observe( server_seconds )
+        stats.status_codes[ status ] = stats.status_codes.get( status, 0 ) + 1
+        stats.bytes_sent += bytes_sent
+        stats.bytes_received += bytes_received
+
+    def record_retry( self, method: str, url: str ) -> None:
+        self.stats( self.endpoint_key( method, url ) ).retries += 1
+
+    def record_cache_hit( self, method: str, url: str ) -> None:
+        self.stats( self.endpoint_key( method, url ) ).cache_hits += 1
+
+    def record_hedge( self, method: str, url: str ) -> None:
+        self.stats( self.endpoint_key( method, url ) ).hedges += 1
+
+    def record_stale( self, method: str, url: str ) -> None:
+        self.stats( self.endpoint_key( method, url ) ).stale += 1
+
+    def snapshot( self ) -> dict:
+        """
+        This method merges every thread's shard into one EndpointStats per endpoint.
+
+        :return: dict
+        """
+
+        merged: dict = {}
+
+        with self.shards_lock:
+            shards: list = list( self.shards )
+            for endpoint, stats in self.base.items():
+                merged.setdefault( endpoint, EndpointStats() ).merge( stats )
+
+        for shard in shards:
+            for endpoint, stats in list( shard.items() ):
+                merged.setdefault( endpoint, EndpointStats() ).merge( stats )
+
+        return merged
+
+    def percentiles( self, endpoint: str ) -> dict:
+        stats: EndpointStats | None = self.snapshot().get( endpoint )
+        if stats is None:
+            return {}
+
+        return { p: stats.latency.percentile( p ) for p in ( 0.50, 0.95, 0.99 ) }
+
+    def to_dict( self ) -> dict:
+        result: dict = {}
+
+        for endpoint, stats in sorted( self.snapshot().items() ):
+            result[ endpoint ] = {
+                "count": stats.latency.total,
+                "status_codes": { str( status ): count for status, count in stats.status_codes.items() },
+                "latency_ms": {
+                    "mean": round( stats.latency.sum / stats.latency.total * 1000, 3 ) if stats.latency.total else 0.0,
+                    "p50": round( stats.latency.percentile( 0.50 ) * 1000, 3 ),
+                    "p95": round( stats.latency.percentile( 0.95 ) * 1000, 3 ),
+                    "p99": round( stats.latency.percentile( 0.99 ) * 1000, 3 )
+                },
+                "server_latency_ms": {
+                    "p50": round( stats.server_latency.percentile( 0.50 ) * 1000, 3 ),
+                    "p95": round( stats.server_latency.percentile( 0.95 ) * 1000, 3 ),
+                    "p99": round( stats.server_latency.percentile( 0.99 ) * 1000, 3 )
+                },
+                "bytes_sent": stats.bytes_sent,
+                "bytes_received": stats.bytes_received,
+                "retries": stats.retries,
+                "cache_hits": stats.cache_hits,
+                "hedges": stats.hedges,
+                "stale": stats.stale
+            }
+
+        return result
+
+    def to_json( self ) -> str:
+        return json.dumps( self.to_dict(), indent = 4 )
+
+    def to_prometheus( self ) -> str:
+        families: dict = {
+            "grailpay_request_duration_seconds": ( "histogram", [] ),
+            "grailpay_requests_total": ( "counter", [] ),
+            "grailpay_request_bytes_sent_total": ( "counter", [] ),
+            "grailpay_request_bytes_received_total": ( "counter", [] ),
+            "grailpay_request_retries_total": ( "counter", [] ),
+            "grailpay_cache_hits_total": ( "counter", [] ),
+            "grailpay_request_hedges_total": ( "counter", [] ),
+            "grailpay_stale_responses_total": ( "counter", [] )
+        }
+
+        for endpoint, stats in sorted( self.snapshot().items() ):
+            method, path = endpoint.split( " ", 1 )
+            labels: str = f'method="{method}",endpoint="{path}"'
+
+            duration: list = families[ "grailpay_request_duration_seconds" ][ 1 ]
+            cumulative: int = 0
+            for bound, count in zip( Histogram.BOUNDS, stats.latency.counts ):
+                cumulative += count
+                duration.append( f'grailpay_request_duration_seconds_bucket{{{labels},le="{bound:.6g}"}} {cumulative}' )
+            duration.append( f'grailpay_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.latency.total}' )
+            duration.append( f"grailpay_request_duration_seconds_sum{{{labels}}} {stats.latency.sum:.6f}" )
+            duration.append( f"grailpay_request_duration_seconds_count{{{labels}}} {stats.latency.total}" )
+
+            for status, count in sorted( stats.status_codes.items(), key = lambda item: str( item[ 0 ] ) ):
+                families[ "grailpay_requests_total" ][ 1 ].append( f'grailpay_requests_total{{{labels},status="{status}"}} {count}' )
+
+            families[ "grailpay_request_bytes_sent_total" ][ 1 ].append( f"grailpay_request_bytes_sent_total{{{labels}}} {stats.bytes_sent}" )
+            families[ "grailpay_request_bytes_received_total" ][ 1 ].append( f"grailpay_request_bytes_received_total{{{labels}}} {stats.bytes_received}" )
+            families[ "grailpay_request_retries_total" ][ 1 ].append( f"grailpay_request_retries_total{{{labels}}} {stats.retries}" )
+            families[ "grailpay_cache_hits_total" ][ 1 ].append( f"grailpay_cache_hits_total{{{labels}}} {stats.cache_hits}" )
+            families[ "grailpay_request_hedges_total" ][ 1 ].append( f"grailpay_request_hedges_total{{{labels}}} {stats.hedges}" )
+            families[ "grailpay_stale_responses_total" ][ 1 ].append( f"grailpay_stale_responses_total{{{labels}}} {stats.stale}" )
+
+        lines: list = []
+        for name, ( kind, samples ) in families.items():
+            lines.append( f"# TYPE {name} {kind}" )
+            lines += samples
+
+        return "\n".join( lines ) + "\n"
+
+    def export( self, format: str = "json" ) -> str:
+        """
+        This method exports the metrics as JSON or Prometheus text.
+
+        :param format: json or prometheus
+        :return: str
+        """
+
+        if format == "prometheus":
+            return self.to_prometheus()
+
+        return self.to_json()
+
+metrics: Metrics = Metrics()
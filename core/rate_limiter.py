@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from core.config import Config
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with additive-increase / multiplicative-decrease of its rate.
+
+    A rate of 0 leaves the bucket unlimited, though Retry-After pauses are still honored.
+    """
+
+    def __init__( self, rate: float, burst: float ) -> None:
+        self.max_rate: float = rate
+        self.rate: float = rate
+        self.burst: float = max( burst, 1.0 )
+        self.tokens: float = self.burst
+        self.updated: float = time.monotonic()
+        self.blocked_until: float = 0.0
+        self.lock: threading.Lock = threading.Lock()
+
+    def reserve( self ) -> float:
+        """
+        This method takes a token and returns how many seconds the caller must wait before sending.
+
+        :return: float
+        """
+
+        with self.lock:
+            now: float = time.monotonic()
+            wait: float = max( 0.0, self.blocked_until - now )
+
+            if self.rate <= 0:
+                return wait
+
+            self.tokens = min( self.burst, self.tokens + ( now - self.updated ) * self.rate )
+            self.updated = now
+            self.tokens -= 1
+
+            if self.tokens < 0:
+                wait = max( wait, -self.tokens / self.rate )
+
+            return wait
+
+    def throttled( self, retry_after: float | None ) -> None:
+        """
+        This method halves the rate and pauses the bucket after the server signalled throttling.
+
+        :param retry_after: The number of seconds the server asked to wait, if any.
+        :return:
+        """
+
+        with self.lock:
+            if self.rate > 0:
+                self.rate = max( self.max_rate / 20, self.rate / 2 )
+
+            if retry_after:
+                self.blocked_until = max( self.blocked_until, time.monotonic() + retry_after )
+
+    def succeeded( self ) -> None:
+        with self.lock:
+            if 0 < self.rate < self.max_rate:
+                self.rate = min( self.max_rate, self.rate + self.max_rate / 20 )
+
+class RateLimiter:
+    """
+    Client-side rate limiter with one token bucket per endpoint class, e.g. transaction:write or webhook:read.
+    """
+
+    THROTTLE_STATUS_CODES: tuple = ( 429, 503 )
+    VERSION_SEGMENT = re.compile( r"^v[0-9]+$" )
+
+    def __init__( self, config: Config ) -> None:
+        self.config: Config = config
+        self.buckets: dict = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def endpoint_class( cls, method: str, url: str ) -> str:
+        """
+        This method returns the class an endpoint belongs to, e.g. transaction:write for POST /api/v1/transaction.
+
+        :param method:
+        :param url:
+        :return: str
+        """
+
+        segments: list = [ segment for segment in urlsplit( url ).path.split( "/" ) if segment ]
+        resource: str = "other"
+
+        for index, segment in enumerate( segments ):
+            if cls.VERSION_SEGMENT.match( segment ) and index + 1 < len( segments ):
+                resource = segments[ index + 1 ]
+                break
+
+        resource = { "transactions": "transaction", "businesses": "business" }.get( resource, resource )
+        access: str = "read" if method.upper() == "GET" else "write"
+
+        return f"{resource}:{access}"
+
+    def bucket( self, method: str, url: str ) -> TokenBucket:
+        endpoint_class: str = self.endpoint_class( method, url )
+        bucket: TokenBucket | None = self.buckets.get( endpoint_class )
+
+        if bucket is None:
+            with self.lock:
+                bucket = self.buckets.get( endpoint_class )
+                if bucket is None:
+                    rate: float = float( self.config.RATE_LIMIT_CLASSES.get( endpoint_class, self.config.RATE_LIMIT_RPS ) )
+                    bucket = self.buckets[ endpoint_class ] = TokenBucket( rate, self.config.RATE_LIMIT_BURST or rate )
+
+        return bucket
+
+    def reserve( self, method: str, url: str ) -> float:
+        return self.bucket( method, url ).reserve()
+
+    @staticmethod
+    def retry_after( headers ) -> float | None:
+        """
+        This method parses a Retry-After header given either in seconds or as an HTTP date.
+
+        :param headers:
+        :return: float | None
+        """
+
+        value: str | None = headers.get( "Retry-After" ) if headers else None
+        if not value:
+            return None
+
+        try:
+            return max( 0.0, float( value ) )
+        except ValueError:
+            pass
+
+        try:
+            return max( 0.0, parsedate_to_datetime( value ).timestamp() - time.time() )
+        except ( TypeError, ValueError ):
+            return None
+
+    def observe( self, method: str, url: str, response ) -> None:
+        """
+        This method adapts the endpoint class's rate to a response.
+
+        :param method:
+        :param url:
+        :param response:
+        :return:
+        """
+
+        bucket: TokenBucket = self.bucket( method, url )
+
+        if response.status_code in self.THROTTLE_STATUS_CODES:
+            bucket.throttled( self.retry_after( response.headers ) )
+        elif response.status_code < 500:
+            bucket.succeeded()
@@ -0,0 +1,173 @@
+import json
+import logging
+import sys
+from typing import Any, Iterator, TextIO
+
+from core.bounded_pool import map_unordered
+from dto import RefundRecord
+
+class RefundReconciler:
+    """
+    Fetches many transactions and their refunds concurrently and reports, per transaction, the refunded
+    and remaining refundable amounts along with any mismatches.
+    """
+
+    FAILED_REFUND_STATUSES: tuple = ( "failed", "canceled", "cancelled", "rejected", "returned" )
+
+    def __init__( self, transaction_api: Any, logger: logging.Logger, workers: int = 10 ) -> None:
+        self.transaction_api = transaction_api
+        self.logger: logging.Logger = logger
+        self.workers: int = workers
+
+    @staticmethod
+    def read_uuids( file: str ) -> Iterator[str]:
+        """
+        This method streams transaction uuids from a file with one uuid per line, or from JSONL rows with a uuid field
+        such as the results written by batch.
+
+        :param file:
+        :return: Iterator[str]
+        """
+
+        with open( file, "r" ) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+
+                if line.startswith( "{" ):
+                    uuid = json.loads( line ).get( "uuid" )
+                    if uuid:
+                        yield uuid
+                    continue
+
+                yield line
+
+    def reconcile( self, transaction_uuid: str, transaction: dict | None = None ) -> dict:
+        """
+        This method reconciles the refunds of one transaction.
+
+        :param transaction_uuid:
+        :param transaction: The transaction, when already known. It is fetched otherwise.
+        :return: dict
+        """
+
+        result: dict = {
+            "transaction_uuid": transaction_uuid,
+            "status": "error",
+            "amount": None,
+            "refunded": 0,
+            "pending": 0,
+            "remaining": None,
+            "refund_count": 0,
+            "issues": []
+        }
+
+        try:
+            if transaction is None:
+                transaction = self.transaction_api.get( transaction_uuid )
+            refunds: list | None = self.transaction_api.get_refunds( transaction_uuid )
+        except Exception as e:
+            result[ "issues" ].append( f"request failed: {e}" )
+            return result
+
+        if transaction is None:
+            result[ "issues" ].append( "transaction not found" )
+            return result
+
+        if refunds is None:
+            result[ "issues" ].append( "refunds could not be fetched" )
+            return result
+
+        amount: int = int( transaction.get( "amount" ) or 0 )
+        refunded: int = 0
+        pending: int = 0
+
+        for refund in map( RefundRecord.from_dict, refunds ):
+            status: str = str( refund.status or "" ).lower()
+            if status in self.FAILED_REFUND_STATUSES:
+                continue
+
+            refunded += int( refund.amount )
+            if "pending" in status:
+                pending += int( refund.amount )
+
+            if refund.transaction_uuid not in ( None, transaction_uuid ):
+                result[ "issues" ].append( f"refund {refund.uuid} belongs to {refund.transaction_uuid}" )
+
+        if refunded > amount:
+            result[ "issues" ].append( "refunded amount exceeds the transaction amount" )
+
+        reported = transaction.get( "refunded_amount" )
+        if reported is not None and int( reported ) != refunded:
+            result[ "issues" ].append( f"transaction reports {reported} refunded" )
+
+        result.update( {
+            "status": "mismatch" if result[ "issues" ] else "ok",
+            "amount": amount,
+            "refunded": refunded,
+            "pending": pending,
+            "remaining": amount - refunded,
+            "refund_count": len( refunds )
+        } )
+
+        return result
+
+    def run(
+        self,
+        file: str | None = None,
+        output: str | None = None,
+        workers: int | str | None = None,
+        status: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        limit: int | str | None = None
+    ) -> dict:
+        """
+        This method reconciles the transactions listed in a file, or those returned by a list query,
+        writing one JSON line per transaction as soon as it is reconciled.
+
+        :param file: A file of transaction uuids. When omitted, transactions are read from the list query.
+        :param output: The path of the report. The report is written to stdout when omitted.
+        :param workers: The number of transactions reconciled concurrently.
+        :param status: List query filter.
+        :param start_date: List query filter.
+        :param end_date: List query filter.
+        :param limit: The maximum number of transactions from the list query.
+        :return: dict
+        """
+
+        if file:
+            items: Iterator = ( ( uuid, None ) for uuid in self.read_uuids( file ) )
+        else:
+            transactions: Iterator[dict] = self.transaction_api.iter_transactions(
+                status = status,
+                start_date = start_date,
+                end_date = end_date,
+                limit = int( limit ) if limit is not None else None
+            )
+            items = ( ( transaction[ "uuid" ], transaction ) for transaction in transactions )
+
+        summary: dict = { "ok": 0, "mismatch": 0, "error": 0, "amount": 0, "refunded": 0, "remaining": 0 }
+        out: TextIO = open( output, "w" ) if output else sys.stdout
+
+        try:
+            for result in map_unordered( self.reconcile, items, int( workers ) if workers else self.workers ):
+                summary[ result[ "status" ] ] += 1
+                if result[ "amount" ] is not None:
+                    summary[ "amount" ] += result[ "amount" ]
+                    summary[ "refunded" ] += result[ "refunded" ]
+                    summary[ "remaining" ] += result[ "remaining" ]
+
+                out.write( json.dumps( result ) + "\n" )
+                out.flush()
+        finally:
+            if output:
+                out.close()
+
+        self.logger.info(
+            f"Reconciled: {summary['ok']} Mismatches: {summary['mismatch']} Errors: {summary['error']} "
+            f"Refunded: {summary['refunded']} Remaining: {summary['remaining']}"
+        )
+
+        return summary
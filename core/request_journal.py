@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from typing import Any
+
+from core.config import Config
+from core.json_codec import decode_response
+
+class RequestJournal:
+    """
+    Append-only write-ahead journal for money-moving calls.
+
+    An intent line is written and synced to disk before a request is sent, and an outcome line after its
+    response arrives. A request with an intent but no successful outcome may or may not have reached GrailPay,
+    so it must only be resent with the same idempotency key.
+
+    Loading the journal compacts it to one line per key, so it only grows with the number of requests made
+    rather than with the number of times they were retried.
+    """
+
+    def __init__( self, path: str, fsync: bool = True ) -> None:
+        self.path: str = path
+        self.fsync: bool = fsync
+        self.lock: threading.Lock = threading.Lock()
+        self.file = open( path, "a" )
+
+    @classmethod
+    def from_config( cls, config: Config ) -> 'RequestJournal | None':
+        """
+        This method opens the journal configured in config.yaml, or returns None when no journal is configured.
+
+        :param config:
+        :return: RequestJournal | None
+        """
+
+        if not config.JOURNAL_PATH:
+            return None
+
+        return cls( config.JOURNAL_PATH, config.JOURNAL_FSYNC )
+
+    def close( self ) -> None:
+        with self.lock:
+            self.file.close()
+
+    def append( self, entry: dict ) -> None:
+        line: str = json.dumps( { "ts": time.time(), **entry } ) + "\n"
+
+        with self.lock:
+            self.file.write( line )
+            self.file.flush()
+            if self.fsync:
+                os.fsync( self.file.fileno() )
+
+    def intent( self, key: str, action: str, params: dict ) -> None:
+        self.append( { "type": "intent", "key": key, "action": action, "params": params } )
+
+    def outcome( self, key: str, status: str, uuid: str | None = None, status_code: int | None = None, error: str | None = None ) -> None:
+        self.append( { "type": "outcome", "key": key, "status": status, "uuid": uuid, "status_code": status_code, "error": error } )
+
+    def load( self ) -> dict:
+        """
+        This method replays the journal, returns the latest state of every key and compacts the journal to one line
+        per key. A truncated last line, left by a crash mid-write, is ignored and dropped by the compaction.
+
+        :return: dict of key to { "action", "status", "uuid" }, where status is pending until an outcome is recorded.
+        """
+
+        states: dict = {}
+        latest: dict = {}
+        lines: int = 0
+
+        with self.lock:
+            if not os.path.exists( self.path ):
+                return states
+
+            with open( self.path, "r" ) as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry: dict = json.loads( line )
+                    except ValueError:
+                        continue
+
+                    if entry.get( "type" ) == "intent":
+                        states[ entry[ "key" ] ] = { "action": entry.get( "action" ), "status": "pending", "uuid": None }
+                        latest[ entry[ "key" ] ] = entry
+                    elif entry.get( "type" ) == "outcome":
+                        state: dict = states.setdefault( entry[ "key" ], { "action": entry.get( "action" ) } )
+                        state.update( { "status": entry.get( "status" ), "uuid": entry.get( "uuid" ) } )
+                        latest[ entry[ "key" ] ] = { **entry, "action": state[ "action" ] }
+
+            if lines > len( latest ):
+                self.compact( latest.values() )
+
+        return states
+
+    def compact( self, entries: Any ) -> None:
+        """
+        This method atomically replaces the journal with the given entries and reopens it for appending.
+        The caller holds the lock.
+
+        :param entries: The latest entry of every key.
+        :return:
+        """
+
+        temporary: str = self.path + ".tmp"
+
+        with open( temporary, "w" ) as f:
+            for entry in entries:
+                f.write( json.dumps( entry ) + "\n" )
+            f.flush()
+            os.fsync( f.fileno() )
+
+        self.file.close()
+        os.replace( temporary, self.path )
+        self.file = open( self.path, "a" )
+
+    def record( self, key: str, action: str, params: dict, send ) -> Any:
+        """
+        This method journals the intent, sends the request and journals its outcome.
+
+        :param key: The idempotency key of the request.
+        :param action: The name of the call, e.g. transaction:create.
+        :param params: The request parameters.
+        :param send: A callable sending the request and returning the response.
+        :return: The response.
+        """
+
+        self.intent( key, action, params )
+
+        try:
+            response = send()
+        except Exception as e:
+            self.outcome( key, "error", error = str( e ) )
+            raise
+
+        uuid: str | None = None
+        if response.status_code == 201:
+            try:
+                uuid = decode_response( response )[ "data" ][ "uuid" ]
+            except ( ValueError, KeyError, TypeError ):
+                pass
+
+        self.outcome( key, "ok" if response.status_code == 201 else "failed", uuid, response.status_code )
+
+        return response
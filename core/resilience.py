@@ -0,0 +1,154 @@
+import threading
+import time
+
+from core.config import Config
+from core.metrics import Metrics
+
+class CircuitOpenError( ConnectionError ):
+    """
+    Raised instead of calling an endpoint whose circuit is open.
+    """
+
+def endpoint_path( url: str ) -> str:
+    return Metrics.endpoint_key( "GET", url ).split( " ", 1 )[ 1 ].rstrip( "/" )
+
+def matches( path: str, endpoints: list ) -> bool:
+    return any( path.endswith( endpoint.rstrip( "/" ) ) for endpoint in endpoints )
+
+class HedgePolicy:
+    """
+    Decides when a second copy of a slow read is sent: once the first has been outstanding for the endpoint's
+    observed p95 latency. Endpoints with fewer than min_samples recorded calls are not hedged.
+    """
+
+    REFRESH_SECONDS: float = 1.0
+
+    def __init__( self, config: Config, metrics: Metrics ) -> None:
+        self.config: Config = config
+        self.metrics: Metrics = metrics
+        self.delays: dict = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def delay( self, url: str ) -> float | None:
+        """
+        This method returns the seconds to wait before hedging a read, or None when it is not hedged.
+
+        :param url:
+        :return: float | None
+        """
+
+        if not self.config.HEDGING_ENABLED or not matches( endpoint_path( url ), self.config.HEDGING_ENDPOINTS ):
+            return None
+
+        endpoint: str = Metrics.endpoint_key( "GET", url )
+        now: float = time.monotonic()
+
+        with self.lock:
+            cached: tuple | None = self.delays.get( endpoint )
+            if cached is not None and cached[ 0 ] > now:
+                return cached[ 1 ]
+
+        stats = self.metrics.snapshot().get( endpoint )
+        delay: float | None = None
+        if stats is not None and stats.latency.total >= self.config.HEDGING_MIN_SAMPLES:
+            delay = max( self.config.HEDGING_MIN_DELAY, stats.latency.percentile( 0.95 ) )
+
+        with self.lock:
+            self.delays[ endpoint ] = ( now + self.REFRESH_SECONDS, delay )
+
+        return delay
+
+class CircuitBreaker:
+    """
+    Per-endpoint circuit breaker.
+
+    Calls and errors (connection failures and 5xx responses) are counted over a window of window seconds. When at
+    least min_calls were made and the error rate reaches error_rate the circuit opens and calls fail fast for
+    cooldown seconds. A single probe is then let through: success closes the circuit, failure reopens it.
+    """
+
+    def __init__( self, error_rate: float, min_calls: int, window: float, cooldown: float ) -> None:
+        self.error_rate: float = error_rate
+        self.min_calls: int = min_calls
+        self.window: float = window
+        self.cooldown: float = cooldown
+        self.circuits: dict = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def from_config( cls, config: Config ) -> 'CircuitBreaker | None':
+        if config.CIRCUIT_BREAKER_ERROR_RATE <= 0:
+            return None
+
+        return cls(
+            config.CIRCUIT_BREAKER_ERROR_RATE,
+            config.CIRCUIT_BREAKER_MIN_CALLS,
+            config.CIRCUIT_BREAKER_WINDOW,
+            config.CIRCUIT_BREAKER_COOLDOWN
+        )
+
+    def circuit( self, endpoint: str ) -> dict:
+        circuit: dict | None = self.circuits.get( endpoint )
+
+        if circuit is None:
+            circuit = { "state": "closed", "window_start": time.monotonic(), "calls": 0, "errors": 0, "opened": 0.0 }
+            self.circuits[ endpoint ] = circuit
+
+        return circuit
+
+    def allow( self, method: str, url: str ) -> bool:
+        """
+        This method returns whether a call may be sent, letting one probe through once the cooldown has passed.
+
+        :param method:
+        :param url:
+        :return: bool
+        """
+
+        with self.lock:
+            circuit: dict = self.circuit( Metrics.endpoint_key( method, url ) )
+
+            if circuit[ "state" ] == "closed":
+                return True
+
+            if circuit[ "state" ] == "open" and time.monotonic() - circuit[ "opened" ] >= self.cooldown:
+                circuit[ "state" ] = "probing"
+                return True
+
+            return False
+
+    def record( self, method: str, url: str, ok: bool ) -> None:
+        """
+        This method records the outcome of a call.
+
+        :param method:
+        :param url:
+        :param ok: False after a connection failure or a 5xx response.
+        :return:
+        """
+
+        now: float = time.monotonic()
+
+        with self.lock:
+            circuit: dict = self.circuit( Metrics.endpoint_key( method, url ) )
+
+            if circuit[ "state" ] != "closed":
+                if ok:
+                    circuit.update( { "state": "closed", "window_start": now, "calls": 0, "errors": 0 } )
+                else:
+                    circuit.update( { "state": "open", "opened": now } )
+                return
+
+            if now - circuit[ "window_start" ] >= self.window:
+                circuit.update( { "window_start": now, "calls": 0, "errors": 0 } )
+
+            circuit[ "calls" ] += 1
+            if not ok:
+                circuit[ "errors" ] += 1
+
+            if circuit[ "calls" ] >= self.min_calls and circuit[ "errors" ] / circuit[ "calls" ] >= self.error_rate:
+                circuit.update( { "state": "open", "opened": now } )
+
+    def state( self, method: str, url: str ) -> str:
+        with self.lock:
+            return self.circuit( Metrics.endpoint_key( method, url ) )[ "state" ]
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from core.config import Config
+from core.metrics import Metrics
+
+class ResponseCache:
+    """
+    Bounded LRU cache of GET responses with a TTL per endpoint.
+
+    Endpoints are named the way the metrics name them, e.g. /api/v1/transaction/{id}, and match any base path.
+    Concurrent misses for the same key share one in-flight call. Only 200 responses are kept.
+    """
+
+    def __init__( self, max_entries: int, ttl: float = 0.0, endpoint_ttls: dict | None = None ) -> None:
+        self.max_entries: int = max_entries
+        self.ttl: float = ttl
+        self.endpoint_ttls: dict = { endpoint.rstrip( "/" ): float( seconds ) for endpoint, seconds in ( endpoint_ttls or {} ).items() }
+        self.entries: OrderedDict = OrderedDict()
+        self.in_flight: dict = {}
+        self.ttl_by_path: dict = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def from_config( cls, config: Config ) -> 'ResponseCache | None':
+        """
+        This method creates the cache configured in config.yaml, or returns None when caching is disabled.
+
+        :param config:
+        :return: ResponseCache | None
+        """
+
+        if config.CACHE_MAX_ENTRIES <= 0 or not ( config.CACHE_TTL > 0 or any( float( ttl ) > 0 for ttl in config.CACHE_ENDPOINTS.values() ) ):
+            return None
+
+        return cls( config.CACHE_MAX_ENTRIES, config.CACHE_TTL, config.CACHE_ENDPOINTS )
+
+    @staticmethod
+    def key( url: str, data: dict | None = None ) -> tuple:
+        return url, json.dumps( data, sort_keys = True ) if data else ""
+
+    def ttl_for( self, url: str ) -> float:
+        """
+        This method returns the number of seconds responses from an url are kept.
+
+        :param url:
+        :return: float
+        """
+
+        path: str = Metrics.endpoint_key( "GET", url ).split( " ", 1 )[ 1 ].rstrip( "/" )
+        ttl: float | None = self.ttl_by_path.get( path )
+
+        if ttl is None:
+            ttl = self.ttl
+            for endpoint, seconds in self.endpoint_ttls.items():
+                if path.endswith( endpoint ):
+                    ttl = seconds
+                    break
+            self.ttl_by_path[ path ] = ttl
+
+        return ttl
+
+    def get_or_load( self, url: str, data: dict | None, loader: Callable[[], Any] ) -> tuple[Any, bool]:
+        """
+        This method returns the cached response for a request, calling loader on a miss.
+        A caller arriving while the same request is in flight waits for it instead of calling loader.
+
+        :param url:
+        :param data:
+        :param loader: Sends the request and returns the response.
+        :return: The response and whether it was served without calling loader.
+        """
+
+        ttl: float = self.ttl_for( url )
+        if ttl <= 0:
+            return loader(), False
+
+        key: tuple = self.key( url, data )
+
+        with self.lock:
+            entry: tuple | None = self.entries.get( key )
+            if entry is not None and entry[ 0 ] > time.monotonic():
+                self.entries.move_to_end( key )
+                return entry[ 1 ], True
+
+            future: Future | None = self.in_flight.get( key )
+            owner: bool = future is None
+            if owner:
+                future = Future()
+                self.in_flight[ key ] = future
+
+        if not owner:
+            return future.result(), True
+
+        try:
+            response = loader()
+        except BaseException as e:
+            with self.lock:
+                self.in_flight.pop( key, None )
+            future.set_exception( e )
+            raise
+
+        with self.lock:
+            if self.in_flight.pop( key, None ) is future and response is not None and response.status_code == 200:
+                self.entries[ key ] = ( time.monotonic() + ttl, response )
+                self.entries.move_to_end( key )
+                while len( self.entries ) > self.max_entries:
+                    self.entries.popitem( last = False )
+
+        future.set_result( response )
+
+        return response, False
+
+    def stale( self, url: str, data: dict | None = None ) -> Any:
+        """
+        This method returns the last cached response for a request even if it has expired, or None.
+        Expired entries stay cached until evicted or invalidated.
+
+        :param url:
+        :param data:
+        :return: The response, or None.
+        """
+
+        with self.lock:
+            entry: tuple | None = self.entries.get( self.key( url, data ) )
+
+        return entry[ 1 ] if entry is not None else None
+
+    def invalidate( self, *urls: str ) -> None:
+        """
+        This method drops the cached responses of the given urls, whatever data they were requested with.
+        A call in flight for one of them is not cached when it completes.
+
+        :param urls:
+        :return:
+        """
+
+        targets: set = set( urls )
+
+        with self.lock:
+            for key in [ key for key in self.entries if key[ 0 ] in targets ]:
+                del self.entries[ key ]
+            for key in [ key for key in self.in_flight if key[ 0 ] in targets ]:
+                del self.in_flight[ key ]
+
+    def clear( self ) -> None:
+        with self.lock:
+            self.entries.clear()
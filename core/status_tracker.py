@@ -0,0 +1,180 @@
+import heapq
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timezone
+from typing import Any, TextIO
+
+from core.refund_reconciler import RefundReconciler
+
+class StatusTracker:
+    """
+    Follows many transactions until their capture or payout reaches a terminal status, writing one JSON line per
+    status transition.
+
+    Polls are scheduled on a heap ordered by due time. A transaction that just changed is polled again after
+    min_interval, and each unchanged poll doubles its interval up to max_interval, so most requests go to the
+    transactions that are moving.
+    """
+
+    TERMINAL_CAPTURE_STATUSES: tuple = ( "failed", "canceled", "cancelled", "rejected", "returned" )
+    TERMINAL_PAYOUT_STATUSES: tuple = ( "completed", "failed", "canceled", "cancelled", "rejected", "returned" )
+
+    def __init__(
+        self,
+        transaction_api: Any,
+        logger: logging.Logger,
+        workers: int = 10,
+        min_interval: float = 1.0,
+        max_interval: float = 60.0
+    ) -> None:
+        self.transaction_api = transaction_api
+        self.logger: logging.Logger = logger
+        self.workers: int = workers
+        self.min_interval: float = min_interval
+        self.max_interval: float = max_interval
+
+    @classmethod
+    def is_terminal( cls, capture_status: str | None, payout_status: str | None ) -> bool:
+        return (
+            str( capture_status or "" ).lower() in cls.TERMINAL_CAPTURE_STATUSES
+            or str( payout_status or "" ).lower() in cls.TERMINAL_PAYOUT_STATUSES
+        )
+
+    def poll( self, transaction_uuid: str ) -> tuple[str | None, str | None] | None:
+        """
+        This method fetches the current statuses of a transaction.
+
+        :param transaction_uuid:
+        :return: The capture and payout statuses, or None when the transaction does not exist.
+        """
+
+        transaction: dict | None = self.transaction_api.get( transaction_uuid )
+        if transaction is None:
+            return None
+
+        return transaction.get( "capture_status" ), transaction.get( "payout_status" )
+
+    def run(
+        self,
+        file: str,
+        output: str | None = None,
+        workers: int | str | None = None,
+        min_interval: float | str | None = None,
+        max_interval: float | str | None = None,
+        timeout: float | str | None = None
+    ) -> dict:
+        """
+        This method tracks the transactions listed in a file until every one is terminal or the timeout passes.
+
+        :param file: Transaction uuids, one per line, or JSONL rows with a uuid field such as batch results.
+        :param output: The path of the transitions file. Transitions are written to stdout when omitted.
+        :param workers: The number of polls in flight.
+        :param min_interval: The seconds between polls of a transaction that just changed.
+        :param max_interval: The longest number of seconds between polls of a transaction.
+        :param timeout: Stop after this many seconds. Runs until every transaction is terminal when omitted.
+        :return: dict
+        """
+
+        worker_count: int = int( workers ) if workers else self.workers
+        shortest: float = float( min_interval ) if min_interval is not None else self.min_interval
+        longest: float = max( shortest, float( max_interval ) if max_interval is not None else self.max_interval )
+        deadline: float | None = time.monotonic() + float( timeout ) if timeout is not None else None
+
+        states: dict = {}
+        heap: list = []
+
+        for sequence, transaction_uuid in enumerate( dict.fromkeys( RefundReconciler.read_uuids( file ) ) ):
+            states[ transaction_uuid ] = { "statuses": None, "interval": shortest }
+            heap.append( ( 0.0, sequence, transaction_uuid ) )
+
+        sequence: int = len( heap )
+        summary: dict = { "tracked": len( states ), "terminal": 0, "not_found": 0, "pending": 0, "transitions": 0, "polls": 0, "errors": 0 }
+        out: TextIO = open( output, "w" ) if output else sys.stdout
+        in_flight: dict = {}
+
+        try:
+            with ThreadPoolExecutor( max_workers = worker_count ) as executor:
+                while heap or in_flight:
+                    now: float = time.monotonic()
+                    if deadline is not None and now >= deadline:
+                        break
+
+                    while heap and heap[ 0 ][ 0 ] <= now and len( in_flight ) < worker_count:
+                        transaction_uuid = heapq.heappop( heap )[ 2 ]
+                        in_flight[ executor.submit( self.poll, transaction_uuid ) ] = transaction_uuid
+
+                    wait_seconds: float | None = max( 0.0, heap[ 0 ][ 0 ] - now ) if heap and len( in_flight ) < worker_count else None
+                    if deadline is not None:
+                        wait_seconds = min( wait_seconds if wait_seconds is not None else deadline - now, deadline - now )
+
+                    if not in_flight:
+                        time.sleep( wait_seconds or 0.0 )
+                        continue
+
+                    done, _ = wait( in_flight, timeout = wait_seconds, return_when = FIRST_COMPLETED )
+
+                    for future in done:
+                        transaction_uuid = in_flight.pop( future )
+                        state: dict = states[ transaction_uuid ]
+                        summary[ "polls" ] += 1
+
+                        try:
+                            statuses = future.result()
+                        except Exception as e:
+                            summary[ "errors" ] += 1
+                            self.logger.warning( f"Failed to poll {transaction_uuid}: {e}" )
+                            statuses = state[ "statuses" ]
+                            state[ "interval" ] = min( longest, state[ "interval" ] * 2 )
+                        else:
+                            if statuses is None:
+                                summary[ "not_found" ] += 1
+                                self.write( out, transaction_uuid, state[ "statuses" ], None, False )
+                                del states[ transaction_uuid ]
+                                continue
+
+                            if statuses != state[ "statuses" ]:
+                                summary[ "transitions" ] += 1
+                                self.write( out, transaction_uuid, state[ "statuses" ], statuses, self.is_terminal( *statuses ) )
+                                state[ "statuses" ] = statuses
+                                state[ "interval" ] = shortest
+                            else:
+                                state[ "interval" ] = min( longest, state[ "interval" ] * 2 )
+
+                        if statuses is not None and self.is_terminal( *statuses ):
+                            summary[ "terminal" ] += 1
+                            del states[ transaction_uuid ]
+                            continue
+
+                        heapq.heappush( heap, ( time.monotonic() + state[ "interval" ], sequence, transaction_uuid ) )
+                        sequence += 1
+
+                for future in in_flight:
+                    future.cancel()
+        finally:
+            if output:
+                out.close()
+
+        summary[ "pending" ] = len( states )
+
+        self.logger.info(
+            f"Tracked: {summary['tracked']} Terminal: {summary['terminal']} Pending: {summary['pending']} "
+            f"Not found: {summary['not_found']} Transitions: {summary['transitions']} Polls: {summary['polls']}"
+        )
+
+        return summary
+
+    @staticmethod
+    def write( out: TextIO, transaction_uuid: str, previous: tuple | None, current: tuple | None, terminal: bool ) -> None:
+        transition: dict = {
+            "uuid": transaction_uuid,
+            "at": datetime.now( timezone.utc ).isoformat( timespec = "milliseconds" ),
+            "from": { "capture_status": previous[ 0 ], "payout_status": previous[ 1 ] } if previous else None,
+            "to": { "capture_status": current[ 0 ], "payout_status": current[ 1 ] } if current else None,
+            "terminal": terminal
+        }
+
+        out.write( json.dumps( transition ) + "\n" )
+        out.flush()
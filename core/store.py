@@ -0,0 +1,298 @@
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator, Iterable
+
+from core.config import Config
+
+class TransactionStore:
+    """
+    Local SQLite mirror of transactions, refunds and businesses.
+
+    Transactions are synced incrementally: only records updated since the stored high-water mark are fetched.
+    """
+
+    SCHEMA: str = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            uuid TEXT PRIMARY KEY,
+            capture_status TEXT,
+            payout_status TEXT,
+            payer_uuid TEXT,
+            payee_uuid TEXT,
+            amount INTEGER,
+            created_at TEXT,
+            updated_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_capture_status ON transactions ( capture_status );
+        CREATE INDEX IF NOT EXISTS idx_transactions_payout_status ON transactions ( payout_status );
+        CREATE INDEX IF NOT EXISTS idx_transactions_payer_uuid ON transactions ( payer_uuid );
+        CREATE INDEX IF NOT EXISTS idx_transactions_payee_uuid ON transactions ( payee_uuid );
+        CREATE INDEX IF NOT EXISTS idx_transactions_created_at ON transactions ( created_at );
+        CREATE INDEX IF NOT EXISTS idx_transactions_updated_at ON transactions ( updated_at );
+
+        CREATE TABLE IF NOT EXISTS refunds (
+            uuid TEXT PRIMARY KEY,
+            transaction_uuid TEXT NOT NULL,
+            status TEXT,
+            amount INTEGER,
+            created_at TEXT,
+            updated_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_refunds_transaction_uuid ON refunds ( transaction_uuid );
+        CREATE INDEX IF NOT EXISTS idx_refunds_status ON refunds ( status );
+        CREATE INDEX IF NOT EXISTS idx_refunds_created_at ON refunds ( created_at );
+
+        CREATE TABLE IF NOT EXISTS businesses (
+            uuid TEXT PRIMARY KEY,
+            email TEXT,
+            created_at TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_businesses_email ON businesses ( email );
+
+        CREATE TABLE IF NOT EXISTS sync_state (
+            name TEXT PRIMARY KEY,
+            high_water_mark TEXT,
+            synced_at REAL
+        );
+    """
+
+    def __init__( self, path: str, max_age: float = 300 ) -> None:
+        self.path: str = path
+        self.max_age: float = max_age
+        self.lock: threading.Lock = threading.Lock()
+        self.connection: sqlite3.Connection = sqlite3.connect( path, check_same_thread = False )
+        self.connection.execute( "PRAGMA journal_mode=WAL" )
+        self.connection.execute( "PRAGMA synchronous=NORMAL" )
+        self.connection.executescript( self.SCHEMA )
+
+    @classmethod
+    def from_config( cls, config: Config ) -> 'TransactionStore | None':
+        """
+        This method opens the store configured in config.yaml, or returns None when no store is configured.
+
+        :param config:
+        :return: TransactionStore | None
+        """
+
+        if not config.STORE_PATH:
+            return None
+
+        return cls( config.STORE_PATH, config.STORE_MAX_AGE )
+
+    def close( self ) -> None:
+        with self.lock:
+            self.connection.close()
+
+    @staticmethod
+    def party_uuid( transaction: dict, party: str ) -> str | None:
+        """
+        This method returns the payer or payee uuid of a transaction, whether flat or nested.
+
+        :param transaction:
+        :param party: payer or payee
+        :return: str | None
+        """
+
+        if transaction.get( f"{party}_uuid" ):
+            return transaction[ f"{party}_uuid" ]
+
+        nested = transaction.get( party )
+        if isinstance( nested, dict ):
+            return nested.get( "uuid" )
+
+        return None
+
+    def upsert_transactions( self, transactions: Iterable[dict] ) -> None:
+        rows: list = [
+            (
+                transaction[ "uuid" ],
+                transaction.get( "capture_status" ),
+                transaction.get( "payout_status" ),
+                self.party_uuid( transaction, "payer" ),
+                self.party_uuid( transaction, "payee" ),
+                transaction.get( "amount" ),
+                transaction.get( "created_at" ),
+                transaction.get( "updated_at" ),
+                json.dumps( transaction )
+            )
+            for transaction in transactions
+        ]
+
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO transactions VALUES ( ?, ?, ?, ?, ?, ?, ?, ?, ? )",
+                rows
+            )
+
+    def upsert_refunds( self, transaction_uuid: str, refunds: Iterable[dict] ) -> None:
+        rows: list = [
+            (
+                refund[ "uuid" ],
+                transaction_uuid,
+                refund.get( "status" ),
+                refund.get( "amount" ),
+                refund.get( "created_at" ),
+                refund.get( "updated_at" ),
+                json.dumps( refund )
+            )
+            for refund in refunds
+        ]
+
+        with self.lock, self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO refunds VALUES ( ?, ?, ?, ?, ?, ?, ? )",
+                rows
+            )
+
+    def upsert_business( self, uuid: str, business: dict ) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO businesses VALUES ( ?, ?, ?, ? )",
+                ( uuid, business.get( "email" ), business.get( "created_at" ), json.dumps( business ) )
+            )
+
+    def forget_transaction( self, transaction_uuid: str ) -> None:
+        """
+        This method drops a mirrored transaction so the next lookup goes to the API.
+
+        :param transaction_uuid:
+        :return:
+        """
+
+        with self.lock, self.connection:
+            self.connection.execute( "DELETE FROM transactions WHERE uuid = ?", ( transaction_uuid, ) )
+
+    def get_transaction( self, transaction_uuid: str ) -> dict | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT data FROM transactions WHERE uuid = ?",
+                ( transaction_uuid, )
+            ).fetchone()
+
+        return json.loads( row[ 0 ] ) if row else None
+
+    def get_refunds( self, transaction_uuid: str ) -> list:
+        with self.lock:
+            rows: list = self.connection.execute(
+                "SELECT data FROM refunds WHERE transaction_uuid = ? ORDER BY created_at",
+                ( transaction_uuid, )
+            ).fetchall()
+
+        return [ json.loads( row[ 0 ] ) for row in rows ]
+
+    def query_transactions(
+        self,
+        status: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        limit: int | None = None
+    ) -> Iterator[dict]:
+        """
+        This method yields mirrored transactions matching the same filters as TransactionApi.iter_transactions.
+
+        :param status: Matches either the capture or the payout status.
+        :param start_date: Only return transactions created on or after this date (YYYY-MM-DD).
+        :param end_date: Only return transactions created on or before this date (YYYY-MM-DD).
+        :param limit: The maximum number of transactions to return.
+        :return: Iterator[dict]
+        """
+
+        clauses: list = []
+        args: list = []
+
+        if status:
+            clauses.append( "( capture_status = ? OR payout_status = ? )" )
+            args += [ status, status ]
+
+        if start_date:
+            clauses.append( "created_at >= ?" )
+            args.append( start_date )
+
+        if end_date:
+            clauses.append( "created_at < date( ?, '+1 day' )" )
+            args.append( end_date )
+
+        sql: str = "SELECT data FROM transactions"
+        if clauses:
+            sql += " WHERE " + " AND ".join( clauses )
+        sql += " ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append( int( limit ) )
+
+        with self.lock:
+            rows: list = self.connection.execute( sql, args ).fetchall()
+
+        for row in rows:
+            yield json.loads( row[ 0 ] )
+
+    def get_sync_state( self, name: str = "transactions" ) -> tuple[str | None, float]:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT high_water_mark, synced_at FROM sync_state WHERE name = ?",
+                ( name, )
+            ).fetchone()
+
+        return ( row[ 0 ], row[ 1 ] ) if row else ( None, 0.0 )
+
+    def set_sync_state( self, high_water_mark: str | None, name: str = "transactions" ) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES ( ?, ?, ? )",
+                ( name, high_water_mark, time.time() )
+            )
+
+    def is_fresh( self ) -> bool:
+        """
+        This method returns whether the mirror was synced within the configured max age.
+
+        :return: bool
+        """
+
+        high_water_mark, synced_at = self.get_sync_state()
+
+        return time.time() - synced_at <= self.max_age
+
+    def sync( self, transaction_api: Any, full: bool = False, batch_size: int = 500 ) -> int:
+        """
+        This method mirrors every transaction updated since the last sync.
+        The high-water mark only advances, and the mirror only counts as fresh, once every page was fetched.
+        A failed page raises and leaves both as they were, so the next sync fetches the missed transactions.
+
+        :param transaction_api: The TransactionApi used to page through transactions.
+        :param full: Ignore the high-water mark and mirror every transaction.
+        :param batch_size: The number of transactions written per database commit.
+        :return: The number of transactions mirrored.
+        """
+
+        high_water_mark, synced_at = self.get_sync_state()
+        if full:
+            high_water_mark = None
+
+        count: int = 0
+        batch: list = []
+        latest: str | None = high_water_mark
+
+        for transaction in transaction_api.iter_transactions( updated_since = high_water_mark ):
+            batch.append( transaction )
+
+            updated_at = transaction.get( "updated_at" ) or transaction.get( "created_at" )
+            if updated_at and ( latest is None or updated_at > latest ):
+                latest = updated_at
+
+            if len( batch ) >= batch_size:
+                self.upsert_transactions( batch )
+                count += len( batch )
+                batch = []
+
+        if batch:
+            self.upsert_transactions( batch )
+            count += len( batch )
+
+        self.set_sync_state( latest )
+
+        return count
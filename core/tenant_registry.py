@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+from api.api_caller import ApiCaller
+from core.config import Config
+
+class TenantClient:
+    """
+    The api caller of one tenant, with whatever the registry factory built on top of it.
+    """
+
+    __slots__ = ( "tenant", "config", "api_caller", "context", "last_used", "active" )
+
+    def __init__( self, tenant: str | None, config: Config, api_caller: ApiCaller, context: Any ) -> None:
+        self.tenant: str | None = tenant
+        self.config: Config = config
+        self.api_caller: ApiCaller = api_caller
+        self.context: Any = context
+        self.last_used: float = time.monotonic()
+        self.active: int = 0
+
+class TenantRegistry:
+    """
+    Keeps one api caller per tenant profile, each with its own keys, connection pool, rate limiter and cache,
+    created on first use.
+
+    Every caller shares one semaphore capping the requests in flight across all tenants. Clients idle for
+    tenant_pool.idle_timeout seconds are closed, as are the least recently used ones beyond tenant_pool.max_clients.
+    Clients in use are never closed. The tenant None stands for the keys at the top of config.yaml.
+    """
+
+    def __init__( self, config: Config, logger: logging.Logger, factory: Callable[[Config, ApiCaller], Any] | None = None ) -> None:
+        self.config: Config = config
+        self.logger: logging.Logger = logger
+        self.factory: Callable[[Config, ApiCaller], Any] | None = factory
+        self.concurrency: threading.BoundedSemaphore = threading.BoundedSemaphore( config.TENANT_MAX_CONCURRENCY )
+        self.clients: dict = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def create( self, tenant: str | None ) -> TenantClient:
+        config: Config = self.config.for_tenant( tenant ) if tenant is not None else self.config
+        api_caller: ApiCaller = ApiCaller( config, self.logger, self.concurrency )
+
+        return TenantClient( tenant, config, api_caller, self.factory( config, api_caller ) if self.factory else None )
+
+    @contextmanager
+    def acquire( self, tenant: str | None = None ) -> Iterator[TenantClient]:
+        """
+        This method yields the client of a tenant, creating it when needed. The client is not evicted while in use.
+
+        :param tenant: The name of a profile in the tenants section, or None for the default keys.
+        :return: Iterator[TenantClient]
+        """
+
+        with self.lock:
+            client: TenantClient | None = self.clients.get( tenant )
+            if client is None:
+                client = self.create( tenant )
+                self.clients[ tenant ] = client
+                self.logger.debug( f"Created client for tenant {tenant}" )
+            client.active += 1
+
+        try:
+            yield client
+        finally:
+            with self.lock:
+                client.active -= 1
+                client.last_used = time.monotonic()
+            self.evict()
+
+    def evict( self ) -> None:
+        """
+        This method closes the clients that are idle too long or beyond the client limit.
+
+        :return:
+        """
+
+        now: float = time.monotonic()
+        evicted: list = []
+
+        with self.lock:
+            idle: list = sorted( ( client for client in self.clients.values() if client.active == 0 ), key = lambda client: client.last_used )
+            excess: int = len( self.clients ) - self.config.TENANT_MAX_CLIENTS
+
+            for client in idle:
+                if excess <= 0 and now - client.last_used < self.config.TENANT_IDLE_TIMEOUT:
+                    break
+                del self.clients[ client.tenant ]
+                evicted.append( client )
+                excess -= 1
+
+        for client in evicted:
+            client.api_caller.close()
+            self.logger.debug( f"Evicted client for tenant {client.tenant}" )
+
+    def close( self ) -> None:
+        with self.lock:
+            clients: list = list( self.clients.values() )
+            self.clients.clear()
+
+        for client in clients:
+            client.api_caller.close()
+
+    def __enter__( self ) -> 'TenantRegistry':
+        return self
+
+    def __exit__( self, exc_type, exc_value, traceback ) -> None:
+        self.close()
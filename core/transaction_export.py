@@ -0,0 +1,219 @@
+import csv
+import json
+import logging
+from array import array
+from typing import Any, Iterator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+class TransactionAggregates:
+    """
+    Running totals of transaction counts and amounts by capture status, payout status, payee and day.
+
+    Each chunk of columns is aggregated in one vectorized pass when numpy is installed.
+    """
+
+    GROUPS: tuple = ( "capture_status", "payout_status", "payee_uuid", "day" )
+
+    def __init__( self ) -> None:
+        self.count: int = 0
+        self.amount: int = 0
+        self.groups: dict = { group: {} for group in self.GROUPS }
+
+    def add( self, columns: dict ) -> None:
+        amounts = columns[ "amount" ]
+        self.count += len( amounts )
+        self.amount += sum( amounts )
+
+        for group in self.GROUPS:
+            totals: dict = self.groups[ group ]
+
+            for key, count, amount in self.group_totals( columns[ group ], amounts ):
+                entry: list = totals.setdefault( key, [ 0, 0 ] )
+                entry[ 0 ] += count
+                entry[ 1 ] += amount
+
+    @staticmethod
+    def group_totals( keys: list, amounts: array ) -> Iterator[tuple]:
+        if numpy is not None:
+            unique, inverse = numpy.unique( numpy.array( keys, dtype = object ), return_inverse = True )
+            values = numpy.frombuffer( amounts, dtype = numpy.int64 )
+            counts = numpy.bincount( inverse, minlength = len( unique ) )
+            sums = numpy.bincount( inverse, weights = values, minlength = len( unique ) )
+            return zip( unique.tolist(), counts.tolist(), ( int( total ) for total in sums.tolist() ) )
+
+        totals: dict = {}
+        for key, amount in zip( keys, amounts ):
+            entry: list = totals.setdefault( key, [ 0, 0 ] )
+            entry[ 0 ] += 1
+            entry[ 1 ] += amount
+
+        return ( ( key, count, amount ) for key, ( count, amount ) in totals.items() )
+
+    def to_dict( self ) -> dict:
+        return {
+            "count": self.count,
+            "amount": self.amount,
+            **{
+                f"by_{group}": {
+                    key: { "count": count, "amount": amount }
+                    for key, ( count, amount ) in sorted( totals.items() )
+                }
+                for group, totals in self.groups.items()
+            }
+        }
+
+class TransactionExport:
+    """
+    Streams transactions from the paginated list into a columnar file, a chunk of rows at a time,
+    and aggregates amounts as each chunk is written.
+
+    Parquet output needs pyarrow; CSV output works with the standard library alone. When no transaction matches,
+    the file is still written with the columns and no rows.
+    """
+
+    FORMATS: tuple = ( "parquet", "csv" )
+    COLUMNS: tuple = ( "uuid", "created_at", "day", "payer_uuid", "payee_uuid", "amount", "capture_status", "payout_status" )
+
+    def __init__( self, transaction_api: Any, logger: logging.Logger, chunk_size: int = 10000 ) -> None:
+        self.transaction_api = transaction_api
+        self.logger: logging.Logger = logger
+        self.chunk_size: int = chunk_size
+
+    @staticmethod
+    def party_uuid( transaction: dict, party: str ) -> str:
+        nested = transaction.get( party )
+        return transaction.get( f"{party}_uuid" ) or ( nested.get( "uuid" ) if isinstance( nested, dict ) else "" ) or ""
+
+    def new_chunk( self ) -> dict:
+        chunk: dict = { column: [] for column in self.COLUMNS }
+        chunk[ "amount" ] = array( "q" )
+        return chunk
+
+    def append( self, chunk: dict, transaction: dict ) -> None:
+        created_at: str = str( transaction.get( "created_at" ) or "" )
+
+        chunk[ "uuid" ].append( transaction[ "uuid" ] )
+        chunk[ "created_at" ].append( created_at )
+        chunk[ "day" ].append( created_at[ :10 ] )
+        chunk[ "payer_uuid" ].append( self.party_uuid( transaction, "payer" ) )
+        chunk[ "payee_uuid" ].append( self.party_uuid( transaction, "payee" ) )
+        chunk[ "amount" ].append( int( transaction.get( "amount" ) or 0 ) )
+        chunk[ "capture_status" ].append( str( transaction.get( "capture_status" ) or "" ) )
+        chunk[ "payout_status" ].append( str( transaction.get( "payout_status" ) or "" ) )
+
+    def export_chunks( self, transactions: Iterator[dict], output: str, format: str ) -> TransactionAggregates:
+        """
+        This method writes transactions to output one chunk at a time and returns their aggregates.
+
+        :param transactions:
+        :param output: The file to write.
+        :param format: parquet or csv
+        :return: TransactionAggregates
+        """
+
+        if format not in self.FORMATS:
+            raise ValueError( f"Unknown format {format}. Use one of {', '.join( self.FORMATS )}." )
+
+        if format == "parquet" and pyarrow is None:
+            raise RuntimeError( "Parquet export requires pyarrow. Install it or export to csv." )
+
+        aggregates: TransactionAggregates = TransactionAggregates()
+        writer = None
+        handle = None
+
+        def flush( chunk: dict ) -> None:
+            nonlocal writer, handle
+
+            if not chunk[ "uuid" ] and writer is not None:
+                return
+
+            if format == "parquet":
+                table = pyarrow.table( {
+                    column: pyarrow.array( chunk[ column ], type = pyarrow.int64() if column == "amount" else pyarrow.string() )
+                    for column in self.COLUMNS
+                } )
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter( output, table.schema )
+                writer.write_table( table )
+            else:
+                if writer is None:
+                    handle = open( output, "w", newline = "" )
+                    writer = csv.writer( handle )
+                    writer.writerow( self.COLUMNS )
+                writer.writerows( zip( *( chunk[ column ] for column in self.COLUMNS ) ) )
+
+            if chunk[ "uuid" ]:
+                aggregates.add( chunk )
+
+        chunk: dict = self.new_chunk()
+
+        try:
+            for transaction in transactions:
+                self.append( chunk, transaction )
+
+                if len( chunk[ "uuid" ] ) >= self.chunk_size:
+                    flush( chunk )
+                    chunk = self.new_chunk()
+
+            flush( chunk )
+        finally:
+            if format == "parquet" and writer is not None:
+                writer.close()
+            if handle is not None:
+                handle.close()
+
+        return aggregates
+
+    def export(
+        self,
+        output: str,
+        format: str | None = None,
+        report: str | None = None,
+        status: str | None = None,
+        start_date: str | None = None,
+        end_date: str | None = None,
+        limit: int | str | None = None
+    ) -> dict:
+        """
+        This method exports the transactions matching the list filters and returns totals by status, payee and day.
+
+        :param output: The file to write.
+        :param format: parquet or csv. Defaults to parquet for .parquet files and csv otherwise.
+        :param report: The JSON file the aggregates are written to.
+        :param status: List query filter.
+        :param start_date: List query filter.
+        :param end_date: List query filter.
+        :param limit: The maximum number of transactions to export.
+        :return: dict
+        """
+
+        format = format or ( "parquet" if output.endswith( ".parquet" ) else "csv" )
+
+        transactions: Iterator[dict] = self.transaction_api.iter_transactions(
+            status = status,
+            start_date = start_date,
+            end_date = end_date,
+            limit = int( limit ) if limit is not None else None
+        )
+
+        aggregates: dict = self.export_chunks( transactions, output, format ).to_dict()
+
+        if report:
+            with open( report, "w" ) as f:
+                json.dump( aggregates, f, indent = 4 )
+
+        self.logger.info( f"Exported {aggregates['count']} transactions totalling {aggregates['amount']} to {output}" )
+        for status_name, totals in aggregates[ "by_capture_status" ].items():
+            self.logger.info( f"capture_status {status_name}: {totals['count']} transactions, amount {totals['amount']}" )
+
+        return aggregates
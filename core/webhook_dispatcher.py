@@ -0,0 +1,208 @@
+import asyncio
+import inspect
+import json
+import logging
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TextIO
+
+from api.webhook_api import WebhookApi
+from core.config import Config
+
+class WebhookDispatcher:
+    """
+    Routes webhook events to handlers registered by event name.
+
+    Events are spread over a pool of lanes by the uuid of the transaction or business they concern. Each lane runs
+    its events one at a time in arrival order, so events for the same uuid are handled in order while different
+    uuids run in parallel. Lanes have bounded queues: dispatch waits while a lane is full, which in turn fills the
+    webhook server queue and makes it answer 503. Handlers that fail or time out are written to the dead-letter file.
+
+    Sync handlers run on a pool of one thread per lane so they do not block the event loop. A timed out sync
+    handler is abandoned, not interrupted, and keeps its thread until it returns; while every thread is held by
+    abandoned handlers, further sync handlers wait for a free thread and time out in turn. Nothing an abandoned
+    handler returns or raises is counted.
+    """
+
+    ALL_EVENTS: str = "*"
+    KEY_FIELDS: tuple = ( "transaction_uuid", "business_uuid", "uuid" )
+
+    def __init__( self, config: Config, logger: logging.Logger ) -> None:
+        self.config: Config = config
+        self.logger: logging.Logger = logger
+        self.handlers: dict = {}
+        self.lanes: list = []
+        self.tasks: list = []
+        self.executor: ThreadPoolExecutor | None = None
+        self.dead_letters: TextIO | None = None
+        self.next_lane: int = 0
+        self.counters: dict = {
+            "dispatched": 0,
+            "unhandled": 0,
+            "handled": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "dead_lettered": 0
+        }
+
+    def on( self, event_name: str, handler: Callable[[dict], Any], timeout: float | None = None ) -> None:
+        """
+        This method registers a handler for an event name, or for every event with "*".
+
+        :param event_name: One of WebhookApi.WEBHOOK_EVENTS or "*".
+        :param handler: A function or coroutine function taking the event payload.
+        :param timeout: The seconds the handler may run. Defaults to webhook_dispatcher.timeout.
+        :return:
+        """
+
+        if event_name != self.ALL_EVENTS and event_name not in WebhookApi.WEBHOOK_EVENTS:
+            raise ValueError( f"Unknown webhook event: {event_name}" )
+
+        self.handlers.setdefault( event_name, [] ).append( ( handler, timeout or self.config.WEBHOOK_DISPATCHER_TIMEOUT ) )
+
+    def handler( self, event_name: str, timeout: float | None = None ) -> Callable:
+        """
+        This method returns a decorator registering the decorated function for an event name.
+
+        :param event_name:
+        :param timeout:
+        :return: Callable
+        """
+
+        def register( func: Callable ) -> Callable:
+            self.on( event_name, func, timeout )
+            return func
+
+        return register
+
+    @staticmethod
+    def event_name( payload: dict ) -> str:
+        return str( payload.get( "event_name" ) or payload.get( "event" ) or payload.get( "type" ) or "" )
+
+    @classmethod
+    def event_key( cls, payload: dict ) -> str | None:
+        """
+        This method returns the uuid an event is ordered by: its transaction, else its business, else its own uuid.
+
+        :param payload:
+        :return: str | None
+        """
+
+        data = payload.get( "data" )
+        sources: list = [ data, payload ] if isinstance( data, dict ) else [ payload ]
+
+        for field in cls.KEY_FIELDS:
+            for source in sources:
+                if source.get( field ):
+                    return str( source[ field ] )
+
+        return None
+
+    def start( self ) -> None:
+        """
+        This method starts the lanes on the running event loop.
+
+        :return:
+        """
+
+        self.lanes = [ asyncio.Queue( maxsize = self.config.WEBHOOK_DISPATCHER_QUEUE_SIZE ) for _ in range( self.config.WEBHOOK_DISPATCHER_WORKERS ) ]
+        self.tasks = [ asyncio.create_task( self.lane_worker( lane ) ) for lane in self.lanes ]
+        self.executor = ThreadPoolExecutor( max_workers = len( self.lanes ), thread_name_prefix = "webhook-handler" )
+
+        if self.config.WEBHOOK_DISPATCHER_DEAD_LETTERS:
+            self.dead_letters = open( self.config.WEBHOOK_DISPATCHER_DEAD_LETTERS, "a" )
+
+    async def close( self ) -> None:
+        """
+        This method waits for the queued events to be handled and stops the lanes.
+
+        :return:
+        """
+
+        for lane in self.lanes:
+            await lane.join()
+
+        for task in self.tasks:
+            task.cancel()
+
+        if self.executor:
+            self.executor.shutdown( wait = False, cancel_futures = True )
+            self.executor = None
+
+        if self.dead_letters:
+            self.dead_letters.close()
+            self.dead_letters = None
+
+        self.lanes, self.tasks = [], []
+
+    async def __call__( self, payload: dict ) -> None:
+        await self.dispatch( payload )
+
+    async def dispatch( self, payload: dict ) -> None:
+        """
+        This method queues an event on the lane of its uuid, waiting while that lane is full.
+
+        :param payload:
+        :return:
+        """
+
+        name: str = self.event_name( payload )
+        handlers: list = self.handlers.get( name, [] ) + self.handlers.get( self.ALL_EVENTS, [] )
+
+        if not handlers:
+            self.counters[ "unhandled" ] += 1
+            return
+
+        if not self.lanes:
+            self.start()
+
+        key: str | None = self.event_key( payload )
+        if key is None:
+            index: int = self.next_lane
+            self.next_lane = ( self.next_lane + 1 ) % len( self.lanes )
+        else:
+            index = zlib.crc32( key.encode() ) % len( self.lanes )
+
+        self.counters[ "dispatched" ] += 1
+        await self.lanes[ index ].put( ( name, payload, handlers ) )
+
+    async def lane_worker( self, lane: asyncio.Queue ) -> None:
+        while True:
+            name, payload, handlers = await lane.get()
+
+            try:
+                for handler, timeout in handlers:
+                    await self.run_handler( name, payload, handler, timeout )
+            finally:
+                lane.task_done()
+
+    async def run_handler( self, name: str, payload: dict, handler: Callable, timeout: float ) -> None:
+        try:
+            if inspect.iscoroutinefunction( handler ):
+                await asyncio.wait_for( handler( payload ), timeout )
+            else:
+                await asyncio.wait_for( asyncio.get_running_loop().run_in_executor( self.executor, handler, payload ), timeout )
+            self.counters[ "handled" ] += 1
+        except asyncio.TimeoutError:
+            self.counters[ "timeouts" ] += 1
+            self.dead_letter( name, payload, handler, f"timed out after {timeout} seconds" )
+        except Exception as e:
+            self.counters[ "failed" ] += 1
+            self.dead_letter( name, payload, handler, str( e ) )
+
+    def dead_letter( self, name: str, payload: dict, handler: Callable, error: str ) -> None:
+        handler_name: str = getattr( handler, "__qualname__", repr( handler ) )
+        self.logger.error( f"Webhook handler {handler_name} failed for {name}: {error}" )
+        self.counters[ "dead_lettered" ] += 1
+
+        if self.dead_letters:
+            self.dead_letters.write( json.dumps( { "ts": time.time(), "event_name": name, "handler": handler_name, "error": error, "payload": payload } ) + "\n" )
+            self.dead_letters.flush()
+
+    def stats( self ) -> dict:
+        return {
+            "lanes": len( self.lanes ),
+            "queued": sum( lane.qsize() for lane in self.lanes ),
+            **self.counters
+        }
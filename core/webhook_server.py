@@ -0,0 +1,272 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, TextIO
+
+from core.config import Config
+
+class WebhookServer:
+    """
+    Local asyncio HTTP server receiving GrailPay webhook events.
+
+    Every POST is acknowledged as soon as its body is read and queued. Workers parse, deduplicate by event id
+    and persist the events off the request path. When the queue is full the server answers 503 so GrailPay
+    redelivers later instead of timing out.
+
+    An event id is remembered only once the event was persisted and handed to the handler, so a redelivery of an
+    event that failed is processed again. A redelivery arriving while the first delivery is still being processed
+    waits for it.
+    """
+
+    MAX_BODY_SIZE: int = 1024 * 1024
+
+    def __init__( self, config: Config, logger: logging.Logger, handler: Callable[[dict], Any] | None = None ) -> None:
+        self.config: Config = config
+        self.logger: logging.Logger = logger
+        self.handler: Callable[[dict], Any] | None = handler
+        self.queue: asyncio.Queue | None = None
+        self.output: TextIO | None = None
+        self.seen_ids: OrderedDict = OrderedDict()
+        self.in_flight: dict = {}
+        self.latencies: deque = deque( maxlen = 10000 )
+        self.counters: dict = {
+            "received": 0,
+            "rejected": 0,
+            "duplicates": 0,
+            "processed": 0,
+            "errors": 0
+        }
+
+    def run( self, host: str | None = None, port: int | str | None = None ) -> None:
+        """
+        This method runs the webhook server until interrupted.
+
+        :param host: The interface to listen on. Defaults to webhook_server.host.
+        :param port: The port to listen on. Defaults to webhook_server.port.
+        :return:
+        """
+
+        try:
+            asyncio.run( self.serve( host or self.config.WEBHOOK_SERVER_HOST, int( port or self.config.WEBHOOK_SERVER_PORT ) ) )
+        except KeyboardInterrupt:
+            self.logger.info( "Webhook server stopped" )
+
+    async def serve( self, host: str, port: int ) -> None:
+        self.queue = asyncio.Queue( maxsize = self.config.WEBHOOK_SERVER_QUEUE_SIZE )
+        self.output = open( self.config.WEBHOOK_SERVER_OUTPUT, "a" )
+
+        workers: list = [
+            asyncio.create_task( self.worker() )
+            for _ in range( self.config.WEBHOOK_SERVER_WORKERS )
+        ]
+
+        server = await asyncio.start_server( self.handle_connection, host, port )
+        self.logger.info( f"Listening for webhook events on {host}:{port}" )
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            if hasattr( self.handler, "close" ):
+                await self.handler.close()
+            self.output.close()
+
+    async def handle_connection( self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter ) -> None:
+        try:
+            while True:
+                try:
+                    head: bytes = await reader.readuntil( b"\r\n\r\n" )
+                except ( asyncio.IncompleteReadError, asyncio.LimitOverrunError ):
+                    break
+
+                request_line, *header_lines = head.decode( "latin-1" ).split( "\r\n" )
+                method, path, version = ( request_line.split( " " ) + [ "", "" ] )[ :3 ]
+
+                headers: dict = {}
+                for line in header_lines:
+                    name, separator, value = line.partition( ":" )
+                    if separator:
+                        headers[ name.strip().lower() ] = value.strip()
+
+                if "transfer-encoding" in headers:
+                    chunked: bool = headers[ "transfer-encoding" ].lower() == "chunked"
+                    await self.respond( writer, 411 if chunked else 501, { "error": "send the body with a content-length" }, close = True )
+                    break
+
+                content_length: str = headers.get( "content-length", "0" )
+                if not ( content_length.isascii() and content_length.isdigit() ):
+                    await self.respond( writer, 400, { "error": "invalid content-length" }, close = True )
+                    break
+
+                length: int = int( content_length )
+                if length > self.MAX_BODY_SIZE:
+                    await self.respond( writer, 413, { "error": "payload too large" }, close = True )
+                    break
+
+                body: bytes = await reader.readexactly( length ) if length else b""
+                close: bool = headers.get( "connection", "" ).lower() == "close" or version == "HTTP/1.0"
+
+                if method == "POST":
+                    await self.respond( writer, *self.accept( body ), close = close )
+                elif method == "GET" and path.rstrip( "/" ) == "/stats":
+                    await self.respond( writer, 200, self.stats(), close = close )
+                else:
+                    await self.respond( writer, 404, { "error": "not found" }, close = close )
+
+                if close:
+                    break
+        except ( ConnectionError, asyncio.IncompleteReadError ):
+            pass
+        finally:
+            writer.close()
+
+    def accept( self, body: bytes ) -> tuple[int, dict]:
+        """
+        This method queues a received event body without parsing it.
+
+        :param body:
+        :return: The status code and body to respond with.
+        """
+
+        self.counters[ "received" ] += 1
+
+        try:
+            self.queue.put_nowait( ( time.perf_counter(), body ) )
+        except asyncio.QueueFull:
+            self.counters[ "rejected" ] += 1
+            return 503, { "error": "busy" }
+
+        return 202, { "status": "accepted" }
+
+    async def respond( self, writer: asyncio.StreamWriter, status: int, payload: dict, close: bool = False ) -> None:
+        reasons: dict = {
+            200: "OK",
+            202: "Accepted",
+            400: "Bad Request",
+            404: "Not Found",
+            411: "Length Required",
+            413: "Payload Too Large",
+            501: "Not Implemented",
+            503: "Service Unavailable"
+        }
+        body: bytes = json.dumps( payload ).encode()
+
+        writer.write(
+            f"HTTP/1.1 {status} {reasons.get( status, '' )}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len( body )}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+
+    @staticmethod
+    def event_id( payload: dict, body: bytes ) -> str:
+        """
+        This method returns the id used to deduplicate an event, falling back to a hash of its body.
+
+        :param payload:
+        :param body:
+        :return: str
+        """
+
+        event_id = payload.get( "event_id" ) or payload.get( "id" )
+        if event_id:
+            return str( event_id )
+
+        return hashlib.sha1( body ).hexdigest()
+
+    async def claim( self, event_id: str ) -> bool:
+        """
+        This method claims an event id for processing. It returns False when the event was already processed,
+        waiting first when another worker is processing the same id.
+
+        :param event_id:
+        :return: bool
+        """
+
+        while True:
+            if event_id in self.seen_ids:
+                self.seen_ids.move_to_end( event_id )
+                return False
+
+            processing: asyncio.Event | None = self.in_flight.get( event_id )
+            if processing is None:
+                self.in_flight[ event_id ] = asyncio.Event()
+                return True
+
+            await processing.wait()
+
+    def mark_seen( self, event_id: str ) -> None:
+        self.seen_ids[ event_id ] = None
+        if len( self.seen_ids ) > self.config.WEBHOOK_SERVER_DEDUPE_SIZE:
+            self.seen_ids.popitem( last = False )
+
+    async def worker( self ) -> None:
+        while True:
+            received_at, body = await self.queue.get()
+            claimed: str | None = None
+
+            try:
+                payload: dict = json.loads( body )
+                event_id: str = self.event_id( payload, body )
+
+                if not await self.claim( event_id ):
+                    self.counters[ "duplicates" ] += 1
+                    continue
+
+                claimed = event_id
+
+                self.output.write( json.dumps( payload ) + "\n" )
+                if self.queue.empty():
+                    self.output.flush()
+
+                if self.handler:
+                    result = self.handler( payload )
+                    if asyncio.iscoroutine( result ):
+                        await result
+
+                self.mark_seen( event_id )
+                self.counters[ "processed" ] += 1
+            except Exception as e:
+                self.counters[ "errors" ] += 1
+                self.logger.error( f"Failed to process webhook event: {e}" )
+            finally:
+                if claimed is not None:
+                    self.in_flight.pop( claimed ).set()
+                self.latencies.append( time.perf_counter() - received_at )
+                self.queue.task_done()
+
+    def stats( self ) -> dict:
+        """
+        This method returns the queue depth, counters and processing latency percentiles in milliseconds.
+
+        :return: dict
+        """
+
+        latencies: list = sorted( self.latencies )
+
+        def percentile( p: float ) -> float:
+            if not latencies:
+                return 0.0
+            return round( latencies[ min( len( latencies ) - 1, int( len( latencies ) * p ) ) ] * 1000, 3 )
+
+        stats: dict = {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_size": self.config.WEBHOOK_SERVER_QUEUE_SIZE,
+            **self.counters,
+            "latency_ms": {
+                "p50": percentile( 0.50 ),
+                "p95": percentile( 0.95 ),
+                "p99": percentile( 0.99 )
+            }
+        }
+
+        if hasattr( self.handler, "stats" ):
+            stats[ "handler" ] = self.handler.stats()
+
+        return stats
@@ -0,0 +1,136 @@
+import logging
+from typing import Any
+
+from api.webhook_api import WebhookApi
+from core.bounded_pool import map_unordered
+from core.config import Config
+
+class WebhookSync:
+    """
+    Brings the registered webhooks in line with the webhook_subscriptions section of config.yaml.
+
+    The current subscriptions are fetched once and diffed against the desired ones. Urls gaining or losing the same
+    set of events share one register or deregister call, with at most batch_size urls per call, and the calls run
+    concurrently.
+    """
+
+    ALL_EVENTS: str = "*"
+
+    def __init__( self, config: Config, webhook_api: WebhookApi, logger: logging.Logger, workers: int = 10 ) -> None:
+        self.config: Config = config
+        self.webhook_api: WebhookApi = webhook_api
+        self.logger: logging.Logger = logger
+        self.workers: int = workers
+
+    def desired( self ) -> dict[str, set]:
+        """
+        This method returns the configured event names per url. "*" stands for every event.
+
+        :return: dict
+        """
+
+        desired: dict = {}
+
+        for url, events in self.config.WEBHOOK_SUBSCRIPTIONS.items():
+            names: list = list( WebhookApi.WEBHOOK_EVENTS ) if events in ( None, self.ALL_EVENTS ) else WebhookApi.event_list( events )
+
+            unknown: list = [ name for name in names if name not in WebhookApi.WEBHOOK_EVENTS ]
+            if unknown:
+                raise ValueError( f"Unknown webhook events for {url}: {', '.join( unknown )}" )
+
+            desired[ url ] = set( names )
+
+        return desired
+
+    @staticmethod
+    def plan( desired: dict, current: dict, prune: bool = False, batch_size: int = 20 ) -> list[tuple[str, list, list]]:
+        """
+        This method returns the calls needed to turn the current subscriptions into the desired ones.
+
+        :param desired: dict of url to event names.
+        :param current: dict of url to event names.
+        :param prune: Also deregister urls that are not in desired.
+        :param batch_size: The most urls sent in one call.
+        :return: A list of ( "register" | "deregister", urls, event names ).
+        """
+
+        changes: dict = {}
+
+        for url in sorted( set( desired ) | ( set( current ) if prune else set() ) ):
+            wanted: set = desired.get( url, set() )
+            existing: set = current.get( url, set() )
+
+            if wanted - existing:
+                changes.setdefault( ( "register", frozenset( wanted - existing ) ), [] ).append( url )
+            if existing - wanted:
+                changes.setdefault( ( "deregister", frozenset( existing - wanted ) ), [] ).append( url )
+
+        calls: list = []
+        for ( action, events ), urls in changes.items():
+            for start in range( 0, len( urls ), batch_size ):
+                calls.append( ( action, urls[ start:start + batch_size ], sorted( events ) ) )
+
+        return calls
+
+    def apply( self, action: str, urls: list, events: list ) -> tuple[str, list, list, bool]:
+        if action == "register":
+            return action, urls, events, self.webhook_api.register( urls, events )
+
+        return action, urls, events, self.webhook_api.deregister( urls, events )
+
+    @staticmethod
+    def enabled( value: Any, default: bool ) -> bool:
+        """
+        This method reads a command line flag. A bare --flag, 1, true and yes enable it, any other value disables it.
+
+        :param value: The option value, or None when the flag was not given.
+        :param default: The value used when the flag was not given.
+        :return: bool
+        """
+
+        if value is None:
+            return default
+
+        return str( value ).lower() in ( "", "1", "true", "yes" )
+
+    def run( self, dry_run: Any = None, prune: Any = None, workers: int | str | None = None ) -> dict:
+        """
+        This method syncs the webhook subscriptions with config.yaml.
+
+        :param dry_run: Only log the calls that would be made.
+        :param prune: Deregister urls missing from config.yaml. Defaults to webhook_subscriptions.prune.
+        :param workers: The number of calls made concurrently.
+        :return: dict
+        """
+
+        desired: dict = self.desired()
+        current: dict | None = self.webhook_api.subscriptions()
+
+        if current is None:
+            self.logger.error( "Failed to fetch the current webhook subscriptions" )
+            return { "calls": 0, "failed": 0 }
+
+        calls: list = self.plan(
+            desired,
+            current,
+            self.enabled( prune, self.config.WEBHOOK_SUBSCRIPTIONS_PRUNE ),
+            self.config.WEBHOOK_SUBSCRIPTIONS_BATCH_SIZE
+        )
+
+        summary: dict = { "calls": len( calls ), "failed": 0 }
+
+        if self.enabled( dry_run, False ):
+            for action, urls, events in calls:
+                self.logger.info( f"Would {action} {', '.join( urls )} for {', '.join( events )}" )
+            return summary
+
+        for action, urls, events, ok in map_unordered( self.apply, calls, int( workers ) if workers else self.workers ):
+            if ok:
+                self.logger.info( f"{action.capitalize()}ed {', '.join( urls )}. Events: {len( events )}" )
+            else:
+                summary[ "failed" ] += 1
+                self.logger.error( f"Failed to {action} {', '.join( urls )}" )
+
+        self.logger.info( f"Webhook sync complete. Calls: {summary['calls']} Failed: {summary['failed']}" )
+
+        return summary
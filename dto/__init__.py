@@ -5,3 +5,6 @@ from .transaction_mid import TransactionMid
 from .account_routing import AccountRouting
 from .transaction_list import TransactionList
 from .transaction_refund import TransactionRefund
+from .transaction_record import TransactionRecord
+from .refund_record import RefundRecord
+from .webhook_record import WebhookRecord
@@ -0,0 +1,21 @@
+# dto/refund_record.py
+
+from dataclasses import dataclass
+
+@dataclass( slots = True )
+class RefundRecord:
+    uuid: str
+    transaction_uuid: str | None = None
+    amount: int = 0
+    status: str | None = None
+    created_at: str | None = None
+
+    @classmethod
+    def from_dict( cls, data: dict ) -> 'RefundRecord':
+        return cls(
+            uuid = data[ "uuid" ],
+            transaction_uuid = data.get( "transaction_uuid" ),
+            amount = data.get( "amount" ) or 0,
+            status = data.get( "status" ),
+            created_at = data.get( "created_at" )
+        )
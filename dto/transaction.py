@@ -7,3 +7,4 @@ class Transaction:
     payer_uuid: str
     payee_uuid: str
     amount: int
+    client_reference_id: str = ""
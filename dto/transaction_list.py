@@ -5,4 +5,8 @@ from dataclasses import dataclass
 @dataclass
 class TransactionList:
     pageSize: int
-
+    page: int = 1
+    status: str | None = None
+    fromDate: str | None = None
+    toDate: str | None = None
+    updatedFrom: str | None = None
@@ -7,3 +7,4 @@ class TransactionMid:
     payer_uuid: str
     processor_mid: str
     amount: int
+    client_reference_id: str = ""
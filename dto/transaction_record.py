@@ -0,0 +1,30 @@
+# dto/transaction_record.py
+
+from dataclasses import dataclass
+
+@dataclass( slots = True )
+class TransactionRecord:
+    uuid: str
+    capture_status: str | None = None
+    payout_status: str | None = None
+    amount: int = 0
+    payer_uuid: str | None = None
+    payee_uuid: str | None = None
+    created_at: str | None = None
+    updated_at: str | None = None
+
+    @classmethod
+    def from_dict( cls, data: dict ) -> 'TransactionRecord':
+        payer = data.get( "payer" )
+        payee = data.get( "payee" )
+
+        return cls(
+            uuid = data[ "uuid" ],
+            capture_status = data.get( "capture_status" ),
+            payout_status = data.get( "payout_status" ),
+            amount = data.get( "amount" ) or 0,
+            payer_uuid = data.get( "payer_uuid" ) or ( payer.get( "uuid" ) if isinstance( payer, dict ) else None ),
+            payee_uuid = data.get( "payee_uuid" ) or ( payee.get( "uuid" ) if isinstance( payee, dict ) else None ),
+            created_at = data.get( "created_at" ),
+            updated_at = data.get( "updated_at" )
+        )
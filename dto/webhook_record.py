@@ -0,0 +1,15 @@
+# dto/webhook_record.py
+
+from dataclasses import dataclass
+
+@dataclass( slots = True )
+class WebhookRecord:
+    event_name: str
+    webhook_url: str
+
+    @classmethod
+    def from_dict( cls, data: dict ) -> 'WebhookRecord':
+        return cls(
+            event_name = data[ "event_name" ],
+            webhook_url = data[ "webhook_url" ]
+        )
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from core.config import Config
+from core.metrics import Histogram
+from api.api_caller import ApiCaller
+from api.webhook_api import WebhookApi
+from api.business_api import BusinessApi
+from api.transaction_api import TransactionApi
+
+def write_config( path: str, base_url: str, extra: str = "" ) -> Config:
+    """
+    Writes a config.yaml pointing at a stand-in server and loads it.
+
+    :param path: The file to write.
+    :param base_url: The stand-in base url.
+    :param extra: Additional yaml appended to the file.
+    :return: Config
+    """
+
+    with open( path, "w" ) as f:
+        f.write(
+            "environment: sandbox\n"
+            "log_level: warning\n"
+            f"base_url: \"{base_url}\"\n"
+            "authentication:\n"
+            "    processor_api_key: \"processor\"\n"
+            "    vendor_api_key: \"vendor\"\n"
+            "onboarding:\n"
+            "    kyb: True\n"
+            "routing_number: \"011401533\"\n"
+            "http:\n"
+            "    pool_connections: 4\n"
+            "    pool_maxsize: 64\n"
+            + extra
+        )
+
+    return Config( path )
+
+class Benchmark:
+    """
+    Drives the client at a fixed concurrency and reports throughput and latency percentiles per operation.
+    """
+
+    OPERATIONS: tuple = ( "create", "fetch", "list", "refund", "webhook" )
+
+    def __init__( self, config: Config, logger: logging.Logger | None = None ) -> None:
+        self.config: Config = config
+        self.logger: logging.Logger = logger or logging.getLogger( "GrailPay Benchmark" )
+        self.api_caller: ApiCaller = ApiCaller( config, self.logger )
+        self.webhook_api: WebhookApi = WebhookApi( config, self.logger, self.api_caller )
+        self.business_api: BusinessApi = BusinessApi( config, self.logger, self.api_caller )
+        self.transaction_api: TransactionApi = TransactionApi( config, self.logger, self.api_caller )
+        self.transaction_uuids: list = []
+
+    def close( self ) -> None:
+        self.api_caller.close()
+
+    def prepare( self, count: int = 50 ) -> None:
+        """
+        This method creates the transactions the fetch and refund operations work on.
+
+        :param count:
+        :return:
+        """
+
+        payer_uuid: str = self.business_api.create()
+        payee_uuid: str = self.business_api.create()
+
+        self.transaction_uuids = [
+            self.transaction_api.create( payer_uuid, payee_uuid, 1000000 )
+            for _ in range( count )
+        ]
+
+    def operation( self, name: str ) -> Callable[[int], bool]:
+        """
+        This method returns a callable performing one operation, returning whether it succeeded.
+
+        :param name: One of Benchmark.OPERATIONS.
+        :return: Callable[[int], bool]
+        """
+
+        def target( index: int ) -> str:
+            return self.transaction_uuids[ index % len( self.transaction_uuids ) ]
+
+        operations: dict = {
+            "create": lambda index: bool( self.transaction_api.create( str( uuid.uuid4() ), str( uuid.uuid4() ), 1000 ) ),
+            "fetch": lambda index: self.transaction_api.get( target( index ) ) is not None,
+            "list": lambda index: len( list( self.transaction_api.iter_transactions( page_size = 100, limit = 100 ) ) ) > 0,
+            "refund": lambda index: bool( self.transaction_api.refund( target( index ), 1 ) ),
+            "webhook": lambda index: self.webhook_api.fetch() is not None,
+        }
+
+        return operations[ name ]
+
+    def run( self, name: str, concurrency: int, count: int ) -> dict:
+        """
+        This method runs count operations at the given concurrency.
+
+        :param name: One of Benchmark.OPERATIONS.
+        :param concurrency: The number of operations in flight.
+        :param count: The total number of operations.
+        :return: dict
+        """
+
+        operation: Callable[[int], bool] = self.operation( name )
+        histogram: Histogram = Histogram()
+        histogram_lock: threading.Lock = threading.Lock()
+        errors: list = []
+
+        def timed( index: int ) -> None:
+            start: float = time.perf_counter()
+            try:
+                if not operation( index ):
+                    errors.append( index )
+            except Exception:
+                errors.append( index )
+            seconds: float = time.perf_counter() - start
+            with histogram_lock:
+                histogram.observe( seconds )
+
+        start: float = time.perf_counter()
+        with ThreadPoolExecutor( max_workers = concurrency ) as executor:
+            list( executor.map( timed, range( count ) ) )
+        seconds: float = time.perf_counter() - start
+
+        return {
+            "operation": name,
+            "concurrency": concurrency,
+            "count": count,
+            "errors": len( errors ),
+            "seconds": round( seconds, 3 ),
+            "ops_per_sec": round( count / seconds, 1 ),
+            "p50_ms": round( histogram.percentile( 0.50 ) * 1000, 3 ),
+            "p95_ms": round( histogram.percentile( 0.95 ) * 1000, 3 ),
+            "p99_ms": round( histogram.percentile( 0.99 ) * 1000, 3 )
+        }
+
+def show_results( results: list ) -> None:
+    columns: tuple = ( "operation", "concurrency", "count", "errors", "ops_per_sec", "p50_ms", "p95_ms", "p99_ms" )
+
+    print( "".join( f"{column:>14}" for column in columns ) )
+    for result in results:
+        print( "".join( f"{result[ column ]:>14}" for column in columns ) )
+
+if __name__ == '__main__':
+    import argparse
+    import os
+    import tempfile
+    from tests.standin.grailpay_standin import GrailPayStandin
+
+    parser = argparse.ArgumentParser( description = "GrailPay client benchmark against the local stand-in" )
+    parser.add_argument( "--concurrency", default = "1,8,32" )
+    parser.add_argument( "--count", type = int, default = 500 )
+    parser.add_argument( "--latency", type = float, default = 0.005 )
+    parser.add_argument( "--operations", default = ",".join( Benchmark.OPERATIONS ) )
+    arguments = parser.parse_args()
+
+    standin = GrailPayStandin( latency = arguments.latency ).start()
+    standin.state.seed( 1000 )
+
+    with tempfile.TemporaryDirectory() as directory:
+        benchmark = Benchmark( write_config( os.path.join( directory, "config.yaml" ), standin.base_url ) )
+        benchmark.prepare()
+
+        results: list = [
+            benchmark.run( name, int( concurrency ), arguments.count )
+            for name in arguments.operations.split( "," )
+            for concurrency in arguments.concurrency.split( "," )
+        ]
+
+        benchmark.close()
+
+    standin.stop()
+    show_results( results )
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import threading
+
+from api.async_api_caller import AsyncApiCaller
+from api.async_business_api import AsyncBusinessApi
+from api.async_transaction_api import AsyncTransactionApi
+from api.async_webhook_api import AsyncWebhookApi
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def test_async_caller_bounds_requests_in_flight( standin, standin_config ):
+    standin_config.HTTP_MAX_CONCURRENCY = 4
+    standin.latency = 0.02
+    lock: threading.Lock = threading.Lock()
+    in_flight: list = [ 0, 0 ]
+    handle = standin.handle
+
+    def count( method: str, target: str, headers, raw: bytes ):
+        with lock:
+            in_flight[ 0 ] += 1
+            in_flight[ 1 ] = max( in_flight )
+        try:
+            return handle( method, target, headers, raw )
+        finally:
+            with lock:
+                in_flight[ 0 ] -= 1
+
+    standin.handle = count
+    uuids: list = standin.state.order[ :20 ]
+
+    async def fetch_all() -> list:
+        async with AsyncApiCaller( standin_config, logger ) as api_caller:
+            transaction_api = AsyncTransactionApi( standin_config, logger, api_caller )
+            return await asyncio.gather( *[ transaction_api.fetch( transaction_uuid ) for transaction_uuid in uuids ] )
+
+    transactions: list = asyncio.run( fetch_all() )
+
+    assert [ transaction[ "uuid" ] for transaction in transactions ] == uuids
+    assert 1 < in_flight[ 1 ] <= 4
+
+def test_async_caller_retries_reads_but_not_unkeyed_writes( standin, standin_config ):
+    standin_config.RETRY_MAX_ATTEMPTS = 3
+    standin_config.RETRY_BACKOFF_BASE = 0.001
+    transaction_uuid: str = standin.state.order[ 0 ]
+    failures: list = []
+
+    def fail_twice( method: str, path: str, body: dict ) -> bool:
+        if len( failures ) < 2 or method == "POST":
+            failures.append( method )
+            return True
+        return False
+
+    standin.fail_request = fail_twice
+
+    async def run() -> tuple:
+        async with AsyncApiCaller( standin_config, logger ) as api_caller:
+            transaction: dict | None = await AsyncTransactionApi( standin_config, logger, api_caller ).fetch( transaction_uuid )
+            registered: bool = await AsyncWebhookApi( standin_config, logger, api_caller ).register( "https://example.test/hook" )
+            return transaction, registered
+
+    transaction, registered = asyncio.run( run() )
+
+    assert transaction[ "uuid" ] == transaction_uuid
+    assert registered is False
+    assert failures == [ "GET", "GET", "POST" ]
+
+def test_async_apis_against_the_standin( standin, standin_config ):
+    async def run() -> dict:
+        async with AsyncApiCaller( standin_config, logger ) as api_caller:
+            business_api = AsyncBusinessApi( standin_config, logger, api_caller )
+            transaction_api = AsyncTransactionApi( standin_config, logger, api_caller )
+            webhook_api = AsyncWebhookApi( standin_config, logger, api_caller )
+
+            payer_uuid, payee_uuid = await asyncio.gather( business_api.create(), business_api.create() )
+            transaction_uuid: str = await transaction_api.create( payer_uuid, payee_uuid, 1000 )
+            refunded: dict | bool = await transaction_api.refund( transaction_uuid, 400 )
+
+            return {
+                "transaction": await transaction_api.fetch( transaction_uuid ),
+                "refunded": refunded,
+                "refunds": await transaction_api.fetch_refunds( transaction_uuid ),
+                "canceled": await transaction_api.cancel( transaction_uuid ),
+                "status": ( await transaction_api.fetch( transaction_uuid ) )[ "capture_status" ],
+                "cancel_unknown": await transaction_api.cancel( "missing" ),
+                "registered": await webhook_api.register( "https://example.test/hook", "TransactionStarted" ),
+                "webhooks": await webhook_api.fetch(),
+                "deregistered": await webhook_api.deregister( "https://example.test/hook", "TransactionStarted" ),
+                "webhooks_after": await webhook_api.fetch()
+            }
+
+    result: dict = asyncio.run( run() )
+
+    assert result[ "transaction" ][ "amount" ] == 1000
+    assert result[ "refunded" ][ "data" ][ "transaction_uuid" ] == result[ "transaction" ][ "uuid" ]
+    assert len( result[ "refunds" ] ) == 1
+    assert result[ "canceled" ] is True
+    assert result[ "status" ] == "canceled"
+    assert result[ "cancel_unknown" ] is False
+    assert result[ "registered" ] is True
+    assert result[ "deregistered" ] is True
+    assert len( result[ "webhooks" ][ "data" ] ) == 1
+    assert not result[ "webhooks_after" ][ "data" ]
@@ -0,0 +1,110 @@
+import json
+import logging
+
+from api.api_caller import ApiCaller
+from core.cli import build_actions
+from core.request_journal import RequestJournal
+from tests.benchmark.benchmark import write_config
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def write_rows( path: str, rows: list ) -> str:
+    with open( path, "w" ) as f:
+        for row in rows:
+            f.write( json.dumps( row ) + "\n" )
+
+    return path
+
+def read_results( path: str ) -> dict:
+    with open( path ) as f:
+        return { result[ "row" ]: result for result in map( json.loads, f ) }
+
+def test_failed_actions_are_errors_and_retried_on_resume( standin, tmp_path ):
+    config = write_config( str( tmp_path / "config.yaml" ), standin.base_url, f'journal:\n    path: "{tmp_path}/journal.jsonl"\nretry:\n    max_attempts: 1\n' )
+    known: str = standin.state.order[ 0 ]
+    batch: str = write_rows( str( tmp_path / "batch.jsonl" ), [
+        { "action": "transaction:fetch", "params": [ known ] },
+        { "action": "transaction:fetch", "params": [ "missing" ] },
+        { "action": "transaction:cancel", "params": [ "missing" ] },
+        { "action": "transaction:create_mid", "params": [ "payer", "mid", 1000 ] },
+        { "action": "transaction:create", "params": [ "payer", "payee", 1000 ] }
+    ] )
+    journal: RequestJournal = RequestJournal.from_config( config )
+
+    with ApiCaller( config, logger ) as api_caller:
+        actions: dict = build_actions( config, logger, api_caller, None, journal )
+
+        standin.fail_request = lambda method, path, body: method == "POST" and body.get( "processor_mid" ) == "mid"
+        first: dict = actions[ "batch" ][ 0 ]( batch, str( tmp_path / "first.jsonl" ) )
+        first_results: dict = read_results( str( tmp_path / "first.jsonl" ) )
+
+        standin.fail_request = None
+        second: dict = actions[ "batch" ][ 0 ]( batch, str( tmp_path / "second.jsonl" ) )
+        second_results: dict = read_results( str( tmp_path / "second.jsonl" ) )
+
+    journal.close()
+
+    assert [ first_results[ row ][ "status" ] for row in range( 1, 6 ) ] == [ "ok", "error", "error", "error", "ok" ]
+    assert first == { "ok": 2, "error": 3, "skipped": 0 }
+    assert second_results[ 4 ][ "status" ] == "ok"
+    assert second_results[ 4 ][ "uuid" ]
+    assert second_results[ 5 ][ "status" ] == "skipped"
+    assert second == { "ok": 2, "error": 2, "skipped": 1 }
+
+def test_moved_batch_file_skips_completed_rows( standin, tmp_path ):
+    config = write_config( str( tmp_path / "config.yaml" ), standin.base_url, f'journal:\n    path: "{tmp_path}/journal.jsonl"\n' )
+    rows: list = [ { "action": "transaction:create", "params": [ "payer", "payee", 1000 + row ] } for row in range( 5 ) ]
+    ( tmp_path / "moved" ).mkdir()
+    journal: RequestJournal = RequestJournal.from_config( config )
+
+    with ApiCaller( config, logger ) as api_caller:
+        actions: dict = build_actions( config, logger, api_caller, None, journal )
+
+        first: dict = actions[ "batch" ][ 0 ]( write_rows( str( tmp_path / "batch.jsonl" ), rows ), str( tmp_path / "first.jsonl" ) )
+        second: dict = actions[ "batch" ][ 0 ]( write_rows( str( tmp_path / "moved" / "batch.jsonl" ), rows ), str( tmp_path / "second.jsonl" ) )
+
+    journal.close()
+
+    assert first == { "ok": 5, "error": 0, "skipped": 0 }
+    assert second == { "ok": 0, "error": 0, "skipped": 5 }
+
+def test_inserted_and_reordered_rows_keep_their_keys( standin, tmp_path ):
+    config = write_config( str( tmp_path / "config.yaml" ), standin.base_url, f'journal:\n    path: "{tmp_path}/journal.jsonl"\n' )
+    rows: list = [
+        { "action": "transaction:create", "params": [ "payer", "payee", 1000 ] },
+        { "action": "transaction:create", "params": [ "payer", "payee", 1000 ] },
+        { "action": "transaction:create", "params": [ "payer", "payee", 2000 ] }
+    ]
+    edited: list = [ { "action": "transaction:create", "params": [ "payer", "payee", 500 ] }, rows[ 2 ], rows[ 0 ], rows[ 1 ] ]
+    journal: RequestJournal = RequestJournal.from_config( config )
+
+    with ApiCaller( config, logger ) as api_caller:
+        actions: dict = build_actions( config, logger, api_caller, None, journal )
+
+        first: dict = actions[ "batch" ][ 0 ]( write_rows( str( tmp_path / "batch.jsonl" ), rows ), str( tmp_path / "first.jsonl" ) )
+        second: dict = actions[ "batch" ][ 0 ]( write_rows( str( tmp_path / "batch.jsonl" ), edited ), str( tmp_path / "second.jsonl" ) )
+        second_results: dict = read_results( str( tmp_path / "second.jsonl" ) )
+
+    journal.close()
+
+    assert first == { "ok": 3, "error": 0, "skipped": 0 }
+    assert second == { "ok": 1, "error": 0, "skipped": 3 }
+    assert second_results[ 1 ][ "status" ] == "ok"
+    assert len( standin.state.transactions ) == 250 + 4
+
+def test_csv_key_column_is_used_as_the_idempotency_key( standin, tmp_path ):
+    config = write_config( str( tmp_path / "config.yaml" ), standin.base_url, f'journal:\n    path: "{tmp_path}/journal.jsonl"\n' )
+    batch = tmp_path / "batch.csv"
+    batch.write_text( "action,client_reference_id,payer,payee,amount\ntransaction:create,order-1,payer,payee,1000\ntransaction:create,order-2,payer,payee,1000\n" )
+    journal: RequestJournal = RequestJournal.from_config( config )
+
+    with ApiCaller( config, logger ) as api_caller:
+        actions: dict = build_actions( config, logger, api_caller, None, journal )
+        summary: dict = actions[ "batch" ][ 0 ]( str( batch ), str( tmp_path / "results.jsonl" ) )
+        results: dict = read_results( str( tmp_path / "results.jsonl" ) )
+
+    journal.close()
+
+    assert summary == { "ok": 2, "error": 0, "skipped": 0 }
+    assert [ results[ row ][ "idempotency_key" ] for row in ( 1, 2 ) ] == [ "order-1", "order-2" ]
+    assert sorted( transaction[ "client_reference_id" ] for transaction in standin.state.transactions.values() if transaction.get( "client_reference_id", "" ).startswith( "order-" ) ) == [ "order-1", "order-2" ]
@@ -0,0 +1,104 @@
+import glob
+import json
+import logging
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from core.backfill import TransactionBackfill
+from tests.benchmark.benchmark import Benchmark, write_config
+
+@pytest.mark.parametrize( "operation", Benchmark.OPERATIONS )
+def test_benchmark_operation( standin_config, operation ):
+    benchmark = Benchmark( standin_config )
+    benchmark.prepare( 10 )
+
+    result: dict = benchmark.run( operation, 4, 40 )
+    benchmark.close()
+
+    assert result[ "errors" ] == 0
+    assert result[ "ops_per_sec" ] > 0
+    assert result[ "p50_ms" ] <= result[ "p99_ms" ]
+
+def test_benchmark_counts_missing_transactions_as_errors( standin_config ):
+    benchmark = Benchmark( standin_config )
+    benchmark.transaction_uuids = [ str( uuid.uuid4() ) ]
+
+    result: dict = benchmark.run( "fetch", 4, 20 )
+    benchmark.close()
+
+    assert result[ "errors" ] == 20
+
+def test_transaction_list_follows_pagination( standin_config ):
+    benchmark = Benchmark( standin_config )
+
+    transactions: list = list( benchmark.transaction_api.iter_transactions( page_size = 40 ) )
+    benchmark.close()
+
+    assert len( transactions ) == 250
+    assert len( { transaction[ "uuid" ] for transaction in transactions } ) == 250
+
+def test_streamed_transaction_list_matches_buffered( standin_config ):
+    benchmark = Benchmark( standin_config )
+
+    streamed: list = list( benchmark.transaction_api.iter_transactions( page_size = 40, stream = True ) )
+    buffered: list = list( benchmark.transaction_api.iter_transactions( page_size = 40, stream = False ) )
+    limited: list = list( benchmark.transaction_api.iter_transactions( page_size = 40, limit = 45, stream = True ) )
+    benchmark.close()
+
+    assert streamed == buffered
+    assert limited == buffered[ :45 ]
+
+def test_backfill_resumes_from_checkpoints( standin_config, tmp_path ):
+    backfill = TransactionBackfill( standin_config, logging.getLogger( "GrailPay Benchmark" ), 2 )
+    start_date: str = ( date.today() - timedelta( days = 31 ) ).isoformat()
+    output: str = str( tmp_path / "backfill" )
+
+    first: dict = backfill.run( start_date, date.today().isoformat(), output, days = 10, page_size = 40 )
+    second: dict = backfill.run( start_date, date.today().isoformat(), output, days = 10, page_size = 40 )
+
+    uuids: list = [ json.loads( line )[ "uuid" ] for part in glob.glob( output + "/*.jsonl" ) for line in open( part ) ]
+
+    assert first[ "failed" ] == 0
+    assert second[ "skipped" ] == second[ "shards" ]
+    assert len( uuids ) == len( set( uuids ) ) == first[ "count" ] == 250
+
+def test_retries_injected_failures( standin, standin_config ):
+    standin.failure_rate = 0.3
+    standin_config.RETRY_MAX_ATTEMPTS = 10
+    standin_config.RETRY_BACKOFF_BASE = 0.001
+
+    benchmark = Benchmark( standin_config )
+    result: dict = benchmark.run( "webhook", 4, 40 )
+    benchmark.close()
+
+    assert result[ "errors" ] == 0
+
+def test_http2_multiplexes_requests( tmp_path ):
+    pytest.importorskip( "h2" )
+    from tests.standin.h2_standin import H2Standin
+
+    server = H2Standin( latency = 0.01 ).start()
+    server.state.seed( 10 )
+    config = write_config( str( tmp_path / "config.yaml" ), server.base_url, 'http:\n    version: "2-prior-knowledge"\n' )
+
+    benchmark = Benchmark( config )
+    benchmark.prepare( 10 )
+    result: dict = benchmark.run( "fetch", 16, 64 )
+    benchmark.close()
+    server.stop()
+
+    assert result[ "errors" ] == 0
+    assert server.connections == 1
+
+def test_http2_pool_is_bounded_by_pool_maxsize( tmp_path ):
+    pytest.importorskip( "h2" )
+    from api.transport import Http2Adapter
+
+    config = write_config( str( tmp_path / "config.yaml" ), "http://localhost", 'http:\n    version: "2"\n    pool_connections: 2\n    pool_maxsize: 24\n' )
+    adapter = Http2Adapter( config )
+    pool = adapter.client._transport._pool
+    adapter.close()
+
+    assert pool._max_connections == pool._max_keepalive_connections == 24
@@ -0,0 +1,24 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from tests.benchmark.benchmark import Benchmark, write_config
+
+def test_client_cache_serves_repeated_fetches_until_cancel( standin, tmp_path ):
+    config = write_config( str( tmp_path / "config.yaml" ), standin.base_url, "cache:\n    max_entries: 100\n    ttl: 30\n" )
+    transaction_uuid: str = standin.state.order[ 0 ]
+
+    benchmark = Benchmark( config, logging.getLogger( "GrailPay Tests" ) )
+    methods: list = []
+    request = benchmark.api_caller.session.request
+    benchmark.api_caller.session.request = lambda method, url, **kwargs: methods.append( method ) or request( method, url, **kwargs )
+
+    with ThreadPoolExecutor( max_workers = 8 ) as executor:
+        fetched: list = list( executor.map( lambda index: benchmark.transaction_api.get( transaction_uuid ), range( 8 ) ) )
+
+    benchmark.transaction_api.cancel( transaction_uuid )
+    after_cancel: dict | None = benchmark.transaction_api.get( transaction_uuid )
+    benchmark.close()
+
+    assert all( transaction[ "uuid" ] == transaction_uuid for transaction in fetched )
+    assert methods == [ "GET", "DELETE", "GET" ]
+    assert after_cancel[ "capture_status" ] == "canceled"
@@ -0,0 +1,31 @@
+import json
+import logging
+
+from core.refund_reconciler import RefundReconciler
+from tests.benchmark.benchmark import Benchmark
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def test_reconciler_reports_refunds_and_mismatches( standin, standin_config, tmp_path ):
+    benchmark = Benchmark( standin_config, logger )
+    refunded, untouched, foreign = [ benchmark.transaction_api.create( "payer", "payee", 1000 ) for _ in range( 3 ) ]
+    benchmark.transaction_api.refund( refunded, 300 )
+    benchmark.transaction_api.refund( refunded, 200 )
+    standin.state.refunds[ foreign ] += [
+        { "uuid": "r-foreign", "transaction_uuid": refunded, "amount": 100, "status": "completed" },
+        { "uuid": "r-failed", "transaction_uuid": foreign, "amount": 900, "status": "failed" }
+    ]
+
+    with open( tmp_path / "uuids.txt", "w" ) as f:
+        f.write( f"{refunded}\n{json.dumps( { 'uuid': untouched } )}\n\n{foreign}\nmissing\n" )
+
+    summary: dict = RefundReconciler( benchmark.transaction_api, logger, 4 ).run( str( tmp_path / "uuids.txt" ), str( tmp_path / "report.jsonl" ) )
+    benchmark.close()
+
+    report: dict = { result[ "transaction_uuid" ]: result for result in map( json.loads, open( tmp_path / "report.jsonl" ) ) }
+
+    assert summary == { "ok": 2, "mismatch": 1, "error": 1, "amount": 3000, "refunded": 600, "remaining": 2400 }
+    assert ( report[ refunded ][ "refunded" ], report[ refunded ][ "pending" ], report[ refunded ][ "remaining" ] ) == ( 500, 500, 500 )
+    assert report[ untouched ][ "refund_count" ] == 0
+    assert report[ foreign ][ "issues" ] == [ f"refund r-foreign belongs to {refunded}" ]
+    assert report[ "missing" ][ "status" ] == "error"
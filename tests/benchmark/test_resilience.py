@@ -0,0 +1,42 @@
+import logging
+import time
+
+import pytest
+
+from api.api_caller import ApiCaller
+from api.endpoints import Endpoints
+from api.transaction_api import TransactionApi
+from core.resilience import CircuitOpenError
+from tests.benchmark.benchmark import write_config
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def test_circuit_breaker_probe_closes_despite_cached_responses( standin, tmp_path ):
+    config = write_config(
+        str( tmp_path / "config.yaml" ),
+        standin.base_url,
+        'cache:\n    endpoints:\n        "/api/v1/transaction/{id}": 30\n'
+        'circuit_breaker:\n    error_rate: 0.5\n    min_calls: 2\n    window: 30\n    cooldown: 0.1\n'
+        'retry:\n    max_attempts: 1\n'
+    )
+    cached_uuid, other_uuid = standin.state.order[ :2 ]
+
+    with ApiCaller( config, logger ) as api_caller:
+        transaction_api: TransactionApi = TransactionApi( config, logger, api_caller )
+        url: str = transaction_api.endpoints.get_url( Endpoints.TRANSACTION_FETCH ).replace( "{transaction_uuid}", other_uuid )
+
+        assert transaction_api.get( cached_uuid ) is not None
+
+        standin.failure_rate = 1.0
+        assert transaction_api.get( other_uuid ) is None
+        assert api_caller.breaker.state( "GET", url ) == "open"
+
+        with pytest.raises( CircuitOpenError ):
+            transaction_api.get( other_uuid )
+
+        standin.failure_rate = 0.0
+        time.sleep( 0.15 )
+
+        assert transaction_api.get( cached_uuid ) is not None
+        assert transaction_api.get( other_uuid ) is not None
+        assert api_caller.breaker.state( "GET", url ) == "closed"
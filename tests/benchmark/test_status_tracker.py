@@ -0,0 +1,47 @@
+import json
+import logging
+
+from core.status_tracker import StatusTracker
+from tests.benchmark.benchmark import Benchmark
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def write_uuids( path: str, uuids: list ) -> str:
+    with open( path, "w" ) as f:
+        f.write( "\n".join( uuids ) + "\n" )
+
+    return path
+
+def test_tracker_follows_transactions_until_terminal( standin, standin_config, tmp_path ):
+    standin.state.settle_after = 0.1
+    benchmark = Benchmark( standin_config, logger )
+    settling: list = [ benchmark.transaction_api.create( "payer", "payee", 1000 ) for _ in range( 4 ) ]
+    canceled: str = benchmark.transaction_api.create( "payer", "payee", 1000 )
+    benchmark.transaction_api.cancel( canceled )
+
+    uuids: str = write_uuids( str( tmp_path / "uuids.txt" ), settling + [ canceled, "missing", settling[ 0 ] ] )
+    summary: dict = StatusTracker( benchmark.transaction_api, logger, 4, 0.02, 0.05 ).run( uuids, str( tmp_path / "transitions.jsonl" ), timeout = 5 )
+    benchmark.close()
+
+    transitions: list = [ json.loads( line ) for line in open( tmp_path / "transitions.jsonl" ) ]
+    steps: list = [ ( transition[ "to" ][ "capture_status" ], transition[ "to" ][ "payout_status" ] ) for transition in transitions if transition[ "uuid" ] == settling[ 0 ] ]
+
+    assert summary[ "tracked" ] == 6
+    assert summary[ "terminal" ] == 5
+    assert summary[ "not_found" ] == 1
+    assert summary[ "pending" ] == 0
+    assert summary[ "transitions" ] == 4 * 3 + 1
+    assert steps == [ ( "pending", "pending" ), ( "completed", "pending" ), ( "completed", "completed" ) ]
+    assert [ transition[ "terminal" ] for transition in transitions if transition[ "uuid" ] == canceled ] == [ True ]
+
+def test_tracker_backs_off_unchanged_transactions( standin, standin_config, tmp_path ):
+    benchmark = Benchmark( standin_config, logger )
+    pending: str = benchmark.transaction_api.create( "payer", "payee", 1000 )
+
+    uuids: str = write_uuids( str( tmp_path / "uuids.txt" ), [ pending ] )
+    summary: dict = StatusTracker( benchmark.transaction_api, logger, 4, 0.01, 0.08 ).run( uuids, str( tmp_path / "transitions.jsonl" ), timeout = 0.5 )
+    benchmark.close()
+
+    assert summary[ "pending" ] == 1
+    assert summary[ "transitions" ] == 1
+    assert 4 <= summary[ "polls" ] <= 12
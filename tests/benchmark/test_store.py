@@ -0,0 +1,32 @@
+import pytest
+
+from core.store import TransactionStore
+from tests.benchmark.benchmark import Benchmark
+
+def test_sync_is_incremental_and_keeps_its_mark_on_failure( standin, standin_config, tmp_path ):
+    standin_config.RETRY_MAX_ATTEMPTS = 1
+    store: TransactionStore = TransactionStore( str( tmp_path / "grailpay.db" ) )
+    benchmark = Benchmark( standin_config )
+
+    standin.fail_request = lambda method, path, body: path.endswith( "/transactions" ) and body.get( "page" ) == "2"
+
+    with pytest.raises( RuntimeError ):
+        store.sync( benchmark.transaction_api, batch_size = 50 )
+
+    assert store.get_sync_state() == ( None, 0.0 )
+    assert not store.is_fresh()
+
+    standin.fail_request = None
+
+    assert store.sync( benchmark.transaction_api ) == 250
+    assert store.is_fresh()
+
+    high_water_mark, synced_at = store.get_sync_state()
+    standin.state.add_transaction( "payer", "payee", 100, updated_at = "9999-01-01 00:00:00" )
+
+    assert store.sync( benchmark.transaction_api ) < 250
+    assert store.get_sync_state()[ 0 ] == "9999-01-01 00:00:00" > high_water_mark
+    assert len( list( store.query_transactions( None, None, None, None ) ) ) == 251
+
+    benchmark.close()
+    store.close()
@@ -0,0 +1,55 @@
+import json
+import logging
+
+from api.api_caller import ApiCaller
+from core.cli import build_actions
+from core.request_journal import RequestJournal
+from core.store import TransactionStore
+from core.tenant_registry import TenantRegistry
+from tests.benchmark.benchmark import write_config
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def tenant_config( standin, tmp_path ):
+    return write_config(
+        str( tmp_path / "config.yaml" ),
+        standin.base_url,
+        f'store:\n    path: "{tmp_path}/grailpay.db"\n'
+        f'journal:\n    path: "{tmp_path}/journal.jsonl"\n'
+        'tenants:\n    merchant_a:\n        vendor_api_key: "a"\n    merchant_b:\n        vendor_api_key: "b"\n'
+    )
+
+def run_batch( registry: TenantRegistry, tenant: str, file: str, output: str ) -> list:
+    with registry.acquire( tenant ) as client:
+        client.context[ "batch" ][ 0 ]( file, output )
+
+    with open( output ) as f:
+        return [ json.loads( line ) for line in f ]
+
+def test_tenants_keep_separate_stores_journals_and_batch_keys( standin, tmp_path ):
+    config = tenant_config( standin, tmp_path )
+    batch: str = str( tmp_path / "batch.jsonl" )
+
+    with open( batch, "w" ) as f:
+        f.write( json.dumps( { "action": "transaction:create", "params": [ "payer", "payee", 1000 ] } ) + "\n" )
+
+    resources: list = []
+
+    def factory( config, api_caller: ApiCaller ) -> dict:
+        resources.append( ( TransactionStore.from_config( config ), RequestJournal.from_config( config ) ) )
+        return build_actions( config, logger, api_caller, *resources[ -1 ] )
+
+    with TenantRegistry( config, logger, factory ) as registry:
+        first_a: list = run_batch( registry, "merchant_a", batch, str( tmp_path / "a1.jsonl" ) )
+        first_b: list = run_batch( registry, "merchant_b", batch, str( tmp_path / "b1.jsonl" ) )
+        second_a: list = run_batch( registry, "merchant_a", batch, str( tmp_path / "a2.jsonl" ) )
+
+    for store, journal in resources:
+        store.close()
+        journal.close()
+
+    assert { store.path for store, journal in resources } == { f"{tmp_path}/grailpay.merchant_a.db", f"{tmp_path}/grailpay.merchant_b.db" }
+    assert first_a[ 0 ][ "status" ] == "ok"
+    assert first_b[ 0 ][ "status" ] == "ok"
+    assert first_a[ 0 ][ "idempotency_key" ] != first_b[ 0 ][ "idempotency_key" ]
+    assert second_a[ 0 ][ "status" ] == "skipped"
@@ -0,0 +1,37 @@
+import csv
+import logging
+
+import pytest
+
+from core.transaction_export import TransactionExport
+from tests.benchmark.benchmark import Benchmark
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+@pytest.mark.parametrize( "format", TransactionExport.FORMATS )
+def test_export_without_matches_writes_the_columns( standin_config, tmp_path, format ):
+    if format == "parquet":
+        pyarrow = pytest.importorskip( "pyarrow.parquet" )
+
+    benchmark = Benchmark( standin_config )
+    output: str = str( tmp_path / f"transactions.{format}" )
+    aggregates: dict = TransactionExport( benchmark.transaction_api, logger ).export( output, status = "no_such_status" )
+    benchmark.close()
+
+    assert aggregates[ "count" ] == 0
+
+    if format == "parquet":
+        table = pyarrow.read_table( output )
+        assert table.num_rows == 0
+        assert tuple( table.column_names ) == TransactionExport.COLUMNS
+    else:
+        assert list( csv.reader( open( output ) ) ) == [ list( TransactionExport.COLUMNS ) ]
+
+def test_export_rejects_unknown_format( standin_config, tmp_path ):
+    benchmark = Benchmark( standin_config )
+
+    with pytest.raises( ValueError ):
+        TransactionExport( benchmark.transaction_api, logger ).export( str( tmp_path / "transactions.json" ), format = "json" )
+    benchmark.close()
+
+    assert not ( tmp_path / "transactions.json" ).exists()
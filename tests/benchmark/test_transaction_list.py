@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from urllib.parse import parse_qsl, urlsplit
+
+import pytest
+
+from api.async_api_caller import AsyncApiCaller
+from api.async_transaction_api import AsyncTransactionApi
+from api.endpoints import Endpoints
+from tests.benchmark.benchmark import Benchmark
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def fail_page( standin, page: int ) -> None:
+    standin.fail_request = lambda method, path, body: path.endswith( "/transactions" ) and int( body.get( "page", 1 ) ) == page
+
+@pytest.mark.parametrize( "stream", [ False, True ] )
+def test_failed_page_raises_instead_of_truncating( standin, standin_config, stream ):
+    standin_config.RETRY_MAX_ATTEMPTS = 1
+    fail_page( standin, 3 )
+
+    benchmark = Benchmark( standin_config )
+    transactions: list = []
+
+    with pytest.raises( RuntimeError ):
+        for transaction in benchmark.transaction_api.iter_transactions( page_size = 40, stream = stream ):
+            transactions.append( transaction )
+
+    benchmark.close()
+
+    assert len( transactions ) == 80
+
+def test_standin_rejects_empty_list_filters( standin, standin_config ):
+    benchmark = Benchmark( standin_config )
+    url: str = benchmark.transaction_api.endpoints.get_url( Endpoints.TRANSACTION_LIST )
+
+    rejected: int = benchmark.api_caller.session.get( url, params = { "pageSize": 10, "status": "" } ).status_code
+    accepted: int = benchmark.api_caller.session.get( url, params = { "pageSize": 10 } ).status_code
+    benchmark.close()
+
+    assert ( rejected, accepted ) == ( 422, 200 )
+
+def test_async_list_follows_every_page_without_empty_filters( standin, standin_config ):
+    queries: list = []
+    handle = standin.handle
+
+    def record( method: str, target: str, headers, raw: bytes ):
+        queries.append( parse_qsl( urlsplit( target ).query + "&" + raw.decode(), keep_blank_values = True ) )
+        return handle( method, target, headers, raw )
+
+    standin.handle = record
+
+    async def list_all() -> list:
+        async with AsyncApiCaller( standin_config, logger ) as api_caller:
+            return await AsyncTransactionApi( standin_config, logger, api_caller ).list( page_size = 100 )
+
+    transactions: list = asyncio.run( list_all() )
+
+    assert len( transactions ) == 250
+    assert len( { transaction[ "uuid" ] for transaction in transactions } ) == 250
+    assert len( queries ) == 3
+    assert [ dict( query ).get( "page" ) for query in queries ] == [ "1", "2", "3" ]
+    assert all( value for query in queries for key, value in query )
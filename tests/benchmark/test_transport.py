@@ -0,0 +1,48 @@
+import logging
+import uuid
+
+import pytest
+import requests
+
+from tests.benchmark.benchmark import Benchmark, write_config
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def transport_config( standin, tmp_path, mode: str ):
+    return write_config(
+        str( tmp_path / f"{mode}.yaml" ),
+        standin.base_url,
+        f'transport:\n    mode: "{mode}"\n    archive: "{tmp_path}/traffic.jsonl"\nretry:\n    max_attempts: 1\n'
+    )
+
+def session( benchmark: Benchmark, transaction_uuid: str ) -> list:
+    transaction_api = benchmark.transaction_api
+    before: str = transaction_api.get( transaction_uuid )[ "capture_status" ]
+    transaction_api.cancel( transaction_uuid )
+
+    return [
+        before,
+        transaction_api.get( transaction_uuid )[ "capture_status" ],
+        transaction_api.get( transaction_uuid )[ "capture_status" ],
+        bool( transaction_api.create( "payer", "payee", 1000, idempotency_key = str( uuid.uuid4() ) ) )
+    ]
+
+def test_replay_answers_recorded_requests_in_order( standin, tmp_path ):
+    transaction_uuid: str = standin.state.order[ 0 ]
+
+    recorder = Benchmark( transport_config( standin, tmp_path, "record" ), logger )
+    recorded: list = session( recorder, transaction_uuid )
+    recorder.close()
+
+    standin.stop()
+
+    replayer = Benchmark( transport_config( standin, tmp_path, "replay" ), logger )
+    replayed: list = session( replayer, transaction_uuid )
+
+    with pytest.raises( requests.ConnectionError ):
+        replayer.transaction_api.get( standin.state.order[ 1 ] )
+    replayer.close()
+
+    assert recorded[ 0 ] != "canceled"
+    assert recorded[ 1: ] == [ "canceled", "canceled", True ]
+    assert replayed == recorded
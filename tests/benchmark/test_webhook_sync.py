@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+from api.api_caller import ApiCaller
+from api.webhook_api import WebhookApi
+from core.webhook_sync import WebhookSync
+from tests.benchmark.benchmark import write_config
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+@pytest.mark.parametrize( "dry_run, prune, registered, pruned", [
+    ( None, None, True, True ),
+    ( None, "false", True, False ),
+    ( None, "0", True, False ),
+    ( None, "", True, True ),
+    ( "false", "true", True, True ),
+    ( "", "", False, False )
+] )
+def test_sync_parses_prune_and_dry_run( standin, tmp_path, dry_run, prune, registered, pruned ):
+    config = write_config(
+        str( tmp_path / "config.yaml" ),
+        standin.base_url,
+        'webhook_subscriptions:\n    prune: True\n    urls:\n        "https://new.test/hook": "*"\n'
+    )
+    standin.state.webhooks.add( ( WebhookApi.WEBHOOK_EVENTS[ 0 ], "https://old.test/hook" ) )
+
+    with ApiCaller( config, logger ) as api_caller:
+        summary: dict = WebhookSync( config, WebhookApi( config, logger, api_caller ), logger ).run( dry_run = dry_run, prune = prune )
+
+    urls: set = { url for event, url in standin.state.webhooks }
+
+    assert summary[ "failed" ] == 0
+    assert ( "https://new.test/hook" in urls ) == registered
+    assert ( "https://old.test/hook" not in urls ) == pruned
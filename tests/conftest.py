@@ -0,0 +1,15 @@
+import pytest
+
+from tests.standin.grailpay_standin import GrailPayStandin
+from tests.benchmark.benchmark import write_config
+
+@pytest.fixture
+def standin():
+    server = GrailPayStandin().start()
+    server.state.seed( 250 )
+    yield server
+    server.stop()
+
+@pytest.fixture
+def standin_config( standin, tmp_path ):
+    return write_config( str( tmp_path / "config.yaml" ), standin.base_url )
@@ -0,0 +1,393 @@
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from urllib.parse import parse_qsl, urlsplit
+
+class GrailPayState:
+    """
+    In-memory state behind the stand-in server.
+    """
+
+    def __init__( self ) -> None:
+        self.lock: threading.Lock = threading.Lock()
+        self.transactions: dict = {}
+        self.order: list = []
+        self.refunds: dict = {}
+        self.references: dict = {}
+        self.businesses: dict = {}
+        self.webhooks: set = set()
+        self.settle_after: float = 0.0
+        self.created: dict = {}
+
+    def add_transaction( self, payer_uuid: str, payee_uuid: str | None, amount: int, created_at: datetime | None = None, **extra ) -> dict:
+        created_at = created_at or datetime.now( timezone.utc )
+        timestamp: str = created_at.strftime( "%Y-%m-%d %H:%M:%S" )
+
+        transaction: dict = {
+            "uuid": str( uuid.uuid4() ),
+            "payer_uuid": payer_uuid,
+            "payee_uuid": payee_uuid,
+            "amount": int( amount ),
+            "capture_status": "pending",
+            "payout_status": "pending",
+            "client_reference_id": "",
+            "created_at": timestamp,
+            "updated_at": timestamp,
+            **extra
+        }
+
+        with self.lock:
+            self.transactions[ transaction[ "uuid" ] ] = transaction
+            self.order.append( transaction[ "uuid" ] )
+            self.refunds[ transaction[ "uuid" ] ] = []
+            if transaction[ "client_reference_id" ]:
+                self.references[ transaction[ "client_reference_id" ] ] = transaction
+
+        return transaction
+
+    def seed( self, count: int, days: int = 30 ) -> None:
+        """
+        This method adds count transactions spread over the last number of days.
+
+        :param count:
+        :param days:
+        :return:
+        """
+
+        now: datetime = datetime.now( timezone.utc )
+        statuses: tuple = ( "pending", "completed", "completed", "completed", "failed" )
+
+        for index in range( count ):
+            created_at: datetime = now - timedelta( seconds = random.randint( 0, days * 86400 ) )
+            transaction: dict = self.add_transaction( str( uuid.uuid4() ), str( uuid.uuid4() ), random.randint( 100, 100000 ), created_at )
+            transaction[ "capture_status" ] = random.choice( statuses )
+            transaction[ "payout_status" ] = "completed" if transaction[ "capture_status" ] == "completed" else "pending"
+
+        with self.lock:
+            self.order.sort( key = lambda key: self.transactions[ key ][ "created_at" ] )
+
+    def settle( self, transaction: dict ) -> None:
+        """
+        This method advances a transaction created through the API: its capture completes settle_after seconds
+        after creation and its payout completes settle_after seconds later.
+
+        :param transaction:
+        :return:
+        """
+
+        created: float | None = self.created.get( transaction[ "uuid" ] )
+        if not self.settle_after or created is None or transaction[ "capture_status" ] != "pending" and transaction[ "payout_status" ] != "pending":
+            return
+
+        age: float = time.monotonic() - created
+
+        with self.lock:
+            if transaction[ "capture_status" ] == "pending" and age >= self.settle_after:
+                transaction[ "capture_status" ] = "completed"
+                transaction[ "updated_at" ] = datetime.now( timezone.utc ).strftime( "%Y-%m-%d %H:%M:%S" )
+            if transaction[ "capture_status" ] == "completed" and transaction[ "payout_status" ] == "pending" and age >= self.settle_after * 2:
+                transaction[ "payout_status" ] = "completed"
+                transaction[ "updated_at" ] = datetime.now( timezone.utc ).strftime( "%Y-%m-%d %H:%M:%S" )
+
+class StandinHandler( BaseHTTPRequestHandler ):
+    protocol_version: str = "HTTP/1.1"
+    disable_nagle_algorithm: bool = True
+
+    server: 'GrailPayStandin'
+
+    def log_message( self, format, *args ) -> None:
+        pass
+
+    def do_GET( self ) -> None:
+        self.route( "GET" )
+
+    def do_POST( self ) -> None:
+        self.route( "POST" )
+
+    def do_PUT( self ) -> None:
+        self.route( "PUT" )
+
+    def do_DELETE( self ) -> None:
+        self.route( "DELETE" )
+
+    def read_body( self ) -> bytes:
+        length: int = int( self.headers.get( "Content-Length" ) or 0 )
+
+        return self.rfile.read( length ) if length else b""
+
+    def send( self, status: int, payload: dict | None = None, headers: dict | None = None ) -> None:
+        body: bytes = json.dumps( payload if payload is not None else {} ).encode()
+
+        self.send_response( status )
+        self.send_header( "Content-Type", "application/json" )
+        self.send_header( "Content-Length", str( len( body ) ) )
+        for name, value in ( headers or {} ).items():
+            self.send_header( name, value )
+        self.end_headers()
+        self.wfile.write( body )
+
+    def route( self, method: str ) -> None:
+        self.send( *self.server.handle( method, self.path, self.headers, self.read_body() ) )
+
+
+def webhook_register( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    with state.lock:
+        for url in body.get( "webhook_url", [] ):
+            for event in body.get( "event_names", [] ):
+                state.webhooks.add( ( event, url ) )
+
+    return 201, { "message": "Webhook registered." }
+
+def webhook_deregister( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    with state.lock:
+        for url in body.get( "webhook_url", [] ):
+            for event in body.get( "event_names", [] ):
+                state.webhooks.discard( ( event, url ) )
+
+    return 200, { "message": "Webhook deregistered." }
+
+def webhook_fetch( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    with state.lock:
+        rows: list = [ { "event_name": event, "webhook_url": url } for event, url in sorted( state.webhooks ) ]
+
+    return 200, { "data": rows }
+
+def business_create( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    business: dict = { "uuid": str( uuid.uuid4() ), "email": body.get( "email" ), "status": "active" }
+
+    with state.lock:
+        state.businesses[ business[ "uuid" ] ] = business
+
+    return 201, { "data": business }
+
+def transaction_create( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    if not body.get( "payer_uuid" ) or not body.get( "amount" ):
+        return 422, { "message": "The given data was invalid." }
+
+    existing: dict | None = state.references.get( body.get( "client_reference_id" ) or "" )
+    if existing is not None:
+        return 201, { "data": existing }
+
+    transaction: dict = state.add_transaction(
+        body[ "payer_uuid" ],
+        body.get( "payee_uuid" ),
+        body[ "amount" ],
+        client_reference_id = body.get( "client_reference_id" ) or "",
+        processor_mid = body.get( "processor_mid" )
+    )
+    state.created[ transaction[ "uuid" ] ] = time.monotonic()
+
+    return 201, { "data": transaction }
+
+def transaction_fetch( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    transaction: dict | None = state.transactions.get( segments[ 3 ] )
+    if transaction is None:
+        return 404, { "message": "Transaction not found." }
+
+    state.settle( transaction )
+
+    return 200, { "data": transaction }
+
+def transaction_cancel( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    transaction: dict | None = state.transactions.get( segments[ 3 ] )
+    if transaction is None:
+        return 404, { "message": "Transaction not found." }
+
+    with state.lock:
+        transaction[ "capture_status" ] = "canceled"
+        transaction[ "updated_at" ] = datetime.now( timezone.utc ).strftime( "%Y-%m-%d %H:%M:%S" )
+
+    return 200, { "data": transaction }
+
+def transaction_list( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    if any( value in ( "", None ) for value in body.values() ):
+        return 422, { "message": "The given data was invalid." }
+
+    page: int = max( 1, int( body.get( "page", 1 ) ) )
+    page_size: int = max( 1, int( body.get( "pageSize", 50 ) ) )
+
+    with state.lock:
+        transactions: list = [ state.transactions[ key ] for key in reversed( state.order ) ]
+
+    if body.get( "status" ):
+        transactions = [ t for t in transactions if body[ "status" ] in ( t[ "capture_status" ], t[ "payout_status" ] ) ]
+    if body.get( "fromDate" ):
+        transactions = [ t for t in transactions if t[ "created_at" ][ :10 ] >= body[ "fromDate" ] ]
+    if body.get( "toDate" ):
+        transactions = [ t for t in transactions if t[ "created_at" ][ :10 ] <= body[ "toDate" ] ]
+    if body.get( "updatedFrom" ):
+        transactions = [ t for t in transactions if t[ "updated_at" ] >= body[ "updatedFrom" ] ]
+
+    last_page: int = max( 1, -( -len( transactions ) // page_size ) )
+    start: int = ( page - 1 ) * page_size
+
+    return 200, {
+        "data": {
+            "transactions": transactions[ start:start + page_size ],
+            "pagination": { "page": page, "page_size": page_size, "total": len( transactions ), "last_page": last_page }
+        }
+    }
+
+def transaction_refund( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    transaction: dict | None = state.transactions.get( segments[ 3 ] )
+    if transaction is None:
+        return 404, { "message": "Transaction not found." }
+
+    refund: dict = {
+        "uuid": str( uuid.uuid4() ),
+        "transaction_uuid": transaction[ "uuid" ],
+        "amount": int( body.get( "amount", 0 ) ),
+        "status": "pending",
+        "client_reference_id": body.get( "client_reference_id" ) or "",
+        "created_at": datetime.now( timezone.utc ).strftime( "%Y-%m-%d %H:%M:%S" )
+    }
+
+    with state.lock:
+        refunded: int = sum( r[ "amount" ] for r in state.refunds[ transaction[ "uuid" ] ] )
+        if refunded + refund[ "amount" ] > transaction[ "amount" ]:
+            return 422, { "message": "Refund exceeds the refundable amount." }
+        state.refunds[ transaction[ "uuid" ] ].append( refund )
+
+    return 201, { "data": refund }
+
+def transaction_fetch_refunds( state: GrailPayState, segments: list, body: dict ) -> tuple[int, dict]:
+    if segments[ 3 ] not in state.refunds:
+        return 404, { "message": "Transaction not found." }
+
+    return 200, { "data": list( state.refunds[ segments[ 3 ] ] ) }
+
+class GrailPayStandin( ThreadingHTTPServer ):
+    """
+    Local stand-in for the GrailPay API implementing every path in api/endpoints.py.
+
+    Latency, jitter and a failure rate can be configured to exercise the client's pooling and retry paths.
+    """
+
+    daemon_threads: bool = True
+    handler_class: type = StandinHandler
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 503,
+        prefix: str = "/3p",
+        settle_after: float = 0.0
+    ) -> None:
+        super().__init__( ( "127.0.0.1", port ), self.handler_class )
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.failure_rate: float = failure_rate
+        self.failure_status: int = failure_status
+        self.fail_request: Callable[[str, str, dict], bool] | None = None
+        self.prefix: str = prefix
+        self.state: GrailPayState = GrailPayState()
+        self.state.settle_after = settle_after
+        self.thread: threading.Thread | None = None
+        self.routes: dict = {
+            ( "POST", "api/v1/webhook" ): webhook_register,
+            ( "DELETE", "api/v1/webhook" ): webhook_deregister,
+            ( "GET", "api/v1/webhook" ): webhook_fetch,
+            ( "POST", "api/v2/businesses" ): business_create,
+            ( "POST", "api/v1/transaction" ): transaction_create,
+            ( "GET", "api/v1/transaction/{uuid}" ): transaction_fetch,
+            ( "DELETE", "api/v1/transaction/{uuid}" ): transaction_cancel,
+            ( "GET", "api/v2/transactions" ): transaction_list,
+            ( "POST", "api/v1/transactions/{uuid}/refund" ): transaction_refund,
+            ( "GET", "api/v1/transactions/{uuid}/refunds" ): transaction_fetch_refunds,
+        }
+
+    @staticmethod
+    def route_key( segments: list ) -> str:
+        if len( segments ) >= 4 and segments[ 2 ] in ( "transaction", "transactions" ):
+            return "/".join( segments[ :3 ] + [ "{uuid}" ] + segments[ 4: ] )
+
+        return "/".join( segments )
+
+    @staticmethod
+    def parse_body( raw: bytes, content_type: str ) -> dict:
+        if not raw:
+            return {}
+
+        if "json" in content_type and raw[ :1 ] in ( b"{", b"[" ):
+            return json.loads( raw )
+
+        return dict( parse_qsl( raw.decode(), keep_blank_values = True ) )
+
+    def handle( self, method: str, target: str, headers, raw: bytes ) -> tuple[int, dict, dict | None]:
+        """
+        This method answers one request, whatever protocol it arrived over.
+
+        :param method:
+        :param target: The request path and query.
+        :param headers: A mapping with a case-insensitive get.
+        :param raw: The request body.
+        :return: The status, JSON payload and extra headers.
+        """
+
+        body: dict = self.parse_body( raw, headers.get( "Content-Type" ) or "" )
+        url = urlsplit( target )
+        body.update( dict( parse_qsl( url.query, keep_blank_values = True ) ) )
+
+        path: str = url.path
+        if path.startswith( self.prefix ):
+            path = path[ len( self.prefix ): ]
+
+        if self.latency:
+            time.sleep( self.latency + random.uniform( 0, self.jitter ) )
+
+        if not ( headers.get( "Authorization" ) or "" ).startswith( "Bearer " ):
+            return 401, { "message": "Unauthenticated." }, None
+
+        if self.failure_rate and random.random() < self.failure_rate:
+            return self.failure_status, { "message": "Injected failure." }, { "Retry-After": "0" }
+
+        if self.fail_request is not None and self.fail_request( method, path, body ):
+            return self.failure_status, { "message": "Injected failure." }, { "Retry-After": "0" }
+
+        segments: list = [ segment for segment in path.split( "/" ) if segment ]
+        handler = self.routes.get( ( method, self.route_key( segments ) ) )
+
+        if handler is None:
+            return 404, { "message": "Not found." }, None
+
+        status, payload = handler( self.state, segments, body )
+
+        return status, payload, None
+
+    @property
+    def base_url( self ) -> str:
+        return f"http://127.0.0.1:{self.server_address[ 1 ]}{self.prefix}"
+
+    def start( self ) -> 'GrailPayStandin':
+        self.thread = threading.Thread( target = self.serve_forever, daemon = True )
+        self.thread.start()
+        return self
+
+    def stop( self ) -> None:
+        self.shutdown()
+        self.server_close()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser( description = "Local GrailPay API stand-in" )
+    parser.add_argument( "--port", type = int, default = 8090 )
+    parser.add_argument( "--latency", type = float, default = 0.0 )
+    parser.add_argument( "--jitter", type = float, default = 0.0 )
+    parser.add_argument( "--failure-rate", type = float, default = 0.0 )
+    parser.add_argument( "--seed", type = int, default = 1000 )
+    parser.add_argument( "--settle-after", type = float, default = 0.0 )
+    arguments = parser.parse_args()
+
+    standin = GrailPayStandin( arguments.port, arguments.latency, arguments.jitter, arguments.failure_rate, settle_after = arguments.settle_after )
+    standin.state.seed( arguments.seed )
+    print( f"GrailPay stand-in listening on {standin.base_url}" )
+    standin.serve_forever()
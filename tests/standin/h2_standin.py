@@ -0,0 +1,135 @@
+import json
+import socket
+import socketserver
+import threading
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.exceptions
+
+from tests.standin.grailpay_standin import GrailPayStandin
+
+class H2Headers( dict ):
+    """
+    Request headers of an HTTP/2 stream, looked up case-insensitively like http.server headers.
+    """
+
+    def get( self, name: str, default = None ):
+        return super().get( name.lower(), default )
+
+class H2StandinHandler( socketserver.BaseRequestHandler ):
+    """
+    Serves one cleartext HTTP/2 connection with prior knowledge. Each stream is answered on its own thread,
+    so concurrent requests are multiplexed over the connection instead of queued behind each other.
+    """
+
+    server: 'H2Standin'
+
+    def setup( self ) -> None:
+        self.request.setsockopt( socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 )
+        self.connection: h2.connection.H2Connection = h2.connection.H2Connection(
+            h2.config.H2Configuration( client_side = False, header_encoding = "utf-8" )
+        )
+        self.window: threading.Condition = threading.Condition()
+        self.streams: dict = {}
+
+    def flush( self ) -> None:
+        data: bytes = self.connection.data_to_send()
+        if data:
+            self.request.sendall( data )
+
+    def handle( self ) -> None:
+        with self.window:
+            self.connection.initiate_connection()
+            self.flush()
+
+        self.server.count_connection()
+
+        while True:
+            try:
+                data: bytes = self.request.recv( 65535 )
+            except OSError:
+                break
+            if not data:
+                break
+
+            with self.window:
+                events: list = self.connection.receive_data( data )
+                self.flush()
+
+            for event in events:
+                if isinstance( event, h2.events.RequestReceived ):
+                    self.streams[ event.stream_id ] = ( H2Headers( event.headers ), bytearray() )
+                elif isinstance( event, h2.events.DataReceived ):
+                    self.streams[ event.stream_id ][ 1 ].extend( event.data )
+                    with self.window:
+                        self.connection.acknowledge_received_data( event.flow_controlled_length, event.stream_id )
+                        self.flush()
+                elif isinstance( event, h2.events.StreamEnded ):
+                    headers, body = self.streams.pop( event.stream_id )
+                    threading.Thread( target = self.respond, args = ( event.stream_id, headers, bytes( body ) ), daemon = True ).start()
+                elif isinstance( event, h2.events.WindowUpdated ):
+                    with self.window:
+                        self.window.notify_all()
+                elif isinstance( event, h2.events.ConnectionTerminated ):
+                    return
+
+    def respond( self, stream_id: int, headers: H2Headers, body: bytes ) -> None:
+        status, payload, extra = self.server.handle( headers[ ":method" ], headers[ ":path" ], headers, body )
+        content: bytes = json.dumps( payload if payload is not None else {} ).encode()
+
+        response_headers: list = [
+            ( ":status", str( status ) ),
+            ( "content-type", "application/json" ),
+            ( "content-length", str( len( content ) ) )
+        ] + [ ( name.lower(), value ) for name, value in ( extra or {} ).items() ]
+
+        try:
+            with self.window:
+                self.connection.send_headers( stream_id, response_headers )
+                self.flush()
+
+                while True:
+                    size: int = min( len( content ), self.connection.local_flow_control_window( stream_id ), self.connection.max_outbound_frame_size )
+                    if size <= 0 and content:
+                        self.window.wait( 1.0 )
+                        continue
+
+                    self.connection.send_data( stream_id, content[ :size ], end_stream = size == len( content ) )
+                    self.flush()
+                    content = content[ size: ]
+                    if not content:
+                        break
+        except ( OSError, h2.exceptions.StreamClosedError ):
+            pass
+
+class H2Standin( GrailPayStandin ):
+    """
+    The GrailPay stand-in served over cleartext HTTP/2 with prior knowledge, for exercising the http2 transport.
+    """
+
+    handler_class: type = H2StandinHandler
+
+    def __init__( self, *args, **kwargs ) -> None:
+        super().__init__( *args, **kwargs )
+        self.connections: int = 0
+        self.connections_lock: threading.Lock = threading.Lock()
+
+    def count_connection( self ) -> None:
+        with self.connections_lock:
+            self.connections += 1
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser( description = "Local GrailPay API stand-in over cleartext HTTP/2" )
+    parser.add_argument( "--port", type = int, default = 8091 )
+    parser.add_argument( "--latency", type = float, default = 0.0 )
+    parser.add_argument( "--seed", type = int, default = 1000 )
+    arguments = parser.parse_args()
+
+    standin = H2Standin( arguments.port, arguments.latency )
+    standin.state.seed( arguments.seed )
+    print( f"GrailPay HTTP/2 stand-in listening on {standin.base_url}" )
+    standin.serve_forever()
@@ -0,0 +1,27 @@
+import pytest
+
+from core.config import Config
+
+@pytest.fixture
+def make_config( tmp_path ):
+    """
+    Returns a function writing a config.yaml with the required keys plus extra yaml, and loading it.
+    """
+
+    def make( extra: str = "" ) -> Config:
+        path = tmp_path / "config.yaml"
+        path.write_text(
+            "environment: sandbox\n"
+            "log_level: warning\n"
+            "base_url: \"http://localhost\"\n"
+            "authentication:\n"
+            "    processor_api_key: \"processor\"\n"
+            "    vendor_api_key: \"vendor\"\n"
+            "onboarding:\n"
+            "    kyb: True\n"
+            "routing_number: \"011401533\"\n"
+            + extra
+        )
+        return Config( str( path ) )
+
+    return make
@@ -0,0 +1,32 @@
+import threading
+import time
+
+from core.bounded_pool import map_unordered
+
+def test_map_unordered_pulls_items_as_slots_free_up():
+    pulled: list = []
+    running: list = []
+    peak: list = [ 0 ]
+    lock: threading.Lock = threading.Lock()
+
+    def items():
+        for index in range( 40 ):
+            pulled.append( index )
+            yield ( index, )
+
+    def work( index: int ) -> int:
+        with lock:
+            running.append( index )
+            peak[ 0 ] = max( peak[ 0 ], len( running ) )
+        time.sleep( 0.005 )
+        with lock:
+            running.remove( index )
+        return index
+
+    results: list = []
+    for result in map_unordered( work, items(), 4, max_pending = 6 ):
+        results.append( result )
+        assert len( pulled ) <= len( results ) + 6
+
+    assert sorted( results ) == list( range( 40 ) )
+    assert peak[ 0 ] <= 4
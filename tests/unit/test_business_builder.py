@@ -0,0 +1,47 @@
+import time
+
+from core.business_builder import BUSINESS_DETAILS, BusinessBuilder
+
+def test_generated_businesses_share_no_nested_dicts( make_config ):
+    first, second = BusinessBuilder( make_config() ).generate_many( 2, seed = 1 )
+
+    first.business[ "address" ][ "city" ] = "Denver"
+    first.business[ "industry_classification" ][ "codes" ].append( "NAICS 52" )
+    first.business_owners[ 0 ][ "address" ][ "zip" ] = "80202"
+
+    assert second.business[ "address" ][ "city" ] == BUSINESS_DETAILS[ "address" ][ "city" ] == "Littleton"
+    assert second.business[ "industry_classification" ][ "codes" ] == [ "NAICS 42", "NAICS 45" ]
+    assert second.business_owners[ 0 ][ "address" ][ "zip" ] == "80127"
+
+def best_of( repeat: int, run ) -> float:
+    timings: list = []
+
+    for _ in range( repeat ):
+        started: float = time.perf_counter()
+        run()
+        timings.append( time.perf_counter() - started )
+
+    return min( timings )
+
+def test_generate_many_outpaces_the_builder_loop( make_config ):
+    builder = BusinessBuilder( make_config() )
+    count: int = 5000
+
+    def builder_loop() -> None:
+        for _ in range( count ):
+            builder.random_email().random_tin().random_account_routing().build()
+
+    def random_fields() -> None:
+        for _ in range( count ):
+            builder.random_email().random_tin().random_account_routing()
+
+    def templates() -> None:
+        for _ in range( count ):
+            builder.make_business( "user@test.com", "123456789", "123456789012", "011401533" )
+
+    def generated() -> None:
+        for _ in builder.generate_many( count, seed = 1 ):
+            pass
+
+    assert best_of( 3, templates ) < best_of( 3, random_fields )
+    assert best_of( 3, generated ) < best_of( 3, builder_loop )
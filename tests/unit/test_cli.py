@@ -0,0 +1,38 @@
+from core.cli import run_action
+
+def fetch( transaction_uuid: str, verbose: str | None = None ) -> bool:
+    return transaction_uuid == "known"
+
+def create( amount: str ) -> str:
+    return "" if amount == "0" else "t-1"
+
+def serve( host: str | None = None ) -> None:
+    pass
+
+def track( file: str, **options ) -> dict:
+    return options
+
+ACTIONS: dict = {
+    "transaction:fetch": ( fetch, 1, "{transaction_uuid} [--verbose]" ),
+    "transaction:create": ( create, 1, "{amount_in_cents}" ),
+    "webhook:serve": ( serve, 0, "[--host host]" ),
+    "transaction:track": ( track, 1, "{file}" )
+}
+
+def test_run_action_exit_code_follows_the_action_result():
+    assert run_action( ACTIONS, [ "transaction:fetch", "known" ] ) == 0
+    assert run_action( ACTIONS, [ "transaction:fetch", "missing" ] ) == 1
+    assert run_action( ACTIONS, [ "transaction:create", "1000" ] ) == 0
+    assert run_action( ACTIONS, [ "transaction:create", "0" ] ) == 1
+    assert run_action( ACTIONS, [ "webhook:serve", "--host", "127.0.0.1" ] ) == 0
+
+def test_run_action_rejects_unknown_options_with_usage( capsys ):
+    assert run_action( ACTIONS, [ "transaction:fetch", "known", "--verbose", "--limit", "10" ] ) == 1
+    assert run_action( ACTIONS, [ "transaction:fetch", "known", "--transaction_uuid", "other" ] ) == 1
+    assert run_action( ACTIONS, [ "transaction:track", "uuids.txt", "--anything", "1" ] ) == 0
+
+    output: str = capsys.readouterr().out
+
+    assert "Unknown option for transaction:fetch: --limit" in output
+    assert "Unknown option for transaction:fetch: --transaction_uuid" in output
+    assert "Usage: python grailpay.py transaction:fetch {transaction_uuid} [--verbose]" in output
@@ -0,0 +1,78 @@
+import logging
+import socket
+import threading
+
+from core.daemon import CommandDaemon, forward
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def test_forward_falls_back_only_when_no_daemon_accepts( tmp_path ):
+    path: str = str( tmp_path / "stale.sock" )
+
+    with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as stale:
+        stale.bind( path )
+
+    assert forward( [ "transaction:fetch", "uuid" ], path ) is None
+
+def test_forward_reports_a_daemon_dying_mid_command( tmp_path, capsys ):
+    path: str = str( tmp_path / "grailpay.sock" )
+    received: list = []
+
+    with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as server:
+        server.bind( path )
+        server.listen( 1 )
+
+        def accept_and_die() -> None:
+            connection, address = server.accept()
+            with connection:
+                received.append( connection.makefile( "r" ).readline() )
+
+        thread: threading.Thread = threading.Thread( target = accept_and_die )
+        thread.start()
+
+        exit_code: int | None = forward( [ "transaction:create", "payer", "payee", "1000" ], path )
+        thread.join()
+
+    assert received and "transaction:create" in received[ 0 ]
+    assert exit_code == 1
+    assert "may or may not have run" in capsys.readouterr().err
+
+def test_forward_runs_long_and_file_commands_locally( tmp_path ):
+    path: str = str( tmp_path / "grailpay.sock" )
+
+    with socket.socket( socket.AF_UNIX, socket.SOCK_STREAM ) as server:
+        server.bind( path )
+        server.listen( 1 )
+        server.settimeout( 0.1 )
+
+        exit_codes: list = [
+            forward( args, path ) for args in (
+                [ "batch", "rows.json" ],
+                [ "webhook:serve" ],
+                [ "transaction:backfill", "--shards", "4" ],
+                [ "--tenant", "acme", "business:generate", "10" ]
+            )
+        ]
+
+        try:
+            server.accept()
+            accepted: bool = True
+        except socket.timeout:
+            accepted = False
+
+    assert exit_codes == [ None, None, None, None ]
+    assert not accepted
+
+def test_daemon_answers_malformed_lines_with_an_error():
+    daemon = CommandDaemon( lambda args: 0, logger )
+
+    responses: list = [
+        daemon.respond( "{not json" ),
+        daemon.respond( '{"command": []}' ),
+        daemon.respond( '{"args": "transaction:fetch"}' ),
+        daemon.respond( 'transaction:fetch "unterminated', command_lines = True ),
+        daemon.respond( '{"args": ["transaction:fetch", "uuid"]}' )
+    ]
+
+    assert [ response[ "exit_code" ] for response in responses ] == [ 1, 1, 1, 1, 0 ]
+    assert all( response[ "output" ].startswith( "Malformed command" ) for response in responses[ :4 ] )
@@ -0,0 +1,32 @@
+from types import SimpleNamespace
+
+from core.request_journal import RequestJournal
+
+def test_journal_replay_compacts_to_one_line_per_key( tmp_path ):
+    path: str = str( tmp_path / "journal.jsonl" )
+    journal = RequestJournal( path, fsync = False )
+
+    for attempt in range( 3 ):
+        journal.intent( "retried", "transaction:create", { "amount": 1000 } )
+        journal.outcome( "retried", "error", error = f"attempt {attempt}" )
+    journal.record( "retried", "transaction:create", { "amount": 1000 }, lambda: SimpleNamespace( status_code = 201, content = b'{"data": {"uuid": "t-1"}}', headers = {} ) )
+    journal.intent( "pending", "transaction:refund", { "amount": 10 } )
+    journal.file.write( '{"type": "outcome", "key": "pend' )
+    journal.file.flush()
+
+    states: dict = journal.load()
+
+    assert states == {
+        "retried": { "action": "transaction:create", "status": "ok", "uuid": "t-1" },
+        "pending": { "action": "transaction:refund", "status": "pending", "uuid": None }
+    }
+    assert len( open( path ).readlines() ) == 2
+
+    journal.outcome( "pending", "ok", "r-1" )
+    journal.close()
+
+    reopened = RequestJournal( path, fsync = False )
+    assert reopened.load()[ "pending" ] == { "action": "transaction:refund", "status": "ok", "uuid": "r-1" }
+    assert reopened.load() == reopened.load()
+    assert len( open( path ).readlines() ) == 2
+    reopened.close()
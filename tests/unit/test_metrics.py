@@ -0,0 +1,21 @@
+import threading
+
+from core.metrics import Metrics
+
+def test_metrics_fold_shards_of_finished_threads():
+    metrics = Metrics()
+
+    def record() -> None:
+        metrics.record( "GET", "https://example.test/transaction/12345", 200, 0.01 )
+
+    for _ in range( 20 ):
+        threads: list = [ threading.Thread( target = record ) for _ in range( 10 ) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    record()
+
+    assert len( metrics.shards ) == 1
+    assert metrics.to_dict()[ "GET /transaction/{id}" ][ "count" ] == 201
@@ -0,0 +1,105 @@
+import logging
+import time
+from email.utils import formatdate
+
+import requests
+from requests.adapters import BaseAdapter
+
+from api.api_caller import ApiCaller
+from core.rate_limiter import RateLimiter, TokenBucket
+
+URL: str = "http://grailpay.test/3p/api/v1/transaction/12345"
+
+class ScriptedAdapter( BaseAdapter ):
+    """
+    Answers requests with the given status codes and headers in turn, repeating the last one.
+    """
+
+    def __init__( self, *answers: tuple ) -> None:
+        super().__init__()
+        self.answers: list = list( answers )
+        self.requests: list = []
+
+    def send( self, request: requests.PreparedRequest, **kwargs ) -> requests.Response:
+        self.requests.append( request )
+        status, headers = self.answers.pop( 0 ) if len( self.answers ) > 1 else self.answers[ 0 ]
+
+        response: requests.Response = requests.Response()
+        response.status_code = status
+        response.headers.update( headers )
+        response._content = b"{}"
+        response.request = request
+        response.url = request.url
+
+        return response
+
+    def close( self ) -> None:
+        pass
+
+def scripted_caller( make_config, adapter: ScriptedAdapter ) -> ApiCaller:
+    config = make_config( "rate_limit:\n    requests_per_second: 100\n    burst: 10\nretry:\n    max_attempts: 3\n    backoff_base: 0.001\n" )
+    api_caller = ApiCaller( config, logging.getLogger( "GrailPay Tests" ) )
+    api_caller.session.mount( "http://", adapter )
+
+    return api_caller
+
+def test_bucket_rate_is_aimd():
+    bucket = TokenBucket( 100, 10 )
+
+    bucket.throttled( None )
+    assert bucket.rate == 50
+
+    for _ in range( 10 ):
+        bucket.throttled( None )
+    assert bucket.rate == 5
+
+    for _ in range( 10 ):
+        bucket.succeeded()
+    assert bucket.rate == 55
+
+    for _ in range( 20 ):
+        bucket.succeeded()
+    assert bucket.rate == 100
+
+def test_bucket_waits_for_tokens_and_retry_after():
+    bucket = TokenBucket( 10, 2 )
+
+    assert [ bucket.reserve() for _ in range( 2 ) ] == [ 0.0, 0.0 ]
+    assert 0.09 < bucket.reserve() <= 0.1
+
+    bucket.throttled( 0.5 )
+    assert 0.4 < bucket.reserve() <= 0.5
+    assert TokenBucket( 0, 0 ).reserve() == 0.0
+
+def test_retry_after_parses_seconds_and_dates():
+    assert RateLimiter.retry_after( { "Retry-After": "1.5" } ) == 1.5
+    assert RateLimiter.retry_after( { "Retry-After": "-3" } ) == 0.0
+    assert 8 < RateLimiter.retry_after( { "Retry-After": formatdate( time.time() + 10, usegmt = True ) } ) <= 10
+    assert RateLimiter.retry_after( { "Retry-After": "soon" } ) is None
+    assert RateLimiter.retry_after( {} ) is None
+
+def test_client_honors_retry_after_and_slows_down( make_config ):
+    adapter = ScriptedAdapter( ( 429, { "Retry-After": "0.3" } ), ( 200, {} ) )
+    api_caller = scripted_caller( make_config, adapter )
+
+    start: float = time.perf_counter()
+    response: requests.Response = api_caller.send( "GET", URL )
+    seconds: float = time.perf_counter() - start
+    api_caller.close()
+
+    assert response.status_code == 200
+    assert len( adapter.requests ) == 2
+    assert seconds >= 0.3
+    assert api_caller.rate_limiter.buckets[ "transaction:read" ].rate == 55
+
+def test_client_retries_posts_only_with_an_idempotency_key( make_config ):
+    adapter = ScriptedAdapter( ( 503, { "Retry-After": "0" } ), ( 503, { "Retry-After": "0" } ), ( 201, {} ) )
+    api_caller = scripted_caller( make_config, adapter )
+
+    unkeyed: requests.Response = api_caller.send( "POST", URL )
+    keyed: requests.Response = api_caller.send( "POST", URL, headers = { "Idempotency-Key": "k-1" } )
+    api_caller.close()
+
+    assert unkeyed.status_code == 503
+    assert keyed.status_code == 201
+    assert len( adapter.requests ) == 3
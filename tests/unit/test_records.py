@@ -0,0 +1,42 @@
+import pytest
+
+from core.json_codec import decode_response
+from dto import RefundRecord, TransactionRecord, WebhookRecord
+
+class CountingResponse:
+
+    def __init__( self, content: bytes ) -> None:
+        self.body: bytes = content
+        self.reads: int = 0
+
+    @property
+    def content( self ) -> bytes:
+        self.reads += 1
+        return self.body
+
+def test_decode_response_decodes_each_body_once():
+    response = CountingResponse( b'{"data": {"uuid": "t-1", "amount": 1000}}' )
+
+    first = decode_response( response )
+    second = decode_response( response )
+
+    assert first == { "data": { "uuid": "t-1", "amount": 1000 } }
+    assert first is second
+    assert response.reads == 1
+    assert decode_response( CountingResponse( b"" ) ) is None
+
+def test_records_read_flat_and_nested_parties():
+    flat = TransactionRecord.from_dict( { "uuid": "t-1", "amount": 1000, "payer_uuid": "p-1", "payee_uuid": "p-2", "capture_status": "pending" } )
+    nested = TransactionRecord.from_dict( { "uuid": "t-2", "amount": None, "payer": { "uuid": "p-1" }, "payee": { "uuid": "p-2" } } )
+
+    assert ( flat.payer_uuid, flat.payee_uuid, flat.amount, flat.capture_status ) == ( "p-1", "p-2", 1000, "pending" )
+    assert ( nested.payer_uuid, nested.payee_uuid, nested.amount, nested.capture_status ) == ( "p-1", "p-2", 0, None )
+    assert RefundRecord.from_dict( { "uuid": "r-1", "amount": 300 } ) == RefundRecord( "r-1", amount = 300 )
+    assert WebhookRecord.from_dict( { "event_name": "TransactionStarted", "webhook_url": "https://example.test" } ).event_name == "TransactionStarted"
+
+def test_records_are_slotted():
+    record = TransactionRecord( "t-1" )
+
+    assert not hasattr( record, "__dict__" )
+    with pytest.raises( AttributeError ):
+        record.unknown = 1
@@ -0,0 +1,21 @@
+import json
+
+import requests
+
+from api.transport import ReplayAdapter
+
+def exchange( body: str, response: str ) -> dict:
+    return { "method": "POST", "path": "/api/v2/transactions", "body": body, "status": 201, "headers": {}, "response": response, "seconds": 0.0 }
+
+def replay( adapter: ReplayAdapter, body: str ) -> str:
+    request: requests.PreparedRequest = requests.Request( "POST", "http://localhost/api/v2/transactions", data = body ).prepare()
+    return adapter.send( request ).text
+
+def test_replay_serves_each_exchange_once_across_exact_and_loose_matches( tmp_path ):
+    archive = tmp_path / "traffic.jsonl"
+    archive.write_text( "".join( json.dumps( exchange( body, response ) ) + "\n" for body, response in ( ( "x", "r1" ), ( "y", "r2" ), ( "z", "r3" ) ) ) )
+    adapter = ReplayAdapter( str( archive ) )
+
+    served: list = [ replay( adapter, "y" ), replay( adapter, "w" ), replay( adapter, "w" ), replay( adapter, "w" ), replay( adapter, "y" ) ]
+
+    assert served == [ "r2", "r1", "r3", "r3", "r2" ]
@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from core.response_cache import ResponseCache
+
+URL: str = "https://example.test/3p/api/v1/transaction/12345"
+
+def loader( calls: list, status_code: int = 200, delay: float = 0.0 ):
+    def load():
+        calls.append( time.monotonic() )
+        time.sleep( delay )
+        return SimpleNamespace( status_code = status_code, id = len( calls ) )
+
+    return load
+
+def test_cache_expires_entries_after_their_ttl():
+    cache = ResponseCache( 10, 0.05 )
+    calls: list = []
+
+    first, first_cached = cache.get_or_load( URL, None, loader( calls ) )
+    second, second_cached = cache.get_or_load( URL, None, loader( calls ) )
+    time.sleep( 0.06 )
+    third, third_cached = cache.get_or_load( URL, None, loader( calls ) )
+
+    assert ( first_cached, second_cached, third_cached ) == ( False, True, False )
+    assert first is second is not third
+    assert len( calls ) == 2
+
+def test_cache_evicts_least_recently_used_and_skips_errors():
+    cache = ResponseCache( 2, 30, { "/api/v1/webhook": 0 } )
+    calls: list = []
+
+    for url in ( URL, URL + "6", URL, URL + "7", URL + "6" ):
+        cache.get_or_load( url, None, loader( calls ) )
+    cache.get_or_load( URL + "8", None, loader( calls, 503 ) )
+    cache.get_or_load( URL + "8", None, loader( calls ) )
+    cache.get_or_load( "https://example.test/3p/api/v1/webhook", None, loader( calls ) )
+    cache.get_or_load( "https://example.test/3p/api/v1/webhook", None, loader( calls ) )
+
+    assert len( calls ) == 8
+
+def test_cache_coalesces_concurrent_misses():
+    cache = ResponseCache( 10, 30 )
+    calls: list = []
+
+    with ThreadPoolExecutor( max_workers = 8 ) as executor:
+        results: list = list( executor.map( lambda index: cache.get_or_load( URL, None, loader( calls, delay = 0.1 ) ), range( 8 ) ) )
+
+    assert len( calls ) == 1
+    assert len( { id( response ) for response, cached in results } ) == 1
+    assert sum( not cached for response, cached in results ) == 1
+
+def test_cache_shares_a_failed_load_without_keeping_it():
+    cache = ResponseCache( 10, 30 )
+    started: threading.Event = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep( 0.05 )
+        raise ConnectionError( "down" )
+
+    with ThreadPoolExecutor( max_workers = 2 ) as executor:
+        owner = executor.submit( cache.get_or_load, URL, None, failing )
+        started.wait()
+        waiter = executor.submit( cache.get_or_load, URL, None, loader( [] ) )
+
+        with pytest.raises( ConnectionError ):
+            owner.result()
+        with pytest.raises( ConnectionError ):
+            waiter.result()
+
+    assert cache.get_or_load( URL, None, loader( [] ) )[ 1 ] is False
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import threading
+import time
+import zlib
+
+import pytest
+
+from core.webhook_dispatcher import WebhookDispatcher
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def event( event_id: str, transaction_uuid: str ) -> dict:
+    return { "event_id": event_id, "event_name": "TransactionStarted", "data": { "transaction_uuid": transaction_uuid } }
+
+def dispatcher_config( make_config, tmp_path, timeout: float = 0.05 ):
+    return make_config( f'webhook_dispatcher:\n    workers: 2\n    timeout: {timeout}\n    dead_letters: "{tmp_path}/dead_letters.jsonl"\n' )
+
+def test_dispatcher_bounds_threads_of_timed_out_handlers( make_config, tmp_path ):
+    release: threading.Event = threading.Event()
+    dispatcher = WebhookDispatcher( dispatcher_config( make_config, tmp_path ), logger )
+    dispatcher.on( "TransactionStarted", lambda payload: release.wait( 5 ) )
+
+    async def dispatch_all() -> int:
+        for index in range( 6 ):
+            await dispatcher.dispatch( event( f"e-{index}", f"t-{index}" ) )
+        for lane in dispatcher.lanes:
+            await lane.join()
+
+        threads: int = len( dispatcher.executor._threads )
+        release.set()
+        await dispatcher.close()
+
+        return threads
+
+    assert asyncio.run( dispatch_all() ) <= 2
+    assert dispatcher.counters[ "timeouts" ] == 6
+    assert len( open( tmp_path / "dead_letters.jsonl" ).readlines() ) == 6
+
+@pytest.mark.parametrize( "sync", [ False, True ] )
+def test_dispatcher_keeps_per_uuid_order_while_a_handler_is_slow( make_config, tmp_path, sync ):
+    dispatcher = WebhookDispatcher( dispatcher_config( make_config, tmp_path, timeout = 1 ), logger )
+    handled: list = []
+
+    slow_uuid: str = "t-0"
+    fast_uuid: str = next(
+        f"t-{index}" for index in range( 1, 100 )
+        if zlib.crc32( f"t-{index}".encode() ) % 2 != zlib.crc32( slow_uuid.encode() ) % 2
+    )
+
+    def delay( payload: dict ) -> float:
+        return 0.1 if payload[ "event_id" ] == "slow-0" else 0
+
+    if sync:
+        dispatcher.on( "TransactionStarted", lambda payload: ( time.sleep( delay( payload ) ), handled.append( payload[ "event_id" ] ) ) )
+    else:
+        async def handler( payload: dict ) -> None:
+            await asyncio.sleep( delay( payload ) )
+            handled.append( payload[ "event_id" ] )
+
+        dispatcher.on( "TransactionStarted", handler )
+
+    async def dispatch_all() -> None:
+        for index in range( 5 ):
+            await dispatcher.dispatch( event( f"slow-{index}", slow_uuid ) )
+            await dispatcher.dispatch( event( f"fast-{index}", fast_uuid ) )
+        for lane in dispatcher.lanes:
+            await lane.join()
+        await dispatcher.close()
+
+    asyncio.run( dispatch_all() )
+
+    assert [ event_id for event_id in handled if event_id.startswith( "slow" ) ] == [ f"slow-{index}" for index in range( 5 ) ]
+    assert [ event_id for event_id in handled if event_id.startswith( "fast" ) ] == [ f"fast-{index}" for index in range( 5 ) ]
+    assert handled.index( "fast-4" ) < handled.index( "slow-0" )
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import logging
+
+from core.webhook_server import WebhookServer
+
+logger: logging.Logger = logging.getLogger( "GrailPay Tests" )
+
+def event( event_id: str, transaction_uuid: str = "t-1" ) -> bytes:
+    return json.dumps( { "event_id": event_id, "event_name": "TransactionStarted", "data": { "transaction_uuid": transaction_uuid } } ).encode()
+
+def server_config( make_config, tmp_path, queue_size: int = 100, workers: int = 2 ):
+    return make_config( f'webhook_server:\n    queue_size: {queue_size}\n    workers: {workers}\n    output: "{tmp_path}/events.jsonl"\n' )
+
+async def exchange( port: int, requests: list ) -> list:
+    reader, writer = await asyncio.open_connection( "127.0.0.1", port )
+    responses: list = []
+
+    for method, path, body in requests:
+        writer.write( f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len( body )}\r\n\r\n".encode() + body )
+        await writer.drain()
+
+        head: bytes = await reader.readuntil( b"\r\n\r\n" )
+        length: int = int( [ line for line in head.decode().split( "\r\n" ) if line.lower().startswith( "content-length" ) ][ 0 ].split( ":" )[ 1 ] )
+        responses.append( ( int( head.split( b" " )[ 1 ] ), json.loads( await reader.readexactly( length ) ) ) )
+
+    writer.close()
+
+    return responses
+
+async def deliver( server: WebhookServer, bodies: list, workers: int = 2 ) -> list:
+    server.queue = asyncio.Queue( maxsize = server.config.WEBHOOK_SERVER_QUEUE_SIZE )
+    tasks: list = [ asyncio.create_task( server.worker() ) for _ in range( workers ) ]
+
+    statuses: list = [ server.accept( body )[ 0 ] for body in bodies ]
+    await server.queue.join()
+
+    for task in tasks:
+        task.cancel()
+
+    return statuses
+
+def test_server_processes_redelivery_of_failed_event( make_config, tmp_path ):
+    calls: list = []
+
+    async def handler( payload: dict ) -> None:
+        calls.append( payload[ "event_id" ] )
+        if len( calls ) == 1:
+            raise RuntimeError( "handler unavailable" )
+
+    server = WebhookServer( server_config( make_config, tmp_path ), logger, handler )
+    server.output = open( tmp_path / "events.jsonl", "a" )
+
+    asyncio.run( deliver( server, [ event( "e-1" ) ], 1 ) )
+    asyncio.run( deliver( server, [ event( "e-1" ) ], 1 ) )
+    asyncio.run( deliver( server, [ event( "e-1" ) ], 1 ) )
+    server.output.close()
+
+    assert calls == [ "e-1", "e-1" ]
+    assert server.counters[ "errors" ] == 1
+    assert server.counters[ "processed" ] == 1
+    assert server.counters[ "duplicates" ] == 1
+
+def test_server_waits_for_in_flight_duplicate( make_config, tmp_path ):
+    calls: list = []
+
+    async def handler( payload: dict ) -> None:
+        calls.append( payload[ "event_id" ] )
+        await asyncio.sleep( 0.02 )
+
+    server = WebhookServer( server_config( make_config, tmp_path ), logger, handler )
+    server.output = open( tmp_path / "events.jsonl", "a" )
+
+    asyncio.run( deliver( server, [ event( "e-1" ), event( "e-1" ), event( "e-2" ) ], 2 ) )
+    server.output.close()
+
+    assert sorted( calls ) == [ "e-1", "e-2" ]
+    assert server.counters[ "duplicates" ] == 1
+    assert not server.in_flight
+
+def test_server_rejects_events_when_queue_is_full( make_config, tmp_path ):
+    server = WebhookServer( server_config( make_config, tmp_path, queue_size = 2 ), logger )
+
+    async def accept_all() -> list:
+        server.queue = asyncio.Queue( maxsize = 2 )
+        return [ server.accept( event( f"e-{index}" ) )[ 0 ] for index in range( 3 ) ]
+
+    assert asyncio.run( accept_all() ) == [ 202, 202, 503 ]
+    assert server.counters[ "rejected" ] == 1
+
+def test_server_acknowledges_over_http_and_answers_503_when_full( make_config, tmp_path ):
+    server = WebhookServer( server_config( make_config, tmp_path, queue_size = 2 ), logger )
+    server.output = open( tmp_path / "events.jsonl", "a" )
+
+    async def run() -> tuple[list, list]:
+        server.queue = asyncio.Queue( maxsize = 2 )
+        listener = await asyncio.start_server( server.handle_connection, "127.0.0.1", 0 )
+        port: int = listener.sockets[ 0 ].getsockname()[ 1 ]
+
+        full: list = await exchange( port, [ ( "POST", "/", event( f"e-{index}" ) ) for index in range( 3 ) ] + [ ( "POST", "/", b"x" * ( WebhookServer.MAX_BODY_SIZE + 1 ) ) ] )
+
+        workers: list = [ asyncio.create_task( server.worker() ) for _ in range( 2 ) ]
+        await server.queue.join()
+        drained: list = await exchange( port, [ ( "POST", "/", event( "e-0" ) ), ( "GET", "/missing", b"" ), ( "GET", "/stats", b"" ) ] )
+        await server.queue.join()
+
+        for worker in workers:
+            worker.cancel()
+        listener.close()
+
+        return full, drained
+
+    full, drained = asyncio.run( run() )
+    server.output.close()
+
+    assert [ status for status, payload in full ] == [ 202, 202, 503, 413 ]
+    assert [ status for status, payload in drained ] == [ 202, 404, 200 ]
+    assert drained[ 2 ][ 1 ][ "received" ] == 4
+    assert drained[ 2 ][ 1 ][ "rejected" ] == 1
+    assert server.counters[ "processed" ] == 2
+    assert server.counters[ "duplicates" ] == 1
+    assert len( open( tmp_path / "events.jsonl" ).readlines() ) == 2
+
+def test_server_rejects_bad_lengths_and_chunked_bodies( make_config, tmp_path ):
+    server = WebhookServer( server_config( make_config, tmp_path ), logger )
+
+    async def send( port: int, head: bytes ) -> int:
+        reader, writer = await asyncio.open_connection( "127.0.0.1", port )
+        writer.write( head )
+        await writer.drain()
+
+        status: int = int( ( await reader.readuntil( b"\r\n\r\n" ) ).split( b" " )[ 1 ] )
+        await reader.read()
+        writer.close()
+
+        return status
+
+    async def run() -> list:
+        server.queue = asyncio.Queue( maxsize = 10 )
+        listener = await asyncio.start_server( server.handle_connection, "127.0.0.1", 0 )
+        port: int = listener.sockets[ 0 ].getsockname()[ 1 ]
+
+        statuses: list = [
+            await send( port, b"POST / HTTP/1.1\r\nContent-Length: ten\r\n\r\n" ),
+            await send( port, b"POST / HTTP/1.1\r\nContent-Length: -5\r\n\r\n" ),
+            await send( port, b"POST / HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nhello\r\n0\r\n\r\n" ),
+            await send( port, b"POST / HTTP/1.1\r\nTransfer-Encoding: gzip\r\n\r\n" )
+        ]
+        listener.close()
+
+        return statuses
+
+    assert asyncio.run( run() ) == [ 400, 400, 411, 501 ]
+    assert server.counters[ "received" ] == 0